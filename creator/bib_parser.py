@@ -13,6 +13,8 @@ import os
 import os.path
 import re
 import xml.etree.ElementTree as ET
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
 
 # Third-party imports
@@ -20,11 +22,14 @@ from sqlalchemy import create_engine, exists, and_
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.engine.url import URL
+from sqlalchemy.dialects.postgresql import insert
 
 # Local application imports
 import model
-from model import Article, Author, CollectiveAuthor
+from model import (Article, Author, CollectiveAuthor, article_authors,
+                   article_collective_authors)
 from . import session_scope
+from .staging import ArticleRecord, AuthorRecord, CollectiveAuthorRecord
 
 
 # Parse Bibliographic Data
@@ -248,17 +253,54 @@ def parse_article(record):
     return article
 
 
-def generate_records(xml_file):
+def iterparse_records(xml_file):
+    """Generate the child elements of the root element of an xml file as soon
+    as each one has been parsed (the whole tree is never held in memory).
+
+    Each record is detached from the root element once the next record is
+    requested, so that it can be freed as soon as it is no longer referenced.
+
+    Parameters
+    ----------
+    Path to an xml file (or file object).
+
+    Yields
+    ------
+    xml.etree.ElementTree.Element
+    """
+    root = None
+    depth = 0
+    for event, element in ET.iterparse(xml_file, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = element
+            depth += 1
+        else:
+            depth -= 1
+            # Records are the elements closed at depth 1 (children of root)
+            if depth == 1:
+                yield element
+                root.remove(element)
+
+
+def generate_records(xml_file, streaming=False):
     """Generate an xml element corresponding to an article.
 
     Parameters
     ----------
     Path to an xml file exported from PubMed search results.
+    streaming: if True, records (PubmedArticle elements) are generated while
+    the file is being parsed and processed records are cleared from the tree
+    (See iterparse_records), so that memory use does not grow with the size of
+    the file.
 
     Yields
     ------
     xml.etree.ElementTree.Element
     """
+    if streaming:
+        yield from iterparse_records(xml_file)
+        return
     tree = ET.parse(xml_file)
     records = tree.getroot()
     for record in records:
@@ -282,8 +324,9 @@ def generate_records(xml_file):
 # associated with particular articles, or submitting queries to return all
 # articles authored by an author with a particular name, then this will make
 # no difference. Advantage: Store fewer author names.
-# TODO Update docstring
-def update_bib_from_xml(xml_file, session):
+# Alternative (2) is implemented: authors and collective authors are stored
+# once and shared by their articles (See load_bib_records).
+def update_bib_from_xml(xml_file, session, batch_size=1000):
     """Insert bibliographic information found in the given xml citation file
     into the database to which the given session is connected to.
 
@@ -291,37 +334,292 @@ def update_bib_from_xml(xml_file, session):
     ----------
     xml_file: path to an xml citation file exported from PubMed search results,
     or with the same format.
+    batch_size: number of records loaded at once (See load_bib_records).
+
+    Returns
+    -------
+    collections.Counter of the numbers of articles, authors and collective
+    authors inserted.
+    """
+    records = generate_records(xml_file, streaming=True)
+    return load_bib_records(records, session, batch_size)
+
+
+# Columns of the rows inserted by load_bib_records
+article_columns = ['title', 'pub_year', 'journal', 'journal_iso', 'vol',
+                   'issue', 'pages', 'doi', 'pmid']
+author_columns = ['first_initial', 'first_name', 'middle_initials',
+                  'last_name']
+
+
+def get_author_key(author):
+    """Return the tuple identifying an author by name: (first_initial,
+    first_name, middle_initials, last_name), with middle initials as a tuple.
+    """
+    return (author.first_initial, author.first_name,
+            tuple(author.middle_initials or ()), author.last_name)
+
+
+def generate_batches(iterable, batch_size):
+    """Generate lists of at most batch_size consecutive items of the given
+    iterable.
+    """
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def query_article_ids(session, pmids):
+    """Return a dictionary relating the given PMIDs to the ids of the stored
+    articles with these PMIDs, in a single query (PMIDs of articles that are
+    not stored are left out).
+    """
+    if not pmids:
+        return {}
+    return dict(session.query(Article.pmid, Article.id)
+                       .filter(Article.pmid.in_(list(pmids))))
+
+
+def query_author_ids(session, keys):
+    """Return a dictionary relating the given author keys (See
+    get_author_key) to the ids of the stored authors with these names, in a
+    single query (keys of authors that are not stored are left out).
+
+    Authors are selected by last name and matched on all name attributes in
+    Python, so that missing first names and initials (NULL) match too.
+    """
+    keys = set(keys)
+    if not keys:
+        return {}
+    last_names = {key[-1] for key in keys}
+    query = session.query(Author.id, Author.first_initial, Author.first_name,
+                          Author.middle_initials, Author.last_name)\
+                   .filter(Author.last_name.in_(list(last_names)))
+    author_ids = {}
+    for author in query:
+        key = get_author_key(author)
+        if key in keys:
+            author_ids.setdefault(key, author.id)
+    return author_ids
+
+
+def query_collective_author_ids(session, names):
+    """Return a dictionary relating the given collective author names to the
+    ids of the stored collective authors, in a single query (names of
+    collective authors that are not stored are left out).
+    """
+    if not names:
+        return {}
+    return dict(session.query(CollectiveAuthor.name, CollectiveAuthor.id)
+                       .filter(CollectiveAuthor.name.in_(list(names))))
+
+
+def insert_rows(session, table, rows):
+    """Insert the given rows (dictionaries) into the given table in a single
+    statement, skipping rows that conflict with stored rows.
+    """
+    if rows:
+        session.execute(insert(table).values(rows).on_conflict_do_nothing())
+
+
+def load_bib_records(records, session, batch_size=1000):
+    """Insert the articles parsed from the given xml records, with their
+    authors and collective authors, into the database to which the given
+    session is connected to (See load_articles).
+
+    Parameters
+    ----------
+    records: iterable of xml.etree.ElementTree.Element (See generate_records).
+    session: sqlalchemy.orm.session.Session
+    batch_size: maximum number of records loaded at once.
+
+    Returns
+    -------
+    collections.Counter of the numbers of articles, authors and collective
+    authors inserted.
+    """
+    articles = (parse_article(record) for record in records)
+    return load_articles(articles, session, batch_size)
+
+
+def load_articles(articles, session, batch_size=1000):
+    """Insert the given articles, with their authors and collective authors,
+    into the database to which the given session is connected to.
+
+    Articles are loaded in batches. For each batch, stored articles, authors
+    and collective authors are looked up with one IN query per entity (by
+    PMID and by name). Only new entities and the association rows of new
+    articles are then inserted, with one statement per table. Articles that
+    are already stored (same PMID) are left unchanged.
+
+    Parameters
+    ----------
+    articles: iterable of Articles or creator.staging.ArticleRecords.
+    session: sqlalchemy.orm.session.Session
+    batch_size: maximum number of articles loaded at once.
+
+    Returns
+    -------
+    collections.Counter of the numbers of articles, authors and collective
+    authors inserted.
+    """
+    counts = Counter()
+    for batch in generate_batches(articles, batch_size):
+        pmid_articles = {}
+        for article in batch:
+            if not article.pmid:
+                raise Exception('Article has no PMID!')
+            pmid_articles.setdefault(article.pmid, article)
+        stored_article_ids = query_article_ids(session, pmid_articles)
+        new_articles = [article for pmid, article in pmid_articles.items()
+                        if pmid not in stored_article_ids]
+        if not new_articles:
+            continue
+        # Authors and collective authors of new articles, by name
+        authors = {}
+        collective_authors = {}
+        for article in new_articles:
+            for author in article.authors:
+                authors.setdefault(get_author_key(author), author)
+            for collective_author in article.collective_authors:
+                collective_authors.setdefault(collective_author.name,
+                                              collective_author)
+        author_ids = query_author_ids(session, authors)
+        new_authors = [{column: getattr(author, column)
+                        for column in author_columns}
+                       for key, author in authors.items()
+                       if key not in author_ids]
+        insert_rows(session, Author.__table__, new_authors)
+        author_ids.update(query_author_ids(session,
+                                           authors.keys() - author_ids.keys()))
+        collective_author_ids = query_collective_author_ids(
+                session, collective_authors)
+        new_collective_authors = [{'name': name} for name in collective_authors
+                                  if name not in collective_author_ids]
+        insert_rows(session, CollectiveAuthor.__table__,
+                    new_collective_authors)
+        missing = collective_authors.keys() - collective_author_ids.keys()
+        collective_author_ids.update(query_collective_author_ids(session,
+                                                                 missing))
+        # Articles and association rows
+        insert_rows(session, Article.__table__,
+                    [{column: getattr(article, column)
+                      for column in article_columns}
+                     for article in new_articles])
+        article_ids = query_article_ids(session, [article.pmid for article
+                                                  in new_articles])
+        author_rows = set()
+        collective_author_rows = set()
+        for article in new_articles:
+            article_id = article_ids[article.pmid]
+            for author in article.authors:
+                author_rows.add((article_id,
+                                 author_ids[get_author_key(author)]))
+            for collective_author in article.collective_authors:
+                collective_author_id = collective_author_ids[
+                        collective_author.name]
+                collective_author_rows.add((article_id, collective_author_id))
+        insert_rows(session, article_authors,
+                    [{'article_id': article_id, 'author_id': author_id}
+                     for article_id, author_id in sorted(author_rows)])
+        insert_rows(session, article_collective_authors,
+                    [{'article_id': article_id,
+                      'collective_author_id': collective_author_id}
+                     for article_id, collective_author_id
+                     in sorted(collective_author_rows)])
+        counts['articles'] += len(new_articles)
+        counts['authors'] += len(new_authors)
+        counts['collective_authors'] += len(new_collective_authors)
+    return counts
+
+
+def stage_article(record):
+    """Parse an article from an xml record into a plain ArticleRecord (See
+    creator.staging), which can be sent across processes.
+    """
+    article = parse_article(record)
+    authors = [AuthorRecord(**{column: getattr(author, column)
+                               for column in author_columns})
+               for author in article.authors]
+    collective_authors = [CollectiveAuthorRecord(name=collective_author.name)
+                          for collective_author in article.collective_authors]
+    return ArticleRecord(**{column: getattr(article, column)
+                            for column in article_columns},
+                         authors=authors,
+                         collective_authors=collective_authors)
+
+
+def parse_bib_file(xml_file):
+    """Return the list of ArticleRecords parsed from the given xml citation
+    file (See stage_article).
+    """
+    return [stage_article(record)
+            for record in generate_records(xml_file, streaming=True)]
+
+
+def merge_articles(article_lists):
+    """Merge lists of ArticleRecords, keeping the first record of each
+    article: records with the same PMID, or with the same DOI (ignoring
+    case), are records of the same article.
+    """
+    merged = []
+    pmids = set()
+    dois = set()
+    for articles in article_lists:
+        for article in articles:
+            doi = article.doi.lower() if article.doi else None
+            if article.pmid in pmids or (doi is not None and doi in dois):
+                continue
+            if article.pmid:
+                pmids.add(article.pmid)
+            if doi is not None:
+                dois.add(doi)
+            merged.append(article)
+    return merged
+
+
+def parse_bib_files(xml_files, processes=None):
+    """Parse the given xml citation files in a pool of worker processes, and
+    return the merged list of ArticleRecords (See merge_articles).
+
+    Parameters
+    ----------
+    xml_files: paths to xml citation files exported from PubMed search
+    results, or with the same format.
+    processes: number of worker processes (the number of processors of the
+    machine by default). If 1, files are parsed in the current process.
+    """
+    if processes == 1:
+        return merge_articles(map(parse_bib_file, xml_files))
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return merge_articles(executor.map(parse_bib_file, xml_files))
+
+
+def update_bib_from_xml_files(xml_files, session, processes=None,
+                              batch_size=1000):
+    """Insert bibliographic information found in the given xml citation files
+    into the database to which the given session is connected to.
+
+    Files are parsed in parallel (See parse_bib_files), and the merged
+    articles are then loaded at once (See load_articles).
+
+    Returns
+    -------
+    collections.Counter of the numbers of articles, authors and collective
+    authors inserted.
     """
-    for record in generate_records(xml_file):
-        article = parse_article(record)
-        # TODO Show Karoline the alternative approaches to storing the bibliographic
-        # data - discuss which is best.
-        # UNCOMMENT code below and indent session.add() to show alternative!
-#        authors = article.authors
-#        collective_authors = article.collective_authors
-#        # Reset the article's authors and collective authors to prevent
-#        # undesirable objects being added to a session
-#        article.authors = []
-#        article.collective_authors = []
-#        if not database_contains_article(article, session):
-#            for author in authors:
-#                existing_author = get_author(author, session)
-#                if existing_author and existing_author not in article.authors:
-#                    article.authors.append(existing_author)
-#                else:
-#                    article.authors.append(author)
-#            for collective_author in collective_authors:
-#                existing_collective_author = get_collective_author(collective_author, session)
-#                if (existing_collective_author and
-#                    existing_collective_author not in article.collective_authors):
-#                    article.collective_authors.append(existing_collective_author)
-#                else:
-#                    article.collective_authors.append(collective_author)
-        session.add(article)
+    articles = parse_bib_files(xml_files, processes)
+    return load_articles(articles, session, batch_size)
 
 
 # FUNCTIONS ONLY REQUIRED IF ALTERNATIVE (2) FOR AUTHORS/COLLECTIVE AUTHORS
-# IS IMPLEMENTED:
+# IS IMPLEMENTED (one query per entity, See load_bib_records for batched
+# lookups):
 def get_article(article, session):
     """Return an Article from the database whose PMID is the same as the
     given article, and None if no such article can be found.
@@ -395,4 +693,19 @@ def database_contains_collective_author(collective_author, session):
     return result
 
 if __name__ == '__main__':
-    pass
+    arg_parser = ArgumentParser(description='Import bibliographic information '
+                                            'from xml citation files exported '
+                                            'from PubMed.')
+    arg_parser.add_argument('xml_files', nargs='+',
+                            help='Paths to xml citation files.')
+    arg_parser.add_argument('-p', '--processes', type=int, default=None,
+                            help='Number of processes parsing files (the '
+                                 'number of processors by default).')
+    arg_parser.add_argument('-b', '--batch-size', type=int, default=1000,
+                            help='Number of articles loaded at once.')
+    args = arg_parser.parse_args()
+    with session_scope() as session:
+        counts = update_bib_from_xml_files(args.xml_files, session,
+                                           args.processes, args.batch_size)
+    print(f"Inserted {counts['articles']} articles, {counts['authors']} "
+          f"authors and {counts['collective_authors']} collective authors.")
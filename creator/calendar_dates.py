@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Build the calendar dimension and select Times by integer date keys.
+
+Each day of the covered date range is stored once as a model.CalendarDate,
+keyed by its integer date key yyyymmdd (See creator.dates.get_date_key).
+Calendar rows are computed for a whole range at once with pandas and
+inserted in bulk, and Times only reference them by date key. Dates (and
+times of day) are compared as integers, so date range queries are index
+range scans on times.date_key.
+
+Times are also deduplicated by their keys (See TimeRegistry), so that all
+samples collected at the same date and time share a single Time.
+
+Created on Sun Oct 18 20:14:27 2026
+
+@author: William
+"""
+
+# Standard library imports
+
+# Third-party imports
+import pandas as pd
+from pandas import DataFrame
+
+# Local application imports
+from model import CalendarDate, Time, Count, Sample
+from .dates import get_date_key, get_seasons
+
+
+def to_date_key(date):
+    """Return the date key of the given datetime.date (or date key)."""
+    if isinstance(date, int):
+        return date
+    return get_date_key(date.year, date.month, date.day)
+
+
+def get_calendar_dates(start, end):
+    """Return the calendar rows of all dates from start to end (inclusive).
+
+    Parameters
+    ----------
+    start, end : datetime.date
+
+    Returns
+    -------
+    pandas.DataFrame
+        Columns are the model.CalendarDate attributes.
+    """
+    dates = pd.date_range(start, end, freq='D')
+    return DataFrame({
+            'date_key': get_date_key(dates.year, dates.month, dates.day),
+            'date': dates.date,
+            'year': dates.year,
+            'month': dates.month,
+            'day': dates.day,
+            'day_of_week': dates.dayofweek + 1,
+            'day_of_year': dates.dayofyear,
+            'season': get_seasons(dates.date)})
+
+
+def get_date_range(times):
+    """Return the earliest and latest dates of the given Times (or None,
+    None if no Time has a date).
+    """
+    dates = [time.date for time in times
+             if time is not None and time.date is not None]
+    if not dates:
+        return None, None
+    return min(dates), max(dates)
+
+
+def populate_calendar(session, start, end):
+    """Insert the calendar rows of all dates from start to end (inclusive)
+    that are not already in the database. Return the number of rows inserted.
+    """
+    start_key, end_key = to_date_key(start), to_date_key(end)
+    existing = {date_key for date_key, in session.query(CalendarDate.date_key)
+                .filter(CalendarDate.date_key.between(start_key, end_key))}
+    calendar = get_calendar_dates(start, end)
+    calendar = calendar[~calendar['date_key'].isin(existing)]
+    # Note: Mappings must hold Python (not NumPy) scalars
+    mappings = calendar.astype(object).to_dict('records')
+    session.bulk_insert_mappings(CalendarDate, mappings)
+    return len(mappings)
+
+
+def populate_calendar_for(session, times):
+    """Insert the calendar rows covering the dates of the given Times (See
+    populate_calendar). Return the number of rows inserted.
+    """
+    start, end = get_date_range(times)
+    if start is None:
+        return 0
+    return populate_calendar(session, start, end)
+
+
+def get_time_registry_key(time):
+    """Return the key identifying a Time by its components."""
+    return (time.date_key, time.time_key, time.uncertainty)
+
+
+class TimeRegistry:
+    """Registry ensuring that each distinct (date key, time key,
+    uncertainty) corresponds to a single Time.
+
+    Times already present in the database should be registered (See
+    from_session), so that they are reused by new facts.
+    """
+
+    def __init__(self, times=()):
+        self._times = {}
+        for time in times:
+            self._times.setdefault(get_time_registry_key(time), time)
+
+    @classmethod
+    def from_session(cls, session):
+        """Return a TimeRegistry containing all times found in the database
+        to which the given session is connected.
+        """
+        return cls(session.query(Time).all())
+
+    def __len__(self):
+        return len(self._times)
+
+    def __contains__(self, time):
+        return get_time_registry_key(time) in self._times
+
+    def get_time(self, time):
+        """Return the registered Time equivalent to the given Time,
+        registering the given Time if there is none (None is returned as is).
+        """
+        if time is None:
+            return None
+        return self._times.setdefault(get_time_registry_key(time), time)
+
+
+def query_times_between(session, start, end):
+    """Return a query for all times with a date from start to end
+    (inclusive), given as datetime.dates or date keys.
+    """
+    return session.query(Time)\
+                  .filter(Time.date_key.between(to_date_key(start),
+                                                to_date_key(end)))
+
+
+def query_counts_between(session, start, end):
+    """Return a query for all counts of samples collected from start to end
+    (inclusive) (See query_times_between).
+    """
+    return session.query(Count)\
+                  .join(Count.sample_time)\
+                  .filter(Time.date_key.between(to_date_key(start),
+                                                to_date_key(end)))
+
+
+def query_samples_between(session, start, end):
+    """Return a query for all samples (with counts) collected from start to
+    end (inclusive) (See query_times_between).
+    """
+    return session.query(Sample)\
+                  .join(Sample.counts)\
+                  .join(Count.sample_time)\
+                  .filter(Time.date_key.between(to_date_key(start),
+                                                to_date_key(end)))\
+                  .distinct()
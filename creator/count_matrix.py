@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Export counts as a sparse sample by taxon matrix.
+
+Matrices are built directly from (long format) counts, either queried from
+the count_facts table or returned by
+creator.taxon_merger.aggregate_at_taxon_level, without pivoting into a dense
+DataFrame. Construction is linear in the number of non-zero counts.
+
+Created on Sun Oct 18 14:02:47 2026
+
+@author: William
+"""
+
+# Standard library imports
+
+# Third-party imports
+import biom
+import numpy as np
+import pandas as pd
+from biom.util import biom_open
+from scipy import sparse
+
+# Local application imports
+from model import Taxon
+from .taxonomy import query_counts_at_level
+
+
+def get_labels(df, cols, na_label='unassigned'):
+    """Return integer codes and unique labels for the given column(s).
+
+    Parameters
+    ----------
+    df : pandas.core.frame.DataFrame
+    cols : str or list of str
+        If several columns are given, labels are formed by joining the
+        (non-missing) values of each row with ';' e.g. a lineage path.
+    na_label : str
+        Label used for missing values (or rows with missing values in all of
+        the given columns).
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        Codes (one for each row in df) and labels.
+    """
+    if isinstance(cols, str):
+        values = df[cols]
+    else:
+        values = df[list(cols)].astype(object)
+        values = values.where(values.notna(), None).itertuples(index=False)
+        values = pd.Series([';'.join(str(value) for value in row if value)
+                            for row in values], index=df.index)
+        values = values.where(values != '', None)
+    if values.isna().any():
+        values = values.astype(object).where(values.notna(), na_label)
+    codes, labels = pd.factorize(values)
+    return codes, np.asarray(labels)
+
+
+def counts_to_csr(df, row_col='sample_id', col_cols='genus',
+                  value_col='count', na_label='unassigned'):
+    """Return a sparse matrix of counts from a long format count table.
+
+    Parameters
+    ----------
+    df : pandas.core.frame.DataFrame
+        A long format count table e.g. the output of aggregate_at_taxon_level.
+    row_col : str
+        Column identifying the rows of the matrix (usually samples).
+    col_cols : str or list of str
+        Column(s) identifying the columns of the matrix (usually taxa) e.g.
+        'genus', 'genus_id' or ['kingdom', 'phylum', ..., 'genus'].
+    value_col : str
+        Column containing the counts. Counts for duplicate (row, column)
+        pairs are summed.
+    na_label : str
+        Label used for missing taxa (See get_labels).
+
+    Returns
+    -------
+    tuple
+        A scipy.sparse.csr_matrix, an array of row labels and an array of
+        column labels.
+    """
+    row_codes, row_labels = get_labels(df, row_col, na_label)
+    col_codes, col_labels = get_labels(df, col_cols, na_label)
+    matrix = sparse.coo_matrix(
+            (df[value_col].to_numpy(), (row_codes, col_codes)),
+            shape=(len(row_labels), len(col_labels))
+            ).tocsr()
+    return matrix, row_labels, col_labels
+
+
+def query_count_matrix(session, taxon_level, na_label='unassigned'):
+    """Return a sparse sample by taxon matrix of counts summed at the given
+    taxonomic level from the count_facts table.
+
+    Parameters
+    ----------
+    session : creator.Session
+    taxon_level : str
+        Any of creator.taxonomy.taxon_levels e.g. 'genus'.
+    na_label : str
+        Label used for counts of lineages that are empty at the given level.
+
+    Returns
+    -------
+    tuple
+        A scipy.sparse.csr_matrix, an array of sample ids (database ids) and
+        an array of taxon paths (See model.Taxon.path).
+    """
+    counts = query_counts_at_level(session, taxon_level).subquery()
+    taxon_id = getattr(counts.c, taxon_level + '_id')
+    query = session.query(counts.c.sample_id, Taxon.path, counts.c.count)\
+                   .outerjoin(Taxon, Taxon.id == taxon_id)
+    df = pd.read_sql(query.statement, session.bind)
+    return counts_to_csr(df, row_col='sample_id', col_cols='path',
+                         na_label=na_label)
+
+
+def write_npz(file, matrix, row_labels, col_labels):
+    """Write a sparse matrix and its labels to a compressed .npz file.
+
+    The file can also be read using scipy.sparse.load_npz (without labels).
+    """
+    matrix = matrix.tocsr()
+    np.savez_compressed(file, data=matrix.data, indices=matrix.indices,
+                        indptr=matrix.indptr, shape=matrix.shape,
+                        format=b'csr',
+                        row_labels=np.asarray(row_labels).astype(str),
+                        col_labels=np.asarray(col_labels).astype(str))
+
+
+def read_npz(file):
+    """Return a sparse matrix, row labels and column labels from a .npz file
+    written by write_npz.
+    """
+    with np.load(file) as loaded:
+        matrix = sparse.csr_matrix(
+                (loaded['data'], loaded['indices'], loaded['indptr']),
+                shape=loaded['shape'])
+        return matrix, loaded['row_labels'], loaded['col_labels']
+
+
+def write_biom(file, matrix, row_labels, col_labels, table_id=None):
+    """Write a sample by taxon sparse matrix to a BIOM (HDF5) file.
+
+    Note: BIOM tables are oriented as observations (taxa) by samples, so the
+    matrix is transposed.
+    """
+    table = biom.Table(matrix.T.tocsr(),
+                       observation_ids=[str(label) for label in col_labels],
+                       sample_ids=[str(label) for label in row_labels],
+                       table_id=table_id)
+    with biom_open(file, 'w') as f:
+        table.to_hdf5(f, generated_by='mbiotaDB')
+    return table
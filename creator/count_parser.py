@@ -27,6 +27,7 @@ import model
 from model import Experiment, Sample, Preparation
 from model import Processing, Lineage, Count, SequencingVariant
 from . import session_scope
+from .taxonomy import get_lineage_attrs, TaxonRegistry
 
 
 # TODO: Better to implement as a namedtuple? Are we going to add more
@@ -93,7 +94,7 @@ def get_proc_id_from_biom(biom_path):
 # a sample to a count during the formation of a CountFact.
 # TODO Remove session argument from all calls! I am not convinced that session 
 # should be used in this way to search for existing lineages.
-def get_counts(biom_path, session):
+def get_counts(biom_path, session, registry=None, harmonizer=None):
     """Parse counts, lineages and seq variants into CountElements.
     
     The function will first attempt to read lineages from the given BIOM file.
@@ -107,6 +108,14 @@ def get_counts(biom_path, session):
         Path to the BIOM file from which CountElements will be parsed.
     session : creator.Session
         Session used to search database for a matching lineages.
+    registry : creator.taxonomy.TaxonRegistry
+        Registry of taxa to link lineages to. If None, a registry of the taxa
+        already in the database is used. Pass the same registry when parsing
+        several BIOM files, so that taxa are shared between their lineages.
+    harmonizer : creator.taxon_harmonizer.TaxonomyHarmonizer
+        If given, lineages are resolved to canonical lineages, so that
+        lineages from BIOM metadata and trees of different studies match.
+        Its cache file (if any) is saved once the lineages are resolved.
     
     Returns
     -------
@@ -123,7 +132,12 @@ def get_counts(biom_path, session):
         tree_path = os.path.join(path, tree_file)
         tree = Phylo.read(tree_path, 'newick')
         taxa = get_tree_taxa(tree)
-    lineage_map = get_lineage_map(table, session, tree, taxa)
+    if registry is None:
+        registry = TaxonRegistry.from_session(session)
+    lineage_map = get_lineage_map(table, session, tree, taxa, registry,
+                                  harmonizer)
+    if harmonizer is not None and harmonizer.cache_file:
+        harmonizer.save_cache()
     counts = defaultdict(list)
     for obs_id, samp_id in table.nonzero():
         lineage = lineage_map[obs_id]
@@ -149,22 +163,23 @@ def get_sample(samp_id, study_id, session):
         return Sample()
 
 
-def get_lineage(table, obs_id, session, tree=None, taxa=None):
+def get_lineage(table, obs_id, session, tree=None, taxa=None, registry=None,
+                harmonizer=None):
     try:
         lineage = table.metadata(obs_id, axis='observation')['taxonomy']
     except TypeError:
         lineage = get_lineage_from_tree(obs_id, tree, taxa)
-    lineage = dict(zip(['kingdom_', 'phylum_', 'class_', 
-                        'order_', 'family_', 'genus_', 
-                        'species_'], lineage))
-    lineage = Lineage(**lineage)
+    # Normalize taxa names once here, so that they never need to be cleaned
+    # when counts are aggregated
+    lineage = Lineage(**get_lineage_attrs(lineage, registry, harmonizer))
     return lineage
 
 
-def get_lineage_map(table, session, tree, taxa):
+def get_lineage_map(table, session, tree, taxa, registry=None, harmonizer=None):
     lineage_map = {}
     for obs_id in table.ids(axis='observation'):
-        lineage = get_lineage(table, obs_id, session, tree, taxa)
+        lineage = get_lineage(table, obs_id, session, tree, taxa, registry,
+                              harmonizer)
         lineage_map[obs_id] = lineage
     return lineage_map
 
@@ -175,14 +190,13 @@ def get_tree_taxa(tree):
     return taxa
 
 
-# TODO Check whether all taxon names contain the chars [\w\d_-]. I notice that
-# some of the lineages extracted as metadata from biom files have a form x__[name].
-# What is the significance of the brakets in this name? Should we include [] in
-# the regular expression for searching tree taxa names.
+# TODO Check whether all taxon names contain the chars [\w\d_-].
+# Note: Proposed taxa (Greengenes) have the form x__[name]. The brackets are
+# matched here and removed when the lineage is normalized (See get_lineage).
 # Note: We are currently, discarding any distance/confidence information 
 # available in tree - could this be useful?
 # TODO: Any way to speed up this function?
-taxon_name_re = re.compile(r'([\d.]+:)?(?P<name>\w__[\w\d_-]*)')
+taxon_name_re = re.compile(r'([\d.]+:)?(?P<name>\w__\[?[\w\d_-]*\]?)')
 def get_lineage_from_tree(obs_id, tree, taxa):
     seq_var = tree.find_any(name=obs_id)
     taxa_prefix = ['k__', 'p__', 'c__', 'o__', 'f__', 'g__', 's__']
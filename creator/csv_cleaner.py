@@ -15,6 +15,7 @@ import logging
 import sys
 import os.path
 from os.path import dirname
+from collections.abc import Mapping
 
 # Third-party imports
 import numpy as np
@@ -24,6 +25,9 @@ from pint import UndefinedUnitError, DimensionalityError
 
 # Local application imports
 from . import ureg
+from .units import resolve_units, convert_values
+from .missing import is_missing_value, mask_missing_values
+from .read_planner import read_header, plan_columns, get_engine
 
 # Constants
 ROOT_DIR = dirname(dirname(__file__))
@@ -82,7 +86,8 @@ invalid_type_column = ('WARNING: `{}` column is not a valid column type. '
 # TODO: Supply a default_dayfirst parameter that will be used when dayfirst
 # inference fails.
 def parse_file(file, sep='\t', na_regex=None, strip=False,
-               column_types={}, invalid_dates={}, invalid_times={}, **kwargs):
+               column_types={}, invalid_dates={}, invalid_times={},
+               columns=None, **kwargs):
     """Parse a delimited file into a cleaner pandas DataFrame.
 
     This function convert a "dirty" delimited file (e.g. csv, tsv) into
@@ -106,7 +111,8 @@ def parse_file(file, sep='\t', na_regex=None, strip=False,
         but with different default value ('\t' instead of ',').
     na_regex : str or re.Pattern
         A regular expression that will be used to replace all values that
-        represent missing values with numpy.nan.
+        represent missing values with numpy.nan. Values are missing if the
+        regular expression matches at their start (See creator.missing).
     strip : bool
         If true, whitespace is stripped from the left and right of every string
         value in the file.
@@ -123,15 +129,39 @@ def parse_file(file, sep='\t', na_regex=None, strip=False,
         ``is_invalid_time()`` that will be used to check whether the column
         has invalid times and to replace any such times with None. Similar to
         `invalid_dates` parameter.
+    columns : iterable of str, optional
+        If given (and `file` is a path), only these columns and the columns
+        in `column_types` are read (See creator.read_planner). Columns in
+        `column_types` are read as strings. If `engine='pyarrow'` is given
+        but pyarrow is not installed, the default engine is used.
     **kwargs
         Any other keyword parameters accepted by ``pandas.read_csv()``. No
         guarantee is made that all such parameters will be compatible with
         other processing parameters provided with this function.
     """
-    df = read_csv(file, sep=sep, skip_blank_lines=True, skipinitialspace=True,
-                  **kwargs)
+    if columns is not None:
+        typed_columns = {col for cols in column_types.values() for col in cols}
+        usecols = plan_columns(read_header(file, sep),
+                               typed_columns.union(columns))
+        kwargs.setdefault('usecols', usecols)
+        dtype = kwargs.get('dtype', {})
+        # Note: A scalar dtype (e.g. str) given by the caller applies to all
+        # columns and is left as is
+        if isinstance(dtype, Mapping):
+            kwargs['dtype'] = dict(
+                    dict.fromkeys(typed_columns.intersection(usecols), str),
+                    **dtype)
+    if 'engine' in kwargs:
+        kwargs['engine'] = get_engine(kwargs['engine'])
+    if kwargs.get('engine') == 'pyarrow':
+        # Note: skipinitialspace is not supported by the pyarrow engine
+        df = read_csv(file, sep=sep, skip_blank_lines=True, **kwargs)
+    else:
+        df = read_csv(file, sep=sep, skip_blank_lines=True,
+                      skipinitialspace=True, **kwargs)
     if na_regex:
-        df.replace(to_replace=na_regex, value=np.nan, inplace=True)
+        # Note: The regex is only matched against each distinct value once
+        df = mask_missing_values(df, na_regex)
     if strip:
         # Get all string-like columns
         str_cols = df.select_dtypes(['object'])
@@ -146,7 +176,7 @@ def parse_file(file, sep='\t', na_regex=None, strip=False,
     # Start processing columns by type
     for unit_col in all_column_types['unit']:
         if not column_exists(df, unit_col): continue
-        df[unit_col] = df[unit_col].apply(unit_converter, args=('replace',))
+        df[unit_col] = resolve_unit_column(df[unit_col])
     for ts_col in all_column_types['timestamp']:
         if not column_exists(df, ts_col): continue
         # TODO: If the following pd str method fails, the column doesn't contain str
@@ -257,21 +287,19 @@ def parse_file(file, sep='\t', na_regex=None, strip=False,
 def convert_units(df, values_to_units={}, to_units={}, decimal_places={},
                   add_unit_columns=False, remove_unit_columns=True,
                   recognized_units={}):
+    # Note: Each distinct unit (string) is only resolved once, and values are
+    # converted with one multiplication per distinct unit (See creator.units).
     for value_col, unit in values_to_units.items():
         if not column_exists(df, value_col): continue
         if column_exists(df, unit, log=False, stdout=False):
             # Convert the units
-            df[unit] = df[unit].apply(unit_converter, args=('replace',),
-                                      kwds=recognized_units)
-            quantities = df[value_col] * df[unit]
+            df[unit] = resolve_unit_column(df[unit], recognized_units)
+            from_units = df[unit]
         else:
-            try:
-                unit = ureg.parse_expression(str(unit)).units
-            except UndefinedUnitError:
+            from_units = resolve_units(unit)
+            if from_units is None:
                 raise ValueError(f'Invalid unit {unit!r} provided as a value in '
                                  '`value_to_unit` argument.')
-            else:
-                quantities = df[value_col].apply(lambda x: x * unit)
         # Perform conversion
         try:
             conversion_unit = to_units[value_col]
@@ -285,7 +313,8 @@ def convert_units(df, values_to_units={}, to_units={}, decimal_places={},
             raise ValueError(f'Invalid unit `{conversion_unit}` provided as '
                              'a value in `to_units` argument.')
         try:
-            df[value_col] = quantities.apply(convert_quantity, args=(conversion_unit,))
+            df[value_col] = convert_values(df[value_col], from_units,
+                                           conversion_unit)
         except DimensionalityError:
             raise ValueError(f'Units for values in column "{value_col}" are incompatible '
                              f'for conversion to unit `{unit}` provided for this '
@@ -508,15 +537,15 @@ def column_exists(df, column, log=True, stdout=True, log_msg=None):
 
 
 def is_missing(value):
-    if re_missing.match(value):
-        return True
-    return False
+    return is_missing_value(value, re_missing)
 
 
 def replace_missing(df, inplace=False):
-    new_df = df.replace(to_replace=re_missing, value=np.nan, inplace=inplace)
+    new_df = mask_missing_values(df, re_missing)
     if not inplace:
         return new_df
+    for col in new_df.columns:
+        df[col] = new_df[col]
 
 
 # DATE AND TIME UTILITY FUNCTIONS
@@ -747,6 +776,19 @@ def create_quantity(value, unit):
     except (AttributeError, TypeError):
         return np.nan
 
+def resolve_unit_column(units, recognized_units={}):
+    """Convert a column of strings to pint Unit objects (or np.nan if a
+    string is not a recognized unit), resolving each unique string once (See
+    unit_converter).
+    """
+    codes, uniques = pd.factorize(units.to_numpy(dtype=object))
+    resolved = np.empty(len(uniques) + 1, dtype=object)
+    resolved[:] = [resolve_units(unique, recognized_units) for unique in uniques] \
+                  + [None]
+    resolved[pd.isna(resolved)] = np.nan
+    return pd.Series(resolved[codes], index=units.index)
+
+
 def unit_converter(string, raise_or_replace='raise', recognized_units={},
                    *args, **kwds):
     """Convert a string to a pint Unit object.
@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""
+Infer date formats and parse whole columns of sample collection timestamps.
+
+Metadata files use a single (but unknown) date format in most date columns
+e.g. '3/1/07 0:00' or '2013-01-08'. Instead of parsing every value with
+dateutil, one explicit strptime format is inferred for each column from a
+sample of its (unique) values, and the whole column is parsed at once with
+pandas.to_datetime. Only values that do not match the inferred format (the
+leftovers) are parsed value by value, using a fallback parser e.g.
+creator.sample_parser.parse_collection_timestamp.
+
+Ambiguous day/month orders are resolved as for dateutil, using the dayfirst
+flag of the column (See is_day_first). Year first dates are always read as
+year-month-day (ISO 8601).
+
+Created on Sun Oct 18 15:21:36 2026
+
+@author: William
+"""
+
+# Standard library imports
+import re
+import datetime
+from collections import namedtuple
+from functools import lru_cache
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+from pandas import isna, Series, DataFrame
+
+# Local application imports
+
+
+# Candidate formats (in order of preference)
+year_first_formats = ['%Y-%m-%d', '%Y/%m/%d']
+month_first_formats = ['%m/%d/%Y', '%m/%d/%y', '%m-%d-%Y', '%m-%d-%y']
+day_first_formats = ['%d/%m/%Y', '%d/%m/%y', '%d-%m-%Y', '%d-%m-%y',
+                     '%d.%m.%Y', '%d.%m.%y']
+time_formats = ['%H:%M', '%H:%M:%S', '%I:%M %p', '%I:%M%p', '%I:%M:%S %p']
+date_time_seps = [' ', 'T']
+# Patterns of format directives, used to check that values match a format
+# exactly (pandas accepts reduced ISO 8601 dates e.g. '2009' as '%Y-%m-%d').
+directive_patterns = {'%Y': r'\d{4}', '%y': r'\d{2}', '%m': r'\d{1,2}',
+                      '%d': r'\d{1,2}', '%H': r'\d{1,2}', '%I': r'\d{1,2}',
+                      '%M': r'\d{2}', '%S': r'\d{2}', '%p': r'[aApP][mM]'}
+re_directive = re.compile(r'%[a-zA-Z]')
+
+re_day_month_year = re.compile(r'(?:^|[^-/\d])'                     # border char
+                               r'(0?[1-9]|[1-2][0-9]|3[0-1])[/-]'   # day
+                               r'(0?[1-9]|1[0-2])[/-]'              # month
+                               r'(\d{2}|\d{4})'                     # year
+                               r'(?:$|[^-/\d])')                    # border char
+re_month_day_year = re.compile(r'(?:^|[^-/\d])'                     # border char
+                               r'(0?[1-9]|1[0-2])[/-]'              # month
+                               r'(0?[1-9]|[1-2][0-9]|3[0-1])[/-]'   # day
+                               r'(\d{2}|\d{4})'                     # year
+                               r'(?:$|[^-/\d])')                    # border char
+# An interval of two dates e.g. '3/1/2007-3/5/2007' (the whole value)
+re_interval = re.compile(r'^((?:\d{1,2}/)?(?:\d{1,2}/)?(?:\d{4}|\d{2}))'  # start
+                         r'-'
+                         r'((?:\d{1,2}/)?(?:\d{1,2}/)?(?:\d{4}|\d{2}))$') # end
+
+# Last day (month*100 + day) of each season (See model.Time.get_season)
+season_ends = [(320, 'winter'), (620, 'spring'), (922, 'summer'),
+               (1220, 'autumn'), (1231, 'winter')]
+
+# A format inferred for a column:
+#   format: strptime format, or None if no candidate format matched
+#   interval: if True, only the start date of intervals is parsed
+#   dayfirst: passed on to the fallback parser
+DateFormat = namedtuple('DateFormat', ['format', 'interval', 'dayfirst'])
+
+
+def is_day_first(timestamp, default=False):
+    """Return True if the given timestamp contains a date whose day is
+    (unambiguously) written before the month, False if the month is
+    (unambiguously) written first, or the default otherwise.
+    """
+    # Assumes month first by default!
+    if isna(timestamp):
+        return default
+    ddmm = re_day_month_year.search(timestamp)
+    mmdd = re_month_day_year.search(timestamp)
+    if ddmm and not mmdd:
+        return True
+    elif mmdd and not ddmm:
+        return False
+    else:
+        return default
+
+
+def get_candidate_formats(dayfirst=False):
+    """Return the list of candidate formats, with day first formats
+    preferred to month first formats if dayfirst is True.
+    """
+    if dayfirst:
+        date_formats = year_first_formats + day_first_formats \
+                       + month_first_formats
+    else:
+        date_formats = year_first_formats + month_first_formats \
+                       + day_first_formats
+    formats = list(date_formats)
+    for sep in date_time_seps:
+        formats += [date_format + sep + time_format
+                    for date_format in date_formats
+                    for time_format in time_formats]
+    return formats + time_formats
+
+
+@lru_cache(maxsize=None)
+def get_format_regex(date_format):
+    """Return a regular expression matching values of the given strptime
+    format.
+    """
+    parts = re_directive.split(date_format)
+    directives = re_directive.findall(date_format)
+    pattern = re.escape(parts[0])
+    for directive, part in zip(directives, parts[1:]):
+        pattern += directive_patterns[directive] + re.escape(part)
+    return re.compile(pattern)
+
+
+def get_interval_starts(values):
+    """Return the given values with intervals replaced by their start date."""
+    return values.str.replace(re_interval, r'\1', regex=True)
+
+
+def to_datetimes(values, date_format):
+    """Parse a Series of strings with the given DateFormat. Values that do
+    not match the format are NaT.
+    """
+    if date_format.format is None:
+        return pd.to_datetime(Series(pd.NaT, index=values.index))
+    if date_format.interval:
+        values = get_interval_starts(values)
+    timestamps = pd.to_datetime(values, format=date_format.format,
+                                errors='coerce')
+    matches = values.str.fullmatch(get_format_regex(date_format.format))
+    return timestamps.where(matches.fillna(False).astype(bool))
+
+
+def infer_date_format(values, dayfirst=None, sample_size=100, hint=None):
+    """Infer the format of a column of timestamps.
+
+    Parameters
+    ----------
+    values : pandas.Series
+        Non-missing (stripped) timestamps.
+    dayfirst : bool
+        Whether ambiguous dates have the day first. By default, True if any
+        of the values has the day first (See is_day_first).
+    sample_size : int
+        Number of unique values used to infer the format.
+    hint : DateFormat, optional
+        A previously inferred format (e.g. for a file with the same header),
+        returned as is if it has the same dayfirst flag and matches all of
+        the sampled values.
+
+    Returns
+    -------
+    DateFormat
+        The candidate format matching most of the sampled values (or a format
+        of None if none match).
+    """
+    unique_values = Series(pd.unique(values), dtype=object)
+    if dayfirst is None:
+        dayfirst = any(is_day_first(value) for value in unique_values)
+    sample = unique_values[:sample_size]
+    if (hint is not None and hint.format is not None
+            and hint.dayfirst == dayfirst
+            and to_datetimes(sample, hint).notna().all()):
+        return hint
+    best = DateFormat(None, False, dayfirst)
+    best_count = 0
+    interval_starts = get_interval_starts(sample)
+    for interval in (False, True):
+        if interval and interval_starts.equals(sample):
+            break
+        for candidate in get_candidate_formats(dayfirst):
+            # Note: Matching the format's regex is much faster than parsing
+            starts = interval_starts if interval else sample
+            if starts.str.fullmatch(get_format_regex(candidate)).sum() \
+                    <= best_count:
+                continue
+            date_format = DateFormat(candidate, interval, dayfirst)
+            count = to_datetimes(sample, date_format).notna().sum()
+            if count > best_count:
+                best = date_format
+                best_count = count
+            if best_count == len(sample):
+                return best
+    return best
+
+
+def infer_date_formats(df, cols):
+    """Return a dict of the DateFormat of each of the given columns (that is
+    found in df and has non-missing values).
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Timestamps, with missing values as None/NaN.
+    cols : list of str
+    """
+    date_formats = {}
+    for col in cols:
+        if col not in df.columns:
+            continue
+        values = df[col].dropna()
+        if not values.empty:
+            date_formats[col] = infer_date_format(values)
+    return date_formats
+
+
+def object_array(values):
+    """Return a one dimensional object array of the given values."""
+    objects = np.empty(len(values), dtype=object)
+    objects[:] = list(values)
+    return objects
+
+
+def masked_objects(values, mask):
+    """Return an object array of the given values where mask is True and
+    None elsewhere.
+    """
+    objects = np.empty(len(mask), dtype=object)
+    objects[:] = None
+    objects[mask] = values[mask].tolist()
+    return objects
+
+
+def split_date_times(timestamps):
+    """Split a Series of datetimes into dates and times.
+
+    As for creator.sample_parser.extract_date_time_from, dates earlier than
+    1980 or at/later than the current date and midnight times are assumed to
+    be missing.
+
+    Returns
+    -------
+    tuple of pandas.Series
+        Object Series of datetime.date and datetime.time objects (or None).
+    """
+    days = timestamps.dt.normalize()
+    has_date = ((days >= pd.Timestamp(1980, 1, 1)) &
+                (days < pd.Timestamp(datetime.date.today()))).to_numpy()
+    has_time = (timestamps.notna() & (timestamps != days)).to_numpy()
+    dates = masked_objects(timestamps.dt.date.to_numpy(), has_date)
+    times = masked_objects(timestamps.dt.time.to_numpy(), has_time)
+    return (Series(dates, index=timestamps.index, dtype=object),
+            Series(times, index=timestamps.index, dtype=object))
+
+
+def parse_date_times(values, date_format, fallback=None):
+    """Parse a column of timestamps into dates and times.
+
+    Parameters
+    ----------
+    values : pandas.Series
+        Non-missing (stripped) timestamps.
+    date_format : DateFormat
+    fallback : callable
+        Called with each (unique) value not matching the date_format, must
+        return a tuple of a date and a time (or None). If None, leftovers are
+        treated as missing.
+
+    Returns
+    -------
+    tuple of pandas.Series
+        Dates and times (See split_date_times).
+    """
+    timestamps = to_datetimes(values, date_format)
+    dates, times = split_date_times(timestamps)
+    leftovers = timestamps.isna().to_numpy()
+    if fallback is not None and leftovers.any():
+        codes, uniques = pd.factorize(values[leftovers].to_numpy(dtype=object))
+        parsed = [fallback(value) for value in uniques]
+        dates[leftovers] = object_array([date for date, _ in parsed])[codes]
+        times[leftovers] = object_array([time for _, time in parsed])[codes]
+    return dates, times
+
+
+def get_seasons(dates):
+    """Return an object array of the season of each of the given dates (or
+    None for missing dates) (See model.Time.get_season).
+    """
+    dates = pd.to_datetime(Series(dates, dtype=object))
+    month_days = (dates.dt.month*100 + dates.dt.day).to_numpy()
+    conditions = [month_days <= end for end, _ in season_ends]
+    seasons = np.select(conditions, [season for _, season in season_ends],
+                        default='')
+    return masked_objects(seasons, dates.notna().to_numpy())
+
+
+def get_date_key(year, month, day):
+    """Return the integer date key (yyyymmdd) of the given date components
+    (See model.CalendarDate). Works element-wise on arrays of components.
+    """
+    return year*10000 + month*100 + day
+
+
+def get_time_key(hour, minute, second):
+    """Return the integer time of day key (hhmmss) of the given time
+    components (See model.Time). Works element-wise on arrays of components.
+    """
+    return hour*10000 + minute*100 + second
+
+
+def combine_date_time(date, time):
+    """Combine the given date and time into a datetime.datetime, using a
+    year of 1 if no date is given and midnight if no time is given (See
+    model.Time.from_datetime). Return None if neither are given.
+    """
+    if not date and not time:
+        return None
+    return datetime.datetime.combine(date or datetime.date(1, 1, 1),
+                                     time or datetime.time(0, 0, 0))
+
+
+def get_time_components(dates, times):
+    """Return the attributes of a model.Time for each pair of date and time.
+
+    Parameters
+    ----------
+    dates : sequence of datetime.date
+        Dates (or None).
+    times : sequence of datetime.time
+        Times (or None).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Columns are the model.Time attributes (timestamp, date, time, year,
+        month, day, hour, minute, second, season, date_key and time_key),
+        missing components are None.
+    """
+    dates = object_array(dates)
+    times = object_array(times)
+    has_date = pd.notna(dates)
+    has_time = pd.notna(times)
+    components = DataFrame({
+            'timestamp': [combine_date_time(date, time)
+                          for date, time in zip(dates, times)],
+            'date': dates,
+            'time': times}, dtype=object)
+    date_values = pd.to_datetime(Series(dates, dtype=object))
+    date_parts = [getattr(date_values.dt, attr).fillna(0).astype(int)
+                  .to_numpy() for attr in ['year', 'month', 'day']]
+    for attr, values in zip(['year', 'month', 'day'], date_parts):
+        components[attr] = masked_objects(values, has_date)
+    components['season'] = get_seasons(dates)
+    # Note: Times can't be converted to timedeltas, so components are taken
+    # from a datetime on an arbitrary day.
+    time_values = pd.to_datetime(Series(
+            [datetime.datetime.combine(datetime.date(2000, 1, 1), time)
+             if time else None for time in times], dtype=object))
+    time_parts = [getattr(time_values.dt, attr).fillna(0).astype(int)
+                  .to_numpy() for attr in ['hour', 'minute', 'second']]
+    for attr, values in zip(['hour', 'minute', 'second'], time_parts):
+        components[attr] = masked_objects(values, has_time)
+    components['date_key'] = masked_objects(get_date_key(*date_parts),
+                                            has_date)
+    components['time_key'] = masked_objects(get_time_key(*time_parts),
+                                            has_time)
+    return components
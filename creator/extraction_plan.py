@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Compile and cache metadata extraction plans.
+
+Many metadata files share the same header (e.g. several files of a study, or
+studies using the same Qiita template), and every file with a given header
+takes the same decisions: which of the candidate columns of each getter are
+present, which unit columns apply and which date format each date column
+holds. An ExtractionPlan records these decisions once for each distinct
+header signature (and getter configuration), so that later files only read
+the planned columns, extract values from the resolved columns of each
+attribute and skip date format inference (the cached formats are only used
+if they still match the values of a file, See
+creator.dates.infer_date_format).
+
+Plans are cached in memory and (optionally) as JSON files in a cache
+directory, one file per header signature.
+
+Created on Sun Oct 18 19:03:52 2026
+
+@author: William
+"""
+
+# Standard library imports
+import hashlib
+import json
+import os
+
+# Third-party imports
+
+# Local application imports
+from .dates import DateFormat
+from .read_planner import plan_columns
+
+
+def get_candidate_columns(getters, column_groups={}):
+    """Return a dict mapping model attributes to candidate columns.
+
+    Parameters
+    ----------
+    getters : dict
+        Maps model attributes to getter functions, whose candidate columns
+        are their 'column' or 'columns' attributes. The columns of their
+        'units_function' (if any) are the candidates of '<attr>_units' (See
+        creator.read_planner.get_getter_columns).
+    column_groups : dict
+        Maps other attributes to lists of candidate columns.
+    """
+    candidates = {}
+    for attr, getter in getters.items():
+        candidates[attr] = (list(getattr(getter, 'columns', []))
+                            or [getter.column])
+        units_function = getattr(getter, 'units_function', None)
+        if units_function is not None:
+            candidates[f'{attr}_units'] = list(units_function.columns)
+    for attr, columns in column_groups.items():
+        candidates[attr] = list(columns)
+    return candidates
+
+
+def get_plan_signature(header, candidates, suffixes=()):
+    """Return a hash of the given header, candidate columns and suffixes.
+
+    Note: Candidate columns are included so that cached plans are not reused
+    if the getters change.
+    """
+    dump = json.dumps([list(header), candidates, list(suffixes)],
+                      sort_keys=True)
+    return hashlib.sha1(dump.encode('utf-8')).hexdigest()
+
+
+class ExtractionPlan:
+    """Decisions taken when extracting objects from files with a given header.
+
+    Parameters
+    ----------
+    header : list of str
+        Column names of the metadata file.
+    candidates : dict
+        Maps model attributes to candidate columns (See
+        get_candidate_columns).
+    suffixes : iterable of str
+        Columns ending with any of these suffixes are also read (See
+        creator.read_planner.plan_columns).
+    date_formats : dict, optional
+        Maps date columns to their creator.dates.DateFormat.
+
+    Attributes
+    ----------
+    columns : dict
+        Maps model attributes to the candidate columns present in the header,
+        in order of preference (the columns values are extracted from, See
+        creator.sample_parser.stage_objects).
+    """
+
+    def __init__(self, header, candidates, suffixes=(), date_formats=None):
+        self.header = list(header)
+        self.candidates = candidates
+        self.suffixes = list(suffixes)
+        self.signature = get_plan_signature(self.header, candidates,
+                                            self.suffixes)
+        self.columns = {attr: [col for col in columns if col in self.header]
+                        for attr, columns in candidates.items()}
+        self.columns['suffixes'] = plan_columns(self.header, (),
+                                                self.suffixes)
+        self.date_formats = dict(date_formats or {})
+
+    @property
+    def usecols(self):
+        """The columns to read, in header order."""
+        return plan_columns(self.header, {col for cols in self.columns.values()
+                                          for col in cols})
+
+    def to_dict(self):
+        return {'header': self.header,
+                'candidates': self.candidates,
+                'suffixes': self.suffixes,
+                'date_formats': {col: list(date_format) for col, date_format
+                                 in self.date_formats.items()}}
+
+    @classmethod
+    def from_dict(cls, plan_dict):
+        return cls(plan_dict['header'], plan_dict['candidates'],
+                   plan_dict['suffixes'],
+                   {col: DateFormat(*date_format) for col, date_format
+                    in plan_dict['date_formats'].items()})
+
+
+class PlanCache:
+    """Cache of ExtractionPlans keyed by header signature.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        Directory in which plans are saved (as <signature>.json files) and
+        looked up if not found in memory.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self._plans = {}
+
+    def __len__(self):
+        return len(self._plans)
+
+    def get_plan_file(self, signature):
+        return os.path.join(self.cache_dir, signature + '.json')
+
+    def get(self, header, candidates, suffixes=()):
+        """Return the cached plan for the given header, candidate columns and
+        suffixes (or None).
+        """
+        signature = get_plan_signature(header, candidates, suffixes)
+        try:
+            return self._plans[signature]
+        except KeyError:
+            pass
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self.get_plan_file(signature)) as f:
+                plan = ExtractionPlan.from_dict(json.load(f))
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+        self._plans[signature] = plan
+        return plan
+
+    def add(self, plan):
+        """Cache the given plan (in memory and in the cache directory)."""
+        self._plans[plan.signature] = plan
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        plan_file = self.get_plan_file(plan.signature)
+        temp_file = plan_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(plan.to_dict(), f)
+        os.replace(temp_file, plan_file)
+
+    def get_or_build(self, header, getters, column_groups={}, suffixes=()):
+        """Return the cached plan for the given header, building (and
+        caching) a new plan if required.
+
+        Parameters
+        ----------
+        header : list of str
+        getters : dict
+        column_groups : dict
+            See get_candidate_columns.
+        suffixes : iterable of str
+            See ExtractionPlan.
+        """
+        candidates = get_candidate_columns(getters, column_groups)
+        plan = self.get(header, candidates, suffixes)
+        if plan is None:
+            plan = ExtractionPlan(header, candidates, suffixes)
+            self.add(plan)
+        return plan
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Intern parsed model objects by their natural keys.
+
+Model objects are compared and hashed through their equality_attrs (See
+model.py), which are recomputed on every hash and comparison, and which may
+contain other model objects (e.g. the Source of a Sample) that are hashed in
+turn. Deduplicating parsed objects with dictionaries keyed by equality_attrs
+therefore recomputes the same tuples many times for each row.
+
+An InternRegistry instead computes the natural key of each object only once:
+the equality_attrs of the object, where nested model objects are replaced by
+their own (cached) natural keys, so that keys only contain plain values
+(strings, numbers, dates...) that are cheap to hash. Deduplication is then a
+single dictionary probe per object, returning the canonical (first
+registered) instance of each entity type.
+
+Note: Natural keys are cached when objects are first seen, so objects must
+not be changed once interned.
+
+Created on Sun Oct 18 22:20:51 2026
+
+@author: William
+"""
+
+# Standard library imports
+from collections import defaultdict
+
+# Third-party imports
+
+# Local application imports
+from model import Base
+
+
+class InternRegistry:
+    """Registry of the canonical instance of each distinct model object, for
+    each entity type (model class).
+    """
+
+    def __init__(self):
+        # {model class: {natural key: canonical object}}
+        self._objects = defaultdict(dict)
+        # {id(object): (object, natural key)}
+        # Note: Objects are kept alive so that their ids are not reused.
+        self._keys = {}
+
+    def __len__(self):
+        return sum(len(objects) for objects in self._objects.values())
+
+    def count(self, cls):
+        """Return the number of distinct objects of the given model class."""
+        return len(self._objects.get(cls, ()))
+
+    def get_key(self, obj):
+        """Return the natural key of the given model object (computed once
+        per object).
+        """
+        cached = self._keys.get(id(obj))
+        if cached is not None:
+            return cached[1]
+        key = tuple([self.get_key(value) if isinstance(value, Base) else value
+                     for value in obj.equality_attrs])
+        self._keys[id(obj)] = (obj, key)
+        return key
+
+    def intern(self, obj):
+        """Return the canonical instance of the given model object,
+        registering the object if no equal object was registered (None is
+        returned as is).
+        """
+        if obj is None:
+            return None
+        objects = self._objects[obj.__class__]
+        return objects.setdefault(self.get_key(obj), obj)
+
+    def get(self, obj):
+        """Return the canonical instance of the given model object, or None
+        if no equal object was registered.
+        """
+        return self._objects.get(obj.__class__, {}).get(self.get_key(obj))
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Add the parsed objects of a study to the database as Count facts.
+
+Parsed experiments (with their subjects, samples, preparations and workflows,
+See main.best_parser) are linked to rows that are already stored before
+their facts are added to the session: sampling times are shared with stored
+Times of the same components (See creator.calendar_dates.TimeRegistry), and
+the calendar dimension is populated for their dates, so that every Time
+references a calendar date when the session is flushed. Processings are
+stored in bulk, skipping those of processing chains already loaded with
+another study, and workflows are linked to the stored rows (See
+creator.processings), so that no processing is inserted twice.
+
+Created on Mon Oct 19 14:02:31 2026
+
+@author: William
+"""
+
+# Standard library imports
+
+# Third-party imports
+
+# Local application imports
+from model import Count
+from .calendar_dates import TimeRegistry, populate_calendar_for
+from .processings import merge_stored_processings, upsert_processings
+
+
+def generate_sample_workflows(experiments):
+    """Generate (experiment, subject, sample, preparation, workflow) tuples
+    for all workflows of the given Experiments.
+    """
+    for experiment in experiments:
+        for subject in experiment.subjects:
+            for sample in subject.samples:
+                for prep in sample.preparations:
+                    for workflow in prep.workflows:
+                        yield experiment, subject, sample, prep, workflow
+
+
+def link_stored_times(session, samples, time_registry=None):
+    """Replace the sampling times of the given Samples with equivalent Times
+    already stored (or registered), and insert the calendar rows covering
+    their dates (See creator.calendar_dates.populate_calendar_for).
+
+    Returns
+    -------
+    list of model.Time
+        The distinct sampling times of the samples.
+    """
+    if time_registry is None:
+        time_registry = TimeRegistry.from_session(session)
+    times = {}
+    for sample in samples:
+        time = time_registry.get_time(sample.sampling_time)
+        sample.sampling_time = time
+        if time is not None:
+            times[id(time)] = time
+    times = list(times.values())
+    populate_calendar_for(session, times)
+    return times
+
+
+def link_stored_processings(session, workflows):
+    """Insert the processings of the given Workflows that are not stored
+    yet, then replace them with the stored Processings of the same content
+    hash (See creator.processings.upsert_processings and
+    merge_stored_processings).
+    """
+    upsert_processings(session, [processing for workflow in workflows
+                                 for processing in workflow.processings])
+    return merge_stored_processings(session, workflows)
+
+
+def add_count_facts(session, experiments, time_registry=None):
+    """Add a Count fact for each count of the workflows of the given
+    Experiments (parsed from a study) to the session.
+
+    Stored times and processings are reused and the calendar is populated
+    first (See module docstring), so that the facts can be flushed.
+
+    Parameters
+    ----------
+    session : sqlalchemy.orm.session.Session
+    experiments : iterable of model.Experiment
+        Workflows without counts (count_dict attribute, See
+        main.best_parser) are skipped.
+    time_registry : creator.calendar_dates.TimeRegistry, optional
+        Registry of the stored Times (by default, built from the session).
+
+    Returns
+    -------
+    int
+        The number of facts added.
+    """
+    sample_workflows = [row for row in generate_sample_workflows(experiments)
+                        if hasattr(row[-1], 'count_dict')]
+    samples = {id(sample): sample for _, _, sample, _, _ in sample_workflows}
+    workflows = {id(workflow): workflow
+                 for _, _, _, _, workflow in sample_workflows}
+    link_stored_times(session, samples.values(), time_registry)
+    link_stored_processings(session, list(workflows.values()))
+    num_facts = 0
+    for experiment, subject, sample, prep, workflow in sample_workflows:
+        for count in workflow.count_dict.get(sample.orig_sample_id, []):
+            session.add(Count(experiment=experiment,
+                              subject=subject,
+                              sample=sample,
+                              sample_site=sample.sampling_site,
+                              sample_time=sample.sampling_time,
+                              preparation=prep,
+                              workflow=workflow,
+                              lineage=count.lineage,
+                              seq_variant=count.seq_var,
+                              count=count.count))
+            num_facts += 1
+    return num_facts
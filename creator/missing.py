@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Detect values that represent missing data e.g. 'not provided', 'NA'.
+
+Metadata files are wide and values are heavily repeated, so a missing value
+regular expression is only run once for each distinct value of a column
+(columns are factorized). Decisions are also cached for each distinct string
+(and regular expression) across files, so that common values like
+'not applicable' are only matched once. The cache is bounded (least recently
+used decisions are dropped, See missing_cache_size), as distinct strings
+include sample identifiers and free text.
+
+Note: As for the row getters of creator.sample_parser, a value is missing if
+the regular expression matches at the start of the value (re.match).
+
+Created on Sun Oct 18 17:41:26 2026
+
+@author: William
+"""
+
+# Standard library imports
+import re
+from functools import lru_cache
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+from pandas import Series
+
+# Local application imports
+
+
+# Maximum number of cached (regex, string) decisions
+missing_cache_size = 65536
+
+
+@lru_cache(maxsize=missing_cache_size)
+def _is_missing_string(value, regex):
+    return regex.match(value) is not None
+
+
+def clear_missing_cache():
+    """Forget all cached decisions."""
+    _is_missing_string.cache_clear()
+
+
+def is_missing_value(value, regex):
+    """Return True if the given value is missing i.e. None, NaN or a string
+    matched by the given regular expression (str or re.Pattern).
+    """
+    # Note: NaN is the only value not equal to itself
+    if value is None or value != value:
+        return True
+    if not isinstance(value, str):
+        return False
+    return _is_missing_string(value, re.compile(regex))
+
+
+def missing_mask(values, regex):
+    """Return a boolean Series, True where the given values are missing (See
+    is_missing_value).
+    """
+    codes, uniques = pd.factorize(values.to_numpy(dtype=object))
+    decisions = np.empty(len(uniques) + 1, dtype=bool)
+    decisions[:-1] = [is_missing_value(value, regex) for value in uniques]
+    # Note: Code -1 (NaN/None) selects the trailing True
+    decisions[-1] = True
+    return Series(decisions[codes], index=values.index)
+
+
+def mask_missing_values(df, regex, value=np.nan):
+    """Return a copy of the given DataFrame with all missing values (See
+    is_missing_value) in string columns replaced by the given value.
+    """
+    df = df.copy()
+    for col in df.select_dtypes(['object']).columns:
+        mask = missing_mask(df[col], regex)
+        if mask.any():
+            df[col] = df[col].mask(mask, value)
+    return df
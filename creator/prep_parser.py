@@ -8,15 +8,25 @@ Created on Tue Oct  8 15:23:50 2019
 # Standard library imports
 import re
 import json
+import hashlib
 from dateutil import parser
 from collections import defaultdict
+from functools import partial
 
 # Third-party imports
-import networkx as nx
+import numpy as np
+from pandas import factorize, isna, Series
 
 # Local application imports
 from model import Preparation, SeqInstrument, Processing, Workflow
-from creator.sample_parser import generate_rows, get_string, get_valid_string
+from creator.sample_parser import (generate_rows, get_string, get_valid_string,
+                                   read_metadata, empty_column,
+                                   get_missing_mask,
+                                   extract_strings, extract_valid_strings)
+from creator.read_planner import get_getter_columns
+from creator.missing import is_missing_value, missing_mask
+from creator.dates import infer_date_format, to_datetimes, object_array
+from creator.staging import PreparationRecord
 
 # Global regular expressions
 re_missing = re.compile(r'^$|(missing:)? *(not provided|not collected|'
@@ -28,6 +38,11 @@ re_invalid_numeric_chars = re.compile(r'[^.\d]')
 
 re_forward_primer = re.compile(r'FWD:([ACTG]*)')
 re_reverse_primer = re.compile(r'REV:([ACTG]*)')
+re_interval = re.compile(
+        r'((?:\d{1,2}/)?(?:\d{1,2}/)?(?:\d{4}|\d{2}))'  # start date
+        r'-'                                            # interval sep
+        r'((?:\d{1,2}/)?(?:\d{1,2}/)?(?:\d{4}|\d{2}))'  # end date
+)
 
 
 # Extractor functions (used by wrapper functions)
@@ -54,6 +69,20 @@ def extract_region(col, value):
         return value
 
 
+# Columns containing sequencing dates
+seq_date_cols = ['run_date']
+
+# Decoder of the items of JSON arrays read incrementally
+json_decoder = json.JSONDecoder()
+re_json_separators = re.compile(r'[\s,]*')
+
+# Processing parameters referring to the parent processing (artifact)
+parent_parameters = ['input_data', 'demultiplexed sequences']
+# Processing parameters that are specific to an artifact rather than to the
+# processing itself (ignored when hashing processings)
+volatile_parameters = ['generated on']
+
+
 # Functions to get values from a row
 def get_seq_date(row, dayfirst_dict):
     """Get the date of sample sequencing from a row in the prep/Qiime metadata file.
@@ -76,33 +105,40 @@ def get_seq_date(row, dayfirst_dict):
         The date of sample sequencing for a particular row in the prep/Qiime
         metadata file.
     """
-    re_interval = re.compile(
-            r'((?:\d{1,2}/)?(?:\d{1,2}/)?(?:\d{4}|\d{2}))'  # start date
-            r'-'                                            # interval sep
-            r'((?:\d{1,2}/)?(?:\d{1,2}/)?(?:\d{4}|\d{2}))'  # end date
-    )
     seq_date = None
-    for col in ['run_date']:
+    for col in seq_date_cols:
         try:
             timestamp = row[col].strip()
         except KeyError:
             timestamp = None
         else:
-            if re_missing.match(timestamp):
+            if is_missing_value(timestamp, re_missing):
                 continue
-            try:
-                seq_date = parser.parse(timestamp, dayfirst=dayfirst_dict[col]).date()
-            except ValueError:
-                # Assume the timestamp is an interval
-                match = re_interval.search(timestamp)
-                if match:
-                    # Only use the first date (for simplicity)
-                    seq_date = parser.parse(match.group(1), dayfirst=dayfirst_dict[col])
-                if not seq_date:
-                    raise
+            seq_date = parse_seq_date(timestamp, dayfirst_dict[col])
     return seq_date
 
 
+def parse_seq_date(timestamp, dayfirst=False):
+    """Parse a (non-missing) sequencing timestamp into a datetime.date.
+
+    Intervals of dates e.g. '3/1/2007-3/5/2007' are parsed into their first
+    date (for simplicity).
+
+    Raises
+    ------
+    ValueError
+        If the timestamp cannot be parsed.
+    """
+    try:
+        return parser.parse(timestamp, dayfirst=dayfirst).date()
+    except ValueError:
+        # Assume the timestamp is an interval
+        match = re_interval.search(timestamp)
+        if not match:
+            raise
+        return parser.parse(match.group(1), dayfirst=dayfirst).date()
+
+
 # Other functions to get values from a row, defined using wrapper functions
 # from sample_parser.py
 get_study_id = get_string('qiita_study_id')
@@ -122,8 +158,39 @@ get_forward_primer = get_valid_string(['pcr_primers'],
 get_reverse_primer = get_valid_string(['pcr_primers'],
                                       extractor=extract_reverse_primer)
 
+# Columns read from prep metadata files (See creator.read_planner)
+prep_columns = get_getter_columns([
+        get_study_id, get_sample_id, get_qiita_prep_id, get_instrument_model,
+        get_instrument_name, get_platform, get_seq_centre, get_seq_run_name,
+        get_seq_method, get_target_gene, get_region, get_target_subfragment,
+        get_forward_primer, get_reverse_primer])
+prep_columns.update(seq_date_cols)
+
 
 # Functions to parse a rows into SQLAlchemy objects
+def stage_preparation(row, dayfirst_dict):
+    """Parse a row into a PreparationRecord (See parse_preparation).
+
+    Returns
+    -------
+    creator.staging.PreparationRecord
+    """
+    return PreparationRecord(
+            study_id=get_study_id(row),
+            prep_id=get_qiita_prep_id(row),
+            sample_id=get_sample_id(row),
+            seq_date=get_seq_date(row, dayfirst_dict),
+            seq_centre=get_seq_centre(row),
+            seq_run_name=get_seq_run_name(row),
+            fwd_pcr_primer=get_forward_primer(row),
+            rev_pcr_primer=get_reverse_primer(row),
+            target_gene=get_target_gene(row),
+            target_subfragment=get_target_subfragment(row),
+            platform=get_platform(row),
+            instrument_model=get_instrument_model(row),
+            instrument_name=get_instrument_name(row))
+
+
 def parse_preparation(row, dayfirst_dict):
     """Parse a row into a Preparation object.
     
@@ -145,26 +212,15 @@ def parse_preparation(row, dayfirst_dict):
         A Preparation object with attribute values, but for which no 
         relationships to other model objects have yet been established.
     """
-    preparation = Preparation()
-    preparation.study_id = get_study_id(row)
-    preparation.prep_id = get_qiita_prep_id(row)
-    preparation.sample_id = get_sample_id(row)
-    preparation.seq_date = get_seq_date(row, dayfirst_dict)
-    preparation.seq_centre = get_seq_centre(row)
-    preparation.seq_run_name = get_seq_run_name(row)
-    preparation.fwd_pcr_primer = get_forward_primer(row)
-    preparation.rev_pcr_primer = get_reverse_primer(row)
-    preparation.target_gene = get_target_gene(row)
-    preparation.target_subfragment = get_target_subfragment(row)
-    preparation.seq_instrument = parse_seq_instrument(row)
-    return preparation
+    return stage_preparation(row, dayfirst_dict).to_object()
 
 
 # TODO: Should dayfirst_dict be optional? Is study run date always provided?
 # TODO: Prep file 10317_prep_1116_20190627-144743.txt has a line completely
 # composed of tabs - how will such a line be processed by our parser? Is there
 # any way to easily skip the line?
-def parse_preparations(metadata_file, dayfirst_dict=None, index_by=['id']):
+def parse_preparations(metadata_file, dayfirst_dict=None, index_by=['id'],
+                       columnar=False, engine=None):
     """Parse a preparation metadata file into collections of Preparations.
 
     Parameters
@@ -186,6 +242,11 @@ def parse_preparations(metadata_file, dayfirst_dict=None, index_by=['id']):
         and values are boolean indicating whether the dates in that column
         should be interpreted as having a day as the first component (True)
         or a month or year as the first component (False).
+    columnar : bool
+        If True, the metadata file is parsed column by column (See
+        parse_preparation_dicts), which is much faster for large files.
+    engine : str, optional
+        The pandas.read_csv engine used by the columnar parser e.g. 'pyarrow'.
 
     Returns
     -------
@@ -193,19 +254,33 @@ def parse_preparations(metadata_file, dayfirst_dict=None, index_by=['id']):
         A dictionary or list of dictionaries keyed (indexed) by index types
         given in index_by.
     """
-    rows = generate_rows(metadata_file)
+    if columnar:
+        preparations = parse_preparation_dicts(metadata_file, dayfirst_dict,
+                                               engine)
+        return select_preparations(preparations, index_by)
+    rows = generate_rows(metadata_file, prep_columns)
     preparations = {}
-    preparation_ids = {}
+    preparation_records = {}
     study_preparations = defaultdict(list)
     preparation_samples = defaultdict(list)
+    # Note: Rows are staged as records and only the last record of each prep
+    # is converted into a Preparation.
     for row in rows:
-        preparation = parse_preparation(row, dayfirst_dict)
-        preparation_ids[preparation.prep_id] = preparation
-        study_preparations[preparation.study_id].append(preparation.prep_id)
-        preparation_samples[preparation.prep_id].append(preparation.sample_id)
-    preparations['id'] = preparation_ids
+        record = stage_preparation(row, dayfirst_dict)
+        preparation_records[record.prep_id] = record
+        study_preparations[record.study_id].append(record.prep_id)
+        preparation_samples[record.prep_id].append(record.sample_id)
+    preparations['id'] = {prep_id: record.to_object() for prep_id, record
+                          in preparation_records.items()}
     preparations['study'] = study_preparations
     preparations['sample'] = preparation_samples
+    return select_preparations(preparations, index_by)
+
+
+def select_preparations(preparations, index_by):
+    """Return the dictionaries named by index_by (str or list of str) from
+    preparations.
+    """
     try:
         # To avoid iterating over str if str provided as indexed_by arg
         # Note: More pythonic than type-checking
@@ -240,6 +315,133 @@ def parse_seq_instrument(row):
     return seq_instrument
 
 
+# Functions to parse whole columns (See creator.sample_parser.stage_objects)
+def extract_valid_matches(df, getter, regex):
+    """Extract a column of values for a getter made by get_valid_string with
+    an extractor returning the first group of regex (e.g.
+    extract_forward_primer), using vectorized string matching.
+    """
+    result = empty_column(df.index)
+    found = Series(False, index=df.index)
+    for col in getter.columns:
+        if col not in df.columns:
+            continue
+        valid = ~found & ~get_missing_mask(df[col])
+        if not valid.any():
+            continue
+        matches = df.loc[valid, col].str.extract(regex, expand=False)
+        result[valid] = matches.astype(object).where(matches.notna(), None)
+        found |= valid
+    return result
+
+
+def extract_seq_dates(df, dayfirst_dict=None):
+    """Extract a column of sequencing dates (See get_seq_date).
+
+    The date format of each column is inferred (See
+    creator.dates.infer_date_format), so that whole columns are parsed at
+    once. Values that don't match the format are parsed (once for each unique
+    value) with parse_seq_date.
+    """
+    seq_dates = empty_column(df.index)
+    for col in seq_date_cols:
+        if col not in df.columns:
+            continue
+        valid = ~missing_mask(df[col], re_missing)
+        if not valid.any():
+            continue
+        values = df.loc[valid, col]
+        dayfirst = dayfirst_dict[col] if dayfirst_dict else None
+        date_format = infer_date_format(values, dayfirst)
+        timestamps = to_datetimes(values, date_format)
+        dates = Series(object_array(timestamps.dt.date), index=values.index)
+        leftovers = timestamps.isna().to_numpy()
+        if leftovers.any():
+            codes, uniques = factorize(values[leftovers].to_numpy(dtype=object))
+            parsed = [parse_seq_date(value, date_format.dayfirst)
+                      for value in uniques]
+            dates[leftovers] = object_array(parsed)[codes]
+        seq_dates[valid] = dates
+    return seq_dates
+
+
+def extract_seq_instruments(df):
+    """Extract a column of SeqInstruments, rows with the same platform,
+    instrument model and name share a single SeqInstrument.
+
+    Note: Unlike parse_seq_instrument, the shared SeqInstruments are not
+    given the study and sample IDs of a row.
+    """
+    instrument_values = [extract_valid_strings(df, getter).tolist()
+                         for getter in (get_platform, get_instrument_model,
+                                        get_instrument_name)]
+    keys = object_array(list(zip(*instrument_values)))
+    codes, uniques = factorize(keys)
+    instruments = np.empty(len(uniques), dtype=object)
+    instruments[:] = [SeqInstrument(platform=platform, model=model, name=name)
+                      for platform, model, name in uniques]
+    return Series(instruments[codes], index=df.index, dtype=object)
+
+
+def group_values(keys, values):
+    """Return a dict mapping each unique key (in order of first appearance) to
+    an object array of the values of its rows (in row order).
+    """
+    codes, uniques = factorize(object_array(keys), use_na_sentinel=False)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1]
+    groups = np.split(object_array(values)[order], bounds)
+    # Note: Missing keys are factorized as NaN
+    return {None if isna(key) else key: group
+            for key, group in zip(uniques, groups)}
+
+
+def parse_preparation_dicts(metadata_file, dayfirst_dict=None, engine=None):
+    """Parse a preparation metadata file column by column.
+
+    Preparations are only created for the last row of each prep (as for
+    parse_preparations) and SeqInstruments once for each unique instrument.
+
+    Returns
+    -------
+    dict
+        Keys are 'id', 'study' and 'sample' (See parse_preparations). Prep
+        IDs (for each study) and sample IDs (for each prep) are object
+        arrays.
+    """
+    df = read_metadata(metadata_file, prep_columns, engine=engine)
+    values = {
+            'study_id': extract_strings(df, get_study_id),
+            'prep_id': extract_valid_strings(df, get_qiita_prep_id),
+            'sample_id': extract_strings(df, get_sample_id),
+            'seq_date': extract_seq_dates(df, dayfirst_dict),
+            'seq_centre': extract_valid_strings(df, get_seq_centre),
+            'seq_run_name': extract_valid_strings(df, get_seq_run_name),
+            'fwd_pcr_primer': extract_valid_matches(df, get_forward_primer,
+                                                    re_forward_primer),
+            'rev_pcr_primer': extract_valid_matches(df, get_reverse_primer,
+                                                    re_reverse_primer),
+            'target_gene': extract_valid_strings(df, get_target_gene),
+            'target_subfragment': extract_valid_strings(
+                    df, get_target_subfragment),
+            'seq_instrument': extract_seq_instruments(df)}
+    prep_ids = values['prep_id']
+    last_rows = ~prep_ids.duplicated(keep='last').to_numpy()
+    preparation_ids = {}
+    attrs = list(values)
+    for row in zip(*[values[attr][last_rows].tolist() for attr in attrs]):
+        preparation = Preparation()
+        for attr, value in zip(attrs, row):
+            setattr(preparation, attr, value)
+        preparation_ids[preparation.prep_id] = preparation
+    # Note: Preparations are keyed in order of first appearance
+    preparation_ids = {prep_id: preparation_ids[prep_id]
+                       for prep_id in prep_ids.unique()}
+    return {'id': preparation_ids,
+            'study': group_values(values['study_id'], prep_ids),
+            'sample': group_values(prep_ids, values['sample_id'])}
+
+
 def parse_processing_parents(processings):
     """Return a dictionary relating each processing identifier to its parent.
     
@@ -260,16 +462,84 @@ def parse_processing_parents(processings):
     """
     processing_parents = {}
     for proc_id, proc_data in processings.items():
-        if 'input_data' in proc_data:
-            parent_id = proc_data['input_data']
-            processing_parents[proc_id] = parent_id
-        elif 'demultiplexed sequences' in proc_data:
-            parent_id = proc_data['demultiplexed sequences']
-            processing_parents[proc_id] = parent_id
+        for parameter in parent_parameters:
+            if parameter in proc_data:
+                processing_parents[proc_id] = proc_data[parameter]
+                break
     return processing_parents
 
 
-def parse_processings(processings, prep_id):
+def get_canonical_parameters(proc_data):
+    """Return the canonical JSON representation of the given processing
+    data: keys are sorted, and references to the parent processing and
+    volatile parameters (See volatile_parameters) are left out.
+    """
+    excluded = set(parent_parameters).union(volatile_parameters)
+    parameters = {key: value for key, value in proc_data.items()
+                  if key not in excluded}
+    return json.dumps(parameters, sort_keys=True, separators=(',', ':'),
+                      ensure_ascii=False, allow_nan=False)
+
+
+def get_processing_hash(proc_data, parent_hash=None):
+    """Return the content hash (SHA-256 hex digest) of a processing, given
+    its processing data and the content hash of its parent (None for root
+    processings).
+
+    Processings with the same parameters whose parents have the same content
+    hash (i.e. identical processing chains, whatever the preparation or study)
+    have the same content hash.
+    """
+    content = '\n'.join([get_canonical_parameters(proc_data),
+                         parent_hash or ''])
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def get_processing_hashes(processings, processing_parents=None):
+    """Return the content hash of each processing (See
+    get_processing_hash).
+
+    Parameters
+    ----------
+    processings : dict
+        A dictionary of processing data, keyed by processing identifiers (See
+        parse_processings).
+    processing_parents : dict, optional
+        Maps processing identifiers to the identifiers of their parent (See
+        parse_processing_parents). Computed from processings if not given.
+
+    Returns
+    -------
+    dict
+        Maps processing identifiers to content hashes.
+
+    Raises
+    ------
+    ValueError
+        If the parent relations contain a cycle.
+    """
+    if processing_parents is None:
+        processing_parents = parse_processing_parents(processings)
+    hashes = {}
+    for proc_id in processings:
+        # Follow parent pointers up to a hashed processing or the root
+        chain = []
+        visited = set()
+        node = proc_id
+        while node is not None and node not in hashes:
+            if node in visited:
+                raise ValueError(f'Processing {node!r} is its own ancestor.')
+            visited.add(node)
+            chain.append(node)
+            node = processing_parents.get(node)
+        parent_hash = hashes.get(node)
+        for node in reversed(chain):
+            parent_hash = get_processing_hash(processings[node], parent_hash)
+            hashes[node] = parent_hash
+    return hashes
+
+
+def parse_processings(processings, prep_id, registry=None):
     """Parse processing data into Processing objects.
     
     Parameters
@@ -282,6 +552,15 @@ def parse_processings(processings, prep_id):
         Qiita.
     prep_id : str
         The identifier of the preparation to which processings relates.
+    registry : dict, optional
+        Maps content hashes to the Processing objects already parsed (e.g.
+        from other preparations). Processings whose content hash is found in
+        registry are replaced by the registered Processing, and new
+        Processings are added to registry, so that identical processing
+        chains share the same Processing objects (a shared Processing keeps
+        the original identifiers and processing data of its first
+        occurrence). By default, processings are only shared within the
+        given processing data.
     
     Returns
     -------
@@ -290,64 +569,202 @@ def parse_processings(processings, prep_id):
         corresponding Processing objects. Relationships between Processing
         objects and their parents have been established.
     """
+    if registry is None:
+        registry = {}
+    processing_parents = parse_processing_parents(processings)
+    hashes = get_processing_hashes(processings, processing_parents)
     processing_dict = {}
     for proc_id, proc_data in processings.items():
-        json_proc_data = json.dumps(proc_data,
-                                    separators=[',', ':'],
-                                    allow_nan=False)
-        processing = Processing(orig_prep_id=prep_id,
-                                orig_proc_id=proc_id,
-                                parameter_values=json_proc_data)
-        processing_dict[proc_id] = processing
-    processing_parents = parse_processing_parents(processings)
+        content_hash = hashes[proc_id]
+        if content_hash not in registry:
+            json_proc_data = json.dumps(proc_data,
+                                        separators=[',', ':'],
+                                        allow_nan=False)
+            registry[content_hash] = Processing(orig_prep_id=prep_id,
+                                                orig_proc_id=proc_id,
+                                                parameter_values=json_proc_data,
+                                                content_hash=content_hash)
+        processing_dict[proc_id] = registry[content_hash]
+    # Note: Shared processings already have the same parent (same hash)
     for proc_id, parent_id in processing_parents.items():
         processing_dict[proc_id].parent = processing_dict[parent_id]
     return processing_dict
 
 
+def get_processing_paths(processing_parents):
+    """Return the path of processings from each terminal processing (a
+    processing that is no other processing's parent) up to its root.
+
+    Parent pointers are followed once for each processing: the path from a
+    processing up to its root is memoized, so that paths sharing ancestors
+    reuse them. Processings without parent nor children are ignored.
+    Disconnected trees (several roots) are supported.
+
+    Parameters
+    ----------
+    processing_parents : dict
+        Maps processing identifiers to the identifiers of their parent (See
+        parse_processing_parents).
+
+    Returns
+    -------
+    dict
+        Maps terminal processing identifiers (in order of appearance in
+        processing_parents) to lists of processing identifiers, from the
+        terminal processing to its root.
+
+    Raises
+    ------
+    ValueError
+        If the parent relations contain a cycle.
+    """
+    parents = set(processing_parents.values())
+    root_paths = {}
+    terminal_paths = {}
+    for terminal in processing_parents:
+        if terminal in parents:
+            continue
+        # Follow parent pointers up to the root or a memoized path
+        chain = []
+        visited = set()
+        node = terminal
+        while node is not None and node not in root_paths:
+            if node in visited:
+                raise ValueError(f'Processing {node!r} is its own ancestor.')
+            visited.add(node)
+            chain.append(node)
+            node = processing_parents.get(node)
+        path = root_paths[node] if node is not None else ()
+        for node in reversed(chain):
+            path = (node,) + path
+            root_paths[node] = path
+        terminal_paths[terminal] = list(path)
+    return terminal_paths
+
+
 # TODO Remove prep_id argument? Not currently used
 def parse_prep_workflows(processing_parents, processings, prep_id):
-    tree = nx.DiGraph()
-    tree.add_edges_from(processing_parents.items())
-    terminals = [node for node, degree in tree.in_degree if degree == 0]
-    roots = [node for node, degree in tree.out_degree if degree == 0]
-    paths = []
+    """Return a Workflow for each terminal processing, made of the
+    processings from the terminal processing up to its root (See
+    get_processing_paths), keyed by terminal processing identifier.
+    """
     prep_workflows = {}
-    # The following still won't work if we have two disconnected trees
-    # and hence more than one root because the terminals will be a list of
-    # terminals for both trees and therefore a path won't exist for some
-    # terminals to a root.
-    for root in roots:
-        for terminal in terminals:
-            # Assume one path from terminal to root
-            path = next(nx.all_simple_paths(tree, terminal, root))
-            paths.append(path)
-            workflow_processings = []
-            for node in path:
-                workflow_processings.append(processings[node])
-            # Index workflows by the terminal processing id
-            workflow = Workflow(processings=workflow_processings)
-            prep_workflows[terminal] = workflow
+    for terminal, path in get_processing_paths(processing_parents).items():
+        workflow_processings = [processings[node] for node in path]
+        # Index workflows by the terminal processing id
+        prep_workflows[terminal] = Workflow(processings=workflow_processings)
     return prep_workflows
 
 
+def generate_array_items(file, chunk_size=65536):
+    """Yield the items of the JSON array contained in the given file one at
+    a time, reading the file in chunks.
+
+    Only the item being decoded is held in memory (not the whole array), and
+    each item is yielded as soon as it has been read.
+
+    Parameters
+    ----------
+    file : file object
+        Text file containing a JSON array.
+    chunk_size : int
+        Minimum number of characters read at once.
+
+    Yields
+    ------
+    object
+        The decoded items of the array.
+
+    Raises
+    ------
+    ValueError
+        If the file does not contain a valid JSON array.
+    """
+    buffer = ''
+    pos = 0
+    started = False
+    while True:
+        pos = re_json_separators.match(buffer, pos).end()
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != '[':
+                    raise ValueError('Expected a JSON array.')
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == ']':
+                return
+            try:
+                item, end = json_decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                pass
+            else:
+                # An item ending the buffer (e.g. a number) may be truncated
+                if end < len(buffer):
+                    yield item
+                    pos = end
+                    continue
+        # Read at least as much as is buffered, so that long items are not
+        # decoded over and over again
+        chunk = file.read(max(chunk_size, len(buffer) - pos))
+        if not chunk:
+            if pos < len(buffer):
+                # Raise the decoding error of the incomplete item
+                json_decoder.raw_decode(buffer, pos)
+            raise ValueError('Unterminated JSON array.')
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def generate_workflows(processing_file, registry=None, chunk_size=65536):
+    """Parse the workflows of the given processing file one preparation at a
+    time.
+
+    The array of preparations of the file is read incrementally (See
+    generate_array_items), and the workflows of each preparation are yielded
+    as soon as its processing data has been read, so that they can be
+    consumed while the rest of the file is being parsed.
+
+    Parameters
+    ----------
+    processing_file : str
+        Path of the JSON file containing processing/artifact metadata of
+        preparations (e.g. prep_data.json).
+    registry : dict, optional
+        Maps content hashes to the Processing objects shared by all
+        preparations (See parse_processings). A new registry is used by
+        default.
+    chunk_size : int
+        Minimum number of characters read at once.
+
+    Yields
+    ------
+    tuple
+        Preparation identifier and dictionary relating the terminal
+        processing identifiers of the preparation to their Workflow (See
+        parse_prep_workflows).
+    """
+    if registry is None:
+        registry = {}
+    with open(processing_file) as file:
+        for preps in generate_array_items(file, chunk_size):
+            for prep_id, processings in preps.items():
+                processing_parents = parse_processing_parents(processings)
+                processing_dict = parse_processings(processings, prep_id,
+                                                    registry)
+                yield prep_id, parse_prep_workflows(processing_parents,
+                                                    processing_dict,
+                                                    prep_id)
+
+
 def parse_workflows(processing_file, index_by='terminal_proc'):
     workflow_views = {}
     prep_workflows_view = {}
     proc_workflows_view = {}
-    with open(processing_file) as file:
-        json_str = file.read()
-        processing_data = json.loads(json_str)
-    for preps in processing_data:
-        for prep_id, processings in preps.items():
-            processing_parents = parse_processing_parents(processings)
-            processing_dict = parse_processings(processings, prep_id)
-            prep_workflows = parse_prep_workflows(processing_parents,
-                                                  processing_dict,
-                                                  prep_id)
-            prep_workflows_view[prep_id] = list(prep_workflows.values())
-            for terminal_proc, workflow in prep_workflows.items():
-                proc_workflows_view[terminal_proc] = workflow
+    for prep_id, prep_workflows in generate_workflows(processing_file):
+        prep_workflows_view[prep_id] = list(prep_workflows.values())
+        for terminal_proc, workflow in prep_workflows.items():
+            proc_workflows_view[terminal_proc] = workflow
     workflow_views['terminal_proc'] = proc_workflows_view
     workflow_views['prep'] = prep_workflows_view
     try:
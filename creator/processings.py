@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Store content-addressed processings.
+
+Processings are identified by their content hash (See
+creator.prep_parser.get_processing_hash), so that identical processing
+chains of different preparations and studies are stored as a single row of
+the processings table, to which the workflows of all these preparations are
+linked (workflow_processings). The content hash column is uniquely indexed:
+processings are inserted in bulk, skipping those already stored, and
+equivalent workflows are found by joining on shared processing ids.
+
+Created on Sun Oct 18 23:36:12 2026
+
+@author: William
+"""
+
+# Standard library imports
+
+# Third-party imports
+from sqlalchemy.dialects.postgresql import insert
+
+# Local application imports
+from model import Processing, Workflow
+
+
+def get_processing_levels(processings):
+    """Group the given Processings by depth (root processings first), so
+    that parents always precede their children.
+
+    Parameters
+    ----------
+    processings : iterable of model.Processing
+        Processings with a content hash. Parents of the given processings
+        are included.
+
+    Returns
+    -------
+    list of lists of model.Processing
+        Distinct processings (by content hash) of each depth.
+    """
+    depths = {}
+    unique = {}
+    for processing in processings:
+        # Walk up to the root, then assign depths on the way back down
+        chain = []
+        node = processing
+        while node is not None and node.content_hash not in depths:
+            chain.append(node)
+            node = node.parent
+        depth = depths[node.content_hash] if node is not None else -1
+        for node in reversed(chain):
+            depth += 1
+            depths[node.content_hash] = depth
+            unique[node.content_hash] = node
+    levels = [[] for _ in range(max(depths.values(), default=-1) + 1)]
+    for content_hash, processing in unique.items():
+        levels[depths[content_hash]].append(processing)
+    return levels
+
+
+def get_upsert_statement(mappings):
+    """Return an INSERT statement of the given processing rows (dicts) that
+    skips rows whose content hash is already stored.
+    """
+    return insert(Processing.__table__)\
+        .values(mappings)\
+        .on_conflict_do_nothing(index_elements=['content_hash'])
+
+
+def query_processing_ids(session, hashes):
+    """Return a dictionary relating the given content hashes to the ids of
+    the stored processings (hashes that are not stored are left out).
+    """
+    if not hashes:
+        return {}
+    return dict(session.query(Processing.content_hash, Processing.id)
+                       .filter(Processing.content_hash.in_(list(hashes))))
+
+
+def upsert_processings(session, processings):
+    """Insert the given Processings (and their parents) in bulk, one
+    statement per depth, skipping processings whose content hash is already
+    stored.
+
+    Parameters
+    ----------
+    session : sqlalchemy.orm.session.Session
+    processings : iterable of model.Processing
+        Processings with a content hash (See
+        creator.prep_parser.parse_processings).
+
+    Returns
+    -------
+    dict
+        Maps the content hashes of all given processings to the ids of the
+        (new or existing) stored processings.
+    """
+    ids = {}
+    for level in get_processing_levels(processings):
+        mappings = [{'content_hash': processing.content_hash,
+                     'parameter_values': processing.parameter_values,
+                     'parent_proc_id': (ids[processing.parent.content_hash]
+                                        if processing.parent is not None
+                                        else None)}
+                    for processing in level]
+        session.execute(get_upsert_statement(mappings))
+        ids.update(query_processing_ids(session, [mapping['content_hash']
+                                                  for mapping in mappings]))
+    return ids
+
+
+def merge_stored_processings(session, workflows):
+    """Replace the processings of the given Workflows (and their parents)
+    with the stored Processings of the same content hash, so that adding the
+    workflows to the session links them to existing rows instead of
+    inserting duplicates.
+    """
+    processings = [processing for level in get_processing_levels(
+                       processing for workflow in workflows
+                       for processing in workflow.processings)
+                   for processing in level]
+    stored = {}
+    if processings:
+        hashes = [processing.content_hash for processing in processings]
+        stored = {processing.content_hash: processing for processing in
+                  session.query(Processing)
+                         .filter(Processing.content_hash.in_(hashes))}
+    for processing in processings:
+        parent = processing.parent
+        if (processing.content_hash not in stored and parent is not None
+                and parent.content_hash in stored):
+            processing.parent = stored[parent.content_hash]
+    for workflow in workflows:
+        workflow.processings = [stored.get(processing.content_hash,
+                                           processing)
+                                for processing in workflow.processings]
+    return workflows
+
+
+def get_terminal_processing(workflow):
+    """Return the terminal processing of the given Workflow (the processing
+    that is no other processing's parent in the workflow).
+    """
+    parents = {id(processing.parent) for processing in workflow.processings}
+    for processing in workflow.processings:
+        if id(processing) not in parents:
+            return processing
+    return None
+
+
+def query_equivalent_workflows(session, workflow):
+    """Return a query for the other workflows (of any preparation or study)
+    made of the same processing chain as the given stored Workflow.
+
+    Since processings are content-addressed, equivalent workflows share the
+    terminal processing of the given workflow, and do not continue it.
+    """
+    terminal = get_terminal_processing(workflow)
+    return session.query(Workflow)\
+                  .filter(Workflow.processings.any(
+                          Processing.id == terminal.id))\
+                  .filter(~Workflow.processings.any(
+                          Processing.parent_proc_id == terminal.id))\
+                  .filter(Workflow.id != workflow.id)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Plan column-pruned, typed reads of metadata files.
+
+Qiita metadata files have hundreds of columns, but parsers only ever look at
+the few columns named by their getter functions (See the wrapper functions
+in creator.sample_parser) or column types (See creator.csv_cleaner). The
+columns to read are derived from this configuration and intersected with the
+header of each file, so that all other columns are skipped when reading.
+
+The pyarrow CSV engine of pandas is used when requested and available.
+
+Created on Sun Oct 18 18:20:14 2026
+
+@author: William
+"""
+
+# Standard library imports
+import csv
+
+# Third-party imports
+from pandas import read_csv
+
+# Local application imports
+
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:
+    has_pyarrow = False
+else:
+    has_pyarrow = True
+
+
+def get_getter_columns(getters):
+    """Return the set of columns that the given getter functions may read.
+
+    Getters expose the columns they read as attributes: 'column' (See
+    creator.sample_parser.get_string), 'columns' and 'units_function' (a
+    getter of unit columns, See creator.sample_parser.get_numeric_with_units).
+    """
+    columns = set()
+    for getter in getters:
+        column = getattr(getter, 'column', None)
+        if column:
+            columns.add(column)
+        columns.update(getattr(getter, 'columns', ()))
+        units_function = getattr(getter, 'units_function', None)
+        if units_function is not None:
+            columns.update(get_getter_columns([units_function]))
+    return columns
+
+
+def read_header(file, sep='\t'):
+    """Return the list of column names of the given delimited file."""
+    with open(file, newline='') as f:
+        return next(csv.reader(f, delimiter=sep))
+
+
+def plan_columns(header, columns, suffixes=()):
+    """Return the columns of the header (in header order) that are in the
+    given columns or end with any of the given suffixes (e.g. 'study_id').
+    """
+    columns = set(columns)
+    suffixes = tuple(suffixes)
+    return [col for col in header
+            if col in columns or (suffixes and col.endswith(suffixes))]
+
+
+def get_engine(engine=None):
+    """Return the given read_csv engine, or None (the default engine) if the
+    pyarrow engine was requested but pyarrow is not installed.
+    """
+    if engine == 'pyarrow' and not has_pyarrow:
+        return None
+    return engine
+
+
+def read_columns(file, columns=None, suffixes=(), dtype=str, sep='\t',
+                 engine=None):
+    """Read the given columns of a delimited file into a DataFrame, keeping
+    missing cells as empty strings.
+
+    Parameters
+    ----------
+    file : str
+    columns : iterable of str, optional
+        Columns to read (in addition to those ending with any of the
+        suffixes). Columns absent from the file are ignored. By default, all
+        columns are read.
+    suffixes : iterable of str, optional
+    dtype : type or dict, optional
+        Data type(s) of the columns, as for pandas.read_csv.
+    sep : str
+    engine : {'c', 'python', 'pyarrow'}, optional
+        The pandas.read_csv engine (See get_engine).
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    usecols = None
+    if columns is not None:
+        usecols = plan_columns(read_header(file, sep), columns, suffixes)
+    engine = get_engine(engine)
+    if engine == 'pyarrow':
+        # Note: The pyarrow engine doesn't support na_filter
+        df = read_csv(file, sep=sep, usecols=usecols, dtype=dtype,
+                      keep_default_na=False, engine=engine)
+        return df.fillna('')
+    return read_csv(file, sep=sep, usecols=usecols, dtype=dtype,
+                    keep_default_na=False, na_filter=False, engine=engine)
@@ -16,21 +16,31 @@ from os.path import dirname
 from dateutil import parser
 from contextlib import contextmanager
 from collections import defaultdict
+from functools import partial
 
 # Third-party imports
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.engine.url import URL
-from pint import UndefinedUnitError
-from pandas import read_csv, isna
-from numpy import vectorize, nan
+from pint import DimensionalityError
+from pandas import read_csv, isna, factorize, Series, DataFrame
+from numpy import vectorize, empty
 
 # Local application imports
 import model
 from model import Source, Provenance, Experiment, Sample, Subject
 from model import SamplingSite, Time
 from . import ureg
+from .read_planner import (get_getter_columns, plan_columns, read_columns,
+                           read_header)
+from .extraction_plan import PlanCache
+from .staging import Staging, ExperimentRecord, SubjectRecord, SampleRecord
+from .interning import InternRegistry
+from .missing import is_missing_value, missing_mask, mask_missing_values
+from .units import parse_units, convert_value, convert_values
+from .dates import (is_day_first, infer_date_format, parse_date_times,
+                    combine_date_time, get_time_components)
 
 
 # Constants
@@ -51,6 +61,18 @@ re_missing = re.compile(r'^$|(missing:)? *(not provided|not collected|'
 re_invalid_numeric_chars = re.compile(r'[^.\d]')
 male_re = re.compile(r'male|m', re.I)
 female_re = re.compile(r'female|f', re.I)
+re_interval = re.compile(r'((?:\d{1,2}/)?(?:\d{1,2}/)?(?:\d{4}|\d{2}))'  # start date
+                         r'-'                                            # interval sep
+                         r'((?:\d{1,2}/)?(?:\d{1,2}/)?(?:\d{4}|\d{2}))') # end date
+re_time = re.compile(r'(\d{1,2})(.)(\d{1,2})\s*(?:am|pm)')
+
+
+def is_missing(value):
+    """Return True if the given value looks missing (See
+    creator.missing.is_missing_value).
+    """
+    return is_missing_value(value, re_missing)
+
 
 # The units for variables that we want our database to assume.
 database_units = {'age': ureg.years,
@@ -63,11 +85,29 @@ file_units = {'age': ureg.years,
               'weight': ureg.kilograms}
 
 
-def generate_rows(metadata_file):
-    with open(metadata_file) as file:
-        reader = csv.DictReader(file, delimiter='\t')
+def generate_rows(metadata_file, columns=None, suffixes=()):
+    """Yield each row of the given metadata file as a dict.
+
+    If columns are given, rows only contain the columns of the file that are
+    in columns or end with any of the given suffixes (See
+    creator.read_planner.plan_columns).
+    """
+    with open(metadata_file, newline='') as file:
+        if columns is None:
+            yield from csv.DictReader(file, delimiter='\t')
+            return
+        reader = csv.reader(file, delimiter='\t')
+        header = next(reader)
+        # Note: As for csv.DictReader, the last of duplicate columns is used
+        indices = {col: index for index, col in enumerate(header)}
+        usecols = [(col, indices[col]) for col
+                   in dict.fromkeys(plan_columns(header, columns, suffixes))]
         for row in reader:
-            yield row
+            # Note: As for csv.DictReader, skip empty rows and pad short rows
+            if not row:
+                continue
+            row += [None]*(len(header) - len(row))
+            yield {col: row[index] for col, index in usecols}
 
 
 # Define wrapper functions
@@ -81,7 +121,7 @@ def get_string(column, required=True):
             except KeyError:
                 raise Exception(f'Sample metadata file does not have a '
                                 f'"{column}" column.')
-            if re_missing.match(variable):
+            if is_missing(variable):
                 raise Exception(f'Missing value detected in "{column}" column.')
             return variable
     else:
@@ -91,9 +131,12 @@ def get_string(column, required=True):
             except KeyError:
                 raise Exception(f'Sample metadata file does not have a '
                                 f'"{column}" column.')
-            if re_missing.match(variable):
+            if is_missing(variable):
                 return None
             return variable
+    # Attributes used to extract whole columns (See extract_strings)
+    string_getter.column = column
+    string_getter.required = required
     return string_getter
 
 
@@ -104,11 +147,13 @@ def get_valid_string(columns, extractor=None):
                 variable = row[col].strip()
             except KeyError:
                 continue
-            if re_missing.match(variable):
+            if is_missing(variable):
                 continue
             if extractor:
                 variable = extractor(col, variable)
             return variable
+    string_getter.columns = columns
+    string_getter.extractor = extractor
     return string_getter
 
 
@@ -117,7 +162,7 @@ def get_numeric(columns):
         for col in columns:
             try:
                 variable = row[col].strip()
-                if re_missing.match(variable):
+                if is_missing(variable):
                     variable = None
                 else:
                     variable = float(variable)
@@ -128,6 +173,7 @@ def get_numeric(columns):
             except KeyError:
                 variable = None
         return variable
+    numeric.columns = columns
     return numeric
 
 
@@ -145,13 +191,14 @@ def get_units(variable, columns):
                 continue
             else:
                 # Search other unit columns if missing value detected
-                if re_missing.match(units):
+                if is_missing(units):
                     continue
                 # Search for recognized units (also excludes missing values)
-                try:
-                    units = ureg.parse_expression(units).units
+                resolved = parse_units(units)
+                if resolved is not None:
+                    units = resolved
                     break
-                except UndefinedUnitError:
+                else:
                     logging.info(
                         f'Ambiguous {variable} units "{units}" in '
                         f'column: {col} for '
@@ -179,6 +226,8 @@ def get_units(variable, columns):
                             f'sample: {sample_id}. '
                             f'and no default was given.'
                             )
+    units_function.variable = variable
+    units_function.columns = columns
     return units_function
 
 
@@ -200,15 +249,13 @@ def get_numeric_with_units(variable, columns, unit_regex, units_function):
             units_in_value = re_valid_units.search(variable)
             units_in_col_name = re_valid_units.search(col)
             if units_in_value:
-                units = units_in_value.group()
-                units = ureg.parse_expression(units).units
+                units = parse_units(units_in_value.group())
             elif units_in_col_name:
-                units = units_in_col_name.group()
-                units = ureg.parse_expression(units).units
+                units = parse_units(units_in_col_name.group())
             else:
                 units = units_function(row, default=default_from_units)
             # Check if variable is missing, else remove any invalid chars
-            if re_missing.match(variable):
+            if is_missing(variable):
                 variable = None
                 # Search other variable columns (if there are any remaining)
                 continue
@@ -216,15 +263,17 @@ def get_numeric_with_units(variable, columns, unit_regex, units_function):
                 variable = float(re_invalid_numeric_chars.sub('', variable))
             # Apply necessary conversions
             try:
-                variable = (variable*units).to(to_units)
-            except KeyError:
+                variable = convert_value(variable, units, to_units)
+            except DimensionalityError:
                 raise Exception(f'Conversion of {variable} '
                                 f'from {units} to {to_units} not supported.')
             # If successful conversion
             break
-        if variable:
-            return variable.magnitude
         return variable
+    numeric_with_units.variable = variable
+    numeric_with_units.columns = columns
+    numeric_with_units.unit_regex = unit_regex
+    numeric_with_units.units_function = units_function
     return numeric_with_units
 
 
@@ -329,32 +378,6 @@ def extract_dob(col, value):
 
 # Functions to parse sample collection date and time
 # Note: Doesn't use a function wrapper (with extractor)
-def has_day_first(timestamp, default=False):
-    # Assumes month first by default!
-    if isna(timestamp):
-        return default
-    re_day_month_year = re.compile(r'(?:^|[^-/\d])'             # border char
-                                   r'(0?[1-9]|[1-2][0-9]|3[0-1])[/-]'  # day
-                                   r'(0?[1-9]|1[0-2])[/-]'              # month
-                                   r'(\d{2}|\d{4})'                    # year
-                                   r'(?:$|[^-/\d])'             # border char
-                                   )
-    re_month_day_year = re.compile(r'(?:^|[^-/\d])'             # border char
-                                   r'(0?[1-9]|1[0-2])[/-]'             # month
-                                   r'(0?[1-9]|[1-2][0-9]|3[0-1])[/-]'  # day
-                                   r'(\d{2}|\d{4})'                    # year
-                                   r'(?:$|[^-/\d])'             # border char
-                                   )
-    ddmm = re_day_month_year.search(timestamp)
-    mmdd = re_month_day_year.search(timestamp)
-    if ddmm and not mmdd:
-        return True
-    elif mmdd and not ddmm:
-        return False
-    else:
-        return default
-
-
 def infer_date_formats(metadata_file):
     cols = {'collection_timestamp', 'collection_date',
             'collection_time', 'collectiontime', 'sample_date', 'run_date'}
@@ -365,7 +388,7 @@ def infer_date_formats(metadata_file):
         df = read_csv(file, names=header, sep='\t', usecols=usecols,
                       dtype=dtypes)
     # Replace all strings that look like missing values
-    df.replace(re_missing, nan, regex=True, inplace=True)
+    df = mask_missing_values(df, re_missing)
     dayfirst_dict = {}
     for col in df.columns:
         new_col = has_day_first(df[col])
@@ -376,40 +399,23 @@ def infer_date_formats(metadata_file):
     return dayfirst_dict
 
 
+collection_datetime_cols = ['collection_timestamp', 'collection_date',
+                            'collection_time', 'sample_date']
+
+
 def get_collection_datetime(row, dayfirst_dict):
-    re_interval = re.compile(r'((?:\d{1,2}/)?(?:\d{1,2}/)?(?:\d{4}|\d{2}))'  # start date
-                             r'-'                                            # interval sep
-                             r'((?:\d{1,2}/)?(?:\d{1,2}/)?(?:\d{4}|\d{2}))') # end date
-    re_time = re.compile(r'(\d{1,2})(.)(\d{1,2})\s*(?:am|pm)')
     sample_date = None
     sample_time = None
-    for col in ['collection_timestamp', 'collection_date',
-                'collection_time', 'sample_date']:
+    for col in collection_datetime_cols:
         try:
             timestamp = row[col].strip()
         except KeyError:
             timestamp = None
         else:
-            if re_missing.match(timestamp):
+            if is_missing(timestamp):
                 continue
-            try:
-                dt = parser.parse(timestamp, dayfirst=dayfirst_dict[col])
-            except ValueError:
-                # Assume the timestamp is an interval
-                match = re_interval.search(timestamp)
-                if match:
-                    # Only use the first date (for simplicity)
-                    dt = parser.parse(match.group(1), dayfirst=dayfirst_dict[col])
-                # If a strange time format like 11_30am is encountered:
-                # Only search times, NOT dates i.e. matching beginning of string
-                match = re_time.match(timestamp)
-                if match:
-                    sep = match.group(2)
-                    timestamp = timestamp.replace(sep, ':')
-                    dt = parser.parse(timestamp)
-                if not dt:
-                    raise
-            (date, time) = extract_date_time_from(dt)
+            (date, time) = parse_collection_timestamp(timestamp,
+                                                      dayfirst_dict[col])
             if not sample_date:
                 sample_date = date
             if not sample_time:
@@ -417,6 +423,30 @@ def get_collection_datetime(row, dayfirst_dict):
     return (sample_date, sample_time)
 
 
+def parse_collection_timestamp(timestamp, dayfirst=False):
+    """Return a tuple of the date and time parsed from the given (non-missing)
+    timestamp (See extract_date_time_from).
+    """
+    try:
+        dt = parser.parse(timestamp, dayfirst=dayfirst)
+    except ValueError:
+        # Assume the timestamp is an interval
+        match = re_interval.search(timestamp)
+        if match:
+            # Only use the first date (for simplicity)
+            dt = parser.parse(match.group(1), dayfirst=dayfirst)
+        # If a strange time format like 11_30am is encountered:
+        # Only search times, NOT dates i.e. matching beginning of string
+        match = re_time.match(timestamp)
+        if match:
+            sep = match.group(2)
+            timestamp = timestamp.replace(sep, ':')
+            dt = parser.parse(timestamp)
+        if not dt:
+            raise
+    return extract_date_time_from(dt)
+
+
 def extract_date_time_from(dt):
     """Extract the date and time components from a datetime object.
 
@@ -482,7 +512,31 @@ get_latitude = get_numeric(['latitude'])
 get_longitude = get_numeric(['longitude'])
 get_elevation = get_numeric(['elevation'])
 get_bmi = get_numeric(['bmi', 'body_mass_index', 'host_body_mass_index'])
-has_day_first = vectorize(has_day_first)
+has_day_first = vectorize(is_day_first)
+
+# Columns read from metadata files (See creator.read_planner)
+# Note: The source name is taken from the first column ending in 'study_id'
+# (See parse_source).
+source_suffixes = ('study_id',)
+sample_getters = {'study_id': get_study_id, 'sample_id': get_sample_id,
+                  'subject_id': get_subject_id,
+                  'body_habitat': get_body_habitat,
+                  'body_product': get_body_product,
+                  'body_site': get_body_site, 'env_biom': get_env_biom,
+                  'env_feature': get_env_feature, 'sex': get_sex,
+                  'country': get_country, 'race': get_race,
+                  'csection': get_csection, 'disease': get_disease,
+                  'dob': get_dob, 'age': get_age, 'height': get_height,
+                  'weight': get_weight, 'latitude': get_latitude,
+                  'longitude': get_longitude, 'elevation': get_elevation,
+                  'bmi': get_bmi}
+sample_column_groups = {'sampling_time': collection_datetime_cols,
+                        'source': ['source', 'source_type', 'source_url']}
+sample_columns = get_getter_columns(sample_getters.values())
+for cols in sample_column_groups.values():
+    sample_columns.update(cols)
+# Extraction plans of the files parsed by parse_object_dicts (by default)
+plan_cache = PlanCache()
 
 
 # Functions to parse a rows into SQLAlchemy objects
@@ -535,7 +589,7 @@ def parse_source(row, name=None, type_=None, url=None, provenance=None):
                         'ending in "study_id".')
     # Replace source_name with 'source' column value if it exists
     new_source_name = row.get('source', '')
-    if not re_missing.match(new_source_name):
+    if not is_missing(new_source_name):
         source_name = new_source_name
     # If source_name could not be initialized
     if not source_name:
@@ -546,7 +600,7 @@ def parse_source(row, name=None, type_=None, url=None, provenance=None):
     
     # Replace source_type with 'source_type' column value if it exists
     new_source_type = row.get('source_type', '')
-    if not re_missing.match(new_source_type):
+    if not is_missing(new_source_type):
         source_type = new_source_type
     if not source_type:
         raise Exception('No source type could be found in the "source_type" '
@@ -555,7 +609,7 @@ def parse_source(row, name=None, type_=None, url=None, provenance=None):
     
     # Replace source_url with 'source_url' column value if it exists
     new_source_url = row.get('source_url', '')
-    if not re_missing.match(new_source_url):
+    if not is_missing(new_source_url):
         source_url = new_source_url
     if not source_url:
         raise Exception('No source url could be found in the "source_url" '
@@ -787,17 +841,9 @@ def parse_sampling_time(object_):
         return time
     # Parse from model.Sample
     try:
-        sample_date = object_.sample_date
-        sample_time = object_.sample_time
-        default_date = datetime.date(1,1,1)
-        default_time = datetime.time(0,0,0)
-        if sample_date and sample_time:
-            timestamp = datetime.datetime.combine(sample_date, sample_time)
-        elif sample_date:
-            timestamp = datetime.datetime.combine(sample_date, default_time)
-        elif sample_time:
-            timestamp = datetime.datetime.combine(default_date, sample_time)
-        else:
+        timestamp = get_sampling_timestamp(object_.sample_date,
+                                           object_.sample_time)
+        if not timestamp:
             # Sample object has no date or time
             return None
         time = Time.from_datetime(timestamp)
@@ -808,15 +854,459 @@ def parse_sampling_time(object_):
     return time
 
 
+def get_sampling_timestamp(sample_date, sample_time):
+    """Combine the given sample date and time into a datetime.datetime, using
+    a year of 1 if no date is given and midnight if no time is given (See
+    model.Time.from_datetime). Return None if neither are given.
+    """
+    return combine_date_time(sample_date, sample_time)
+
+
+# Functions to extract whole columns of values (columnar parsing)
+# Note: Each function extracts the same values as the corresponding row getter
+# (wrapper function), but applies regular expressions, extractors and parsers
+# only once for each unique value in a column.
+def read_metadata(metadata_file, columns=None, suffixes=(), engine=None):
+    """Read a metadata file into a DataFrame of stripped strings (missing
+    cells are empty strings).
+
+    Only the given columns are read, if any (See
+    creator.read_planner.read_columns).
+    """
+    df = read_columns(metadata_file, columns, suffixes, engine=engine)
+    for col in df.columns:
+        df[col] = df[col].str.strip()
+    return df
+
+
+def apply_unique(values, func):
+    """Apply func to each unique value in the given Series.
+
+    Returns
+    -------
+    pandas.Series
+        An object Series (with the same index as values) of the results.
+    """
+    # Note: Factorize an array (rather than a Series), so that tuples are not
+    # converted into a MultiIndex
+    codes, uniques = factorize(values.to_numpy(dtype=object))
+    results = empty(len(uniques), dtype=object)
+    results[:] = [func(value) for value in uniques]
+    return Series(results[codes], index=values.index, dtype=object)
+
+
+def empty_column(index):
+    """Return an object Series of None values with the given index."""
+    # Note: Series(None, index=index, dtype=object) would contain NaN values
+    return Series([None]*len(index), index=index, dtype=object)
+
+
+def get_missing_mask(values):
+    """Return a boolean Series, True where the given values look missing."""
+    return missing_mask(values, re_missing)
+
+
+def extract_strings(df, getter, columns=None):
+    """Extract a column of values for a getter made by get_string.
+
+    The values are taken from the first of the given columns (e.g. resolved
+    by a creator.extraction_plan.ExtractionPlan), by default the column of
+    the getter.
+    """
+    column = columns[0] if columns else getter.column
+    try:
+        values = df[column]
+    except KeyError:
+        raise Exception(f'Sample metadata file does not have a '
+                        f'"{column}" column.')
+    missing = get_missing_mask(values)
+    if getter.required and missing.any():
+        raise Exception(f'Missing value detected in "{column}" column.')
+    return values.astype(object).where(~missing, None)
+
+
+def extract_valid_strings(df, getter, columns=None):
+    """Extract a column of values for a getter made by get_valid_string,
+    from the given columns (by default, the columns of the getter).
+    """
+    result = empty_column(df.index)
+    found = Series(False, index=df.index)
+    for col in getter.columns if columns is None else columns:
+        if col not in df.columns:
+            continue
+        valid = ~found & ~get_missing_mask(df[col])
+        if not valid.any():
+            continue
+        values = df.loc[valid, col]
+        if getter.extractor:
+            values = apply_unique(values, partial(getter.extractor, col))
+        result[valid] = values
+        found |= valid
+    return result
+
+
+def extract_numerics(df, getter, columns=None):
+    """Extract a column of values for a getter made by get_numeric, from the
+    given columns (by default, the columns of the getter).
+    """
+    result = empty_column(df.index)
+    found = Series(False, index=df.index)
+    for col in getter.columns if columns is None else columns:
+        if col not in df.columns:
+            continue
+        valid = ~found & ~get_missing_mask(df[col])
+        result[valid] = apply_unique(df.loc[valid, col], float)
+        found |= valid
+    return result
+
+
+def extract_units(df, getter, default=None, columns=None):
+    """Extract a column of units for a getter made by get_units, from the
+    given columns (by default, the columns of the getter).
+    """
+    result = empty_column(df.index)
+    found = Series(False, index=df.index)
+    for col in getter.columns if columns is None else columns:
+        if col not in df.columns:
+            continue
+        values = df[col].str.lower()
+        valid = ~found & ~get_missing_mask(values)
+        units = apply_unique(values[valid], parse_units)
+        for value in values[valid][units.isna()].unique():
+            logging.info(f'Ambiguous {getter.variable} units "{value}" in '
+                         f'column: {col}.')
+        units = units.dropna()
+        result[units.index] = units
+        found[units.index] = True
+    if not found.all():
+        if not default:
+            raise Exception(f'No {getter.variable} units were found for '
+                            f'{(~found).sum()} rows and no default was given.')
+        logging.info(f'No {getter.variable} units found for {(~found).sum()} '
+                     f'rows. Using default {getter.variable} unit: '
+                     f'"{default}".')
+        result[~found] = default
+    return result
+
+
+def extract_numerics_with_units(df, getter, to_units=None, from_units=None,
+                                columns=None, units_columns=None):
+    """Extract a column of values for a getter made by get_numeric_with_units.
+
+    Values are converted with one multiplication for each distinct unit (See
+    creator.units.convert_values). Values and units are taken from the given
+    columns and units_columns (by default, the columns of the getter and of
+    its units function).
+    """
+    to_units = to_units or database_units[getter.variable]
+    from_units = from_units or file_units[getter.variable]
+    re_valid_units = re.compile(getter.unit_regex)
+    result = empty_column(df.index)
+    found = Series(False, index=df.index)
+    default_units = None
+    for col in getter.columns if columns is None else columns:
+        if col not in df.columns:
+            continue
+        values = df[col].str.lower()
+        valid = ~found & ~get_missing_mask(values)
+        if not valid.any():
+            continue
+        values = values[valid]
+        # Find variable units (in value, column name or units columns)
+        units_in_col_name = re_valid_units.search(col)
+        if units_in_col_name:
+            units_in_col_name = units_in_col_name.group()
+        def find_units(value):
+            units_in_value = re_valid_units.search(value)
+            if units_in_value:
+                return parse_units(units_in_value.group())
+            elif units_in_col_name:
+                return parse_units(units_in_col_name)
+            return None
+        units = apply_unique(values, find_units)
+        if units.isna().any():
+            if default_units is None:
+                default_units = extract_units(df, getter.units_function,
+                                              from_units, units_columns)
+            units = units.fillna(default_units[valid])
+        # Remove invalid chars and apply necessary conversions
+        numbers = values.str.replace(re_invalid_numeric_chars, '',
+                                     regex=True).astype(float)
+        try:
+            converted = convert_values(numbers, units, to_units)
+        except DimensionalityError:
+            raise Exception(f'Conversion of {col} values to {to_units} not '
+                            'supported.')
+        result[valid] = converted.tolist()
+        found |= valid
+    return result
+
+
+def extract_collection_datetimes(df, dayfirst_dict=None, date_formats=None,
+                                 columns=None):
+    """Extract columns of sample dates and times (See
+    get_collection_datetime).
+
+    The format of each column is inferred (See creator.dates), so that whole
+    columns are parsed at once. Values that don't match the format of their
+    column are parsed with parse_collection_timestamp.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+    dayfirst_dict : dict
+        Whether ambiguous dates have the day first, for each column. By
+        default, inferred from the values of each column.
+    date_formats : dict, optional
+        Maps columns to previously inferred formats (used as hints, See
+        creator.dates.infer_date_format). The dict is updated with the
+        formats used.
+    columns : list of str, optional
+        Date and time columns, by default collection_datetime_cols.
+
+    Returns
+    -------
+    tuple of pandas.Series
+    """
+    dates = empty_column(df.index)
+    times = empty_column(df.index)
+    for col in collection_datetime_cols if columns is None else columns:
+        if col not in df.columns:
+            continue
+        valid = ~get_missing_mask(df[col])
+        if not valid.any():
+            continue
+        values = df.loc[valid, col]
+        dayfirst = dayfirst_dict[col] if dayfirst_dict else None
+        hint = date_formats.get(col) if date_formats is not None else None
+        date_format = infer_date_format(values, dayfirst, hint=hint)
+        if date_formats is not None:
+            date_formats[col] = date_format
+        new_dates, new_times = parse_date_times(
+                values, date_format,
+                fallback=partial(parse_collection_timestamp,
+                                 dayfirst=date_format.dayfirst))
+        no_date = dates[valid].isna() & new_dates.notna()
+        dates[no_date[no_date].index] = new_dates[no_date]
+        no_time = times[valid].isna() & new_times.notna()
+        times[no_time[no_time].index] = new_times[no_time]
+    return dates, times
+
+
+def extract_sampling_times(dates, times):
+    """Extract a column of sampling Times (one Time object for each unique
+    pair of date and time) (See parse_sampling_time).
+    """
+    pairs = Series(list(zip(dates, times)), index=dates.index)
+    codes, uniques = factorize(pairs.to_numpy(dtype=object))
+    unique_dates = [date for date, _ in uniques]
+    unique_times = [time for _, time in uniques]
+    components = get_time_components(unique_dates, unique_times)
+    unique_objects = empty(len(uniques), dtype=object)
+    unique_objects[:] = [Time(**attrs) if attrs['timestamp'] else None
+                         for attrs in components.to_dict('records')]
+    return Series(unique_objects[codes], index=dates.index)
+
+
+def extract_sources(df, name=None, type_=None, url=None, columns=None):
+    """Extract a column of Sources (one Source object for each unique source)
+    (See parse_source) from the given source columns (by default, those of
+    'source', 'source_type' and 'source_url' in df).
+    """
+    if columns is None:
+        columns = ('source', 'source_type', 'source_url')
+    source_cols = [col for col in columns if col in df.columns]
+    row = dict.fromkeys(df.columns, '')
+    if not source_cols:
+        source = parse_source(row, name, type_, url)
+        return Series(source, index=df.index, dtype=object)
+    def get_source(values):
+        return parse_source(dict(row, **dict(zip(source_cols, values))),
+                            name, type_, url)
+    values = Series(list(zip(*[df[col] for col in source_cols])),
+                    index=df.index)
+    return apply_unique(values, get_source)
+
+
+def extract_objects(values, func):
+    """Create an object for each unique combination of the given columns.
+
+    Parameters
+    ----------
+    values : pandas.DataFrame
+        Columns of values, used (in order) as arguments to func.
+    func : callable
+
+    Returns
+    -------
+    pandas.Series
+        An object Series, rows with equal values share the same object.
+    """
+    rows = Series(list(values.itertuples(index=False, name=None)),
+                  index=values.index)
+    return apply_unique(rows, lambda row: func(*row))
+
+
+def stage_objects(metadata_file, name='Qiita', type_='Database (Public)',
+                  url='https://qiita.ucsd.edu/study/description/0',
+                  engine=None, plan_cache=plan_cache):
+    """Parse the given metadata_file into staging records of Experiments,
+    Subjects and Samples, extracting values column by column.
+
+    Records are only created once for each unique experiment and subject,
+    and objects once for each unique sampling site, sampling time and
+    source. Only the columns used by the getters are read, with the given
+    pandas.read_csv engine (e.g. 'pyarrow'). The columns to read, the columns
+    of each attribute (and of its units) and the date formats of files with
+    the same header are taken from the given
+    creator.extraction_plan.PlanCache.
+
+    Returns
+    -------
+    creator.staging.Staging
+    """
+    plan = plan_cache.get_or_build(read_header(metadata_file),
+                                   sample_getters, sample_column_groups,
+                                   source_suffixes)
+    df = read_metadata(metadata_file, plan.usecols, engine=engine)
+    columns = plan.columns
+    values = DataFrame(index=df.index)
+    values['source'] = extract_sources(df, name, type_, url,
+                                       columns['source'])
+    for attr, getter in [('study_id', get_study_id),
+                         ('subject_id', get_subject_id),
+                         ('sample_id', get_sample_id)]:
+        values[attr] = extract_strings(df, getter, columns[attr])
+    staging = Staging()
+
+    # Experiments
+    for source, study_id in zip(values['source'], values['study_id']):
+        if study_id not in staging.experiments:
+            staging.add_experiment(ExperimentRecord(source=source,
+                                                    orig_study_id=study_id))
+    # Subjects
+    # Note: Subject attributes are taken from the first row of each subject
+    # (codes are assigned in order of first appearance).
+    subject_keys = values[['source', 'study_id', 'subject_id']]
+    codes, _ = factorize(Series(list(subject_keys.itertuples(index=False,
+                                                             name=None))))
+    first_rows = ~Series(codes).duplicated().to_numpy()
+    subject_df = df[first_rows]
+    subject_values = subject_keys[first_rows].copy()
+    for attr, getter in [('sex', get_sex), ('country', get_country),
+                         ('race', get_race), ('csection', get_csection),
+                         ('disease', get_disease), ('dob', get_dob)]:
+        subject_values[attr] = extract_valid_strings(subject_df, getter,
+                                                     columns[attr])
+    for (source, study_id, subject_id, sex, country, race, csection,
+         disease, dob) in zip(*[subject_values[col].tolist() for col
+                                in subject_values.columns]):
+        staging.add_subject(SubjectRecord(
+                source=source, orig_study_id=study_id,
+                orig_subject_id=subject_id, sex=sex, country=country,
+                race=race, csection=csection, disease=disease, dob=dob))
+    # Sampling sites
+    site_values = DataFrame(index=df.index)
+    for attr, plan_attr, getter in [
+            ('habitat', 'body_habitat', get_body_habitat),
+            ('product', 'body_product', get_body_product),
+            ('site', 'body_site', get_body_site),
+            ('biom', 'env_biom', get_env_biom),
+            ('feature', 'env_feature', get_env_feature)]:
+        site_values[attr] = extract_valid_strings(df, getter,
+                                                  columns[plan_attr])
+    sampling_sites = extract_objects(
+            site_values,
+            lambda habitat, product, site, biom, feature: SamplingSite(
+                    uberon_habitat_term=habitat, uberon_product_term=product,
+                    uberon_site_term=site, env_biom_term=biom,
+                    env_feature_term=feature))
+    # Sampling times
+    date_formats = dict(plan.date_formats)
+    dates, times = extract_collection_datetimes(
+            df, date_formats=date_formats, columns=columns['sampling_time'])
+    if date_formats != plan.date_formats:
+        plan.date_formats = date_formats
+        plan_cache.add(plan)
+    sampling_times = extract_sampling_times(dates, times)
+    # Samples
+    sample_values = {
+            'age_units': extract_units(df, get_age_units, ureg.years,
+                                       columns['age_units']),
+            'age': extract_numerics_with_units(
+                    df, get_age, columns=columns['age'],
+                    units_columns=columns['age_units']),
+            'latitude': extract_numerics(df, get_latitude,
+                                         columns['latitude']),
+            'longitude': extract_numerics(df, get_longitude,
+                                          columns['longitude']),
+            'elevation': extract_numerics(df, get_elevation,
+                                          columns['elevation']),
+            'height_units': extract_units(df, get_height_units, ureg.metres,
+                                          columns['height_units']),
+            'height': extract_numerics_with_units(
+                    df, get_height, columns=columns['height'],
+                    units_columns=columns['height_units']),
+            'weight_units': extract_units(df, get_weight_units,
+                                          ureg.kilograms,
+                                          columns['weight_units']),
+            'weight': extract_numerics_with_units(
+                    df, get_weight, columns=columns['weight'],
+                    units_columns=columns['weight_units']),
+            'bmi': extract_numerics(df, get_bmi, columns['bmi']),
+            'sample_date': dates,
+            'sample_time': times,
+            'sampling_time': sampling_times,
+            'sampling_site': sampling_sites,
+            'source': values['source'],
+            'orig_study_id': values['study_id'],
+            'orig_subject_id': values['subject_id'],
+            'orig_sample_id': values['sample_id']}
+    attrs = list(sample_values)
+    for row in zip(*[sample_values[attr].tolist() for attr in attrs]):
+        staging.add_sample(SampleRecord(**dict(zip(attrs, row))))
+    return staging
+
+
+def parse_object_dicts(metadata_file, name='Qiita', type_='Database (Public)',
+                       url='https://qiita.ucsd.edu/study/description/0',
+                       engine=None, plan_cache=plan_cache):
+    """Parse the given metadata_file into Experiments, Subjects and Samples,
+    extracting values column by column.
+
+    Records are first staged (See stage_objects) and only converted into
+    objects once the whole file has been parsed. Returns the same objects as
+    parse_objects.
+
+    Returns
+    -------
+    dict
+        Keys are 'experiments', 'subjects' and 'samples', values are
+        dictionaries whose keys are original identifiers and values are
+        objects.
+    """
+    staging = stage_objects(metadata_file, name, type_, url, engine,
+                            plan_cache)
+    return staging.to_object_dicts()
+
+
 # TODO Implement Exceptions specific to each parsed object (Source, Experiment,
 # sample, subject etc.), specify under Raises in docstring here!
-def parse_objects(metadata_file, returning='experiments'):
+def parse_objects(metadata_file, returning='experiments', columnar=False,
+                  engine=None):
     """Parse the given metadata_file into a collection of Experiments.
     
     Parameters
     ----------
     metadata_file : str
         Path to metadata file to be parsed.
+    returning : str or list of str
+        Any of 'experiments', 'subjects' or 'samples'.
+    columnar : bool
+        If True, the metadata file is parsed column by column (See
+        parse_object_dicts), which is much faster for large files.
+    engine : str, optional
+        The pandas.read_csv engine used by the columnar parser e.g. 'pyarrow'.
     
     Returns
     -------
@@ -826,11 +1316,9 @@ def parse_objects(metadata_file, returning='experiments'):
         values are Experiments.
     """
     # Collections of SQLAlchemy objects
-    sources = {}
-    experiments = {}
-    subjects = {}
-    samples = {}
-    sampling_sites = {}
+    # Canonical instances of each parsed object (See
+    # creator.interning.InternRegistry)
+    registry = InternRegistry()
     
     # Reference dictionaries:
     # These provide the ability to lookup objects via their identifiers
@@ -839,9 +1327,13 @@ def parse_objects(metadata_file, returning='experiments'):
     sample_ids = {}
     
     # BEGIN PARSING
+    if columnar:
+        object_dicts = parse_object_dicts(metadata_file, engine=engine)
+        return select_object_dicts(object_dicts, returning)
     # Infer date format
     dayfirst_dict = infer_date_formats(metadata_file)
-    row_generator = generate_rows(metadata_file)
+    row_generator = generate_rows(metadata_file, sample_columns,
+                                  source_suffixes)
     for row in row_generator:
         # Parse row into SQLAlchemy objects
         # TODO Implement properly - without need for specifying these keyword
@@ -849,10 +1341,7 @@ def parse_objects(metadata_file, returning='experiments'):
         source = parse_source(row, name='Qiita', 
                               type_='Database (Public)', 
                               url=f'https://qiita.ucsd.edu/study/description/0')
-        try:
-            source = sources[source.equality_attrs]
-        except KeyError:
-            sources[source.equality_attrs] = source
+        source = registry.intern(source)
         subject = parse_subject(row, source=source)
         sample = parse_sample(row, dayfirst_dict, source=source)
         sampling_site = parse_sampling_site(row)
@@ -861,28 +1350,19 @@ def parse_objects(metadata_file, returning='experiments'):
         experiment.source = source
         experiment.orig_study_id = get_study_id(row)
         # Search collections for equivalent objects and replace if found
-        try:
-            experiment = experiments[experiment.equality_attrs]
-        except KeyError:
-            experiments[experiment.equality_attrs] = experiment
-        try:
-            subject = subjects[subject.equality_attrs]
-        except KeyError:
-            subjects[subject.equality_attrs] = subject
+        experiment = registry.intern(experiment)
+        subject = registry.intern(subject)
         # Although each row has a unique sample_id for files metadata files 
         # derived from Qiita, each file also corresponds to one experiment in 
         # Qiita. If we want our parser to cope with the possibility of more
         # than one experiment per file, we cannot guarantee sample_id 
         # uniqueness, so we use several attributes in the sample.equality_attrs
         # (not just orig_sample_id).
-        try:
-            sample = samples[sample.equality_attrs]
-        except KeyError:
-            samples[sample.equality_attrs] = sample
-        try:
-            sampling_site = sampling_sites[sampling_site.equality_attrs]
-        except KeyError:
-            sampling_sites[sampling_site.equality_attrs] = sampling_site
+        sample = registry.intern(sample)
+        sampling_site = registry.intern(sampling_site)
+        # Samples collected at the same date and time share a Time (as for
+        # extract_sampling_times)
+        sample.sampling_time = registry.intern(sample.sampling_time)
         # Create provenance objects
         # TODO We could do this at a later stage, but perhaps it is convenient
         # to do it here? If done here, we would need to relax the restriction
@@ -915,6 +1395,13 @@ def parse_objects(metadata_file, returning='experiments'):
     object_dicts = {'experiments': experiment_ids,
                     'subjects': subject_ids,
                     'samples': sample_ids}
+    return select_object_dicts(object_dicts, returning)
+
+
+def select_object_dicts(object_dicts, returning):
+    """Return the object dictionaries named by returning (str or list of
+    str) from object_dicts.
+    """
     try:
         # To avoid iterating over str if str provided as indexed_by arg
         # Note: More pythonic than type-checking
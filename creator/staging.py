@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Lightweight staging records used while parsing metadata files.
+
+Model objects (See model.py) are instrumented by SQLAlchemy and keep their
+relationships (e.g. Experiment.samples, Subject.samples) as Python sets that
+are updated in both directions on every assignment. Creating one of these
+objects for each row of a large study is slow and memory hungry, so parsers
+first stage plain records instead: slotted objects (no instance __dict__)
+holding the parsed values, keyed by natural identifiers (original study,
+subject, sample and prep IDs), with relationships recorded as identifiers.
+
+Staged records are only converted into model objects (and relationships
+established) once all rows have been parsed, See Staging.to_object_dicts.
+
+Created on Sun Oct 18 21:32:05 2026
+
+@author: William
+"""
+
+# Standard library imports
+
+# Third-party imports
+
+# Local application imports
+from model import (Experiment, Subject, Sample, Preparation, SeqInstrument,
+                   Article, Author, CollectiveAuthor, get_repr)
+
+
+class Record:
+    """Base class of staging records.
+
+    Subclasses list the attributes of the record in __slots__ and the model
+    class into which they are converted as model. Attributes that are not
+    given are None.
+    """
+    __slots__ = ()
+    model = None
+
+    def __init__(self, **attrs):
+        for attr in self.__slots__:
+            setattr(self, attr, attrs.pop(attr, None))
+        if attrs:
+            raise TypeError(f'Unexpected attributes {list(attrs)!r} given to '
+                            f'{self.__class__.__name__}.')
+
+    def to_dict(self):
+        return {attr: getattr(self, attr) for attr in self.__slots__}
+
+    def to_object(self):
+        """Return a model object with the attributes of this record."""
+        return self.model(**self.to_dict())
+
+    def __repr__(self):
+        return get_repr(self.__class__.__name__, self.to_dict())
+
+
+class ExperimentRecord(Record):
+    __slots__ = ('source', 'orig_study_id')
+    model = Experiment
+
+
+class SubjectRecord(Record):
+    __slots__ = ('source', 'orig_study_id', 'orig_subject_id', 'sex',
+                 'country', 'race', 'csection', 'disease', 'dob')
+    model = Subject
+
+
+# The subject and experiment of a sample are given by its orig_study_id and
+# orig_subject_id.
+class SampleRecord(Record):
+    __slots__ = ('age_units', 'age', 'latitude', 'longitude', 'elevation',
+                 'height_units', 'height', 'weight_units', 'weight', 'bmi',
+                 'sample_date', 'sample_time', 'sampling_time',
+                 'sampling_site', 'source', 'orig_study_id',
+                 'orig_subject_id', 'orig_sample_id')
+    model = Sample
+
+
+# Instrument attributes are kept on the record and only become a
+# SeqInstrument when the record is converted.
+class PreparationRecord(Record):
+    __slots__ = ('study_id', 'prep_id', 'sample_id', 'seq_date',
+                 'seq_centre', 'seq_run_name', 'fwd_pcr_primer',
+                 'rev_pcr_primer', 'target_gene', 'target_subfragment',
+                 'platform', 'instrument_model', 'instrument_name')
+    model = Preparation
+    instrument_attrs = {'platform': 'platform', 'instrument_model': 'model',
+                        'instrument_name': 'name'}
+
+    def to_seq_instrument(self):
+        seq_instrument = SeqInstrument()
+        seq_instrument.study_id = self.study_id
+        seq_instrument.sample_id = self.sample_id
+        for attr, instrument_attr in self.instrument_attrs.items():
+            setattr(seq_instrument, instrument_attr, getattr(self, attr))
+        return seq_instrument
+
+    def to_object(self):
+        """Return a Preparation (and its SeqInstrument) with the attributes
+        of this record (See creator.prep_parser.parse_preparation).
+        """
+        preparation = self.model()
+        for attr in self.__slots__:
+            if attr not in self.instrument_attrs:
+                setattr(preparation, attr, getattr(self, attr))
+        preparation.seq_instrument = self.to_seq_instrument()
+        return preparation
+
+
+class AuthorRecord(Record):
+    __slots__ = ('first_initial', 'first_name', 'middle_initials',
+                 'last_name')
+    model = Author
+
+
+class CollectiveAuthorRecord(Record):
+    __slots__ = ('name',)
+    model = CollectiveAuthor
+
+
+# Authors and collective authors of an article are lists of AuthorRecords and
+# CollectiveAuthorRecords. Records are picklable, so that articles can be
+# parsed in worker processes (See creator.bib_parser.parse_bib_files).
+class ArticleRecord(Record):
+    __slots__ = ('title', 'pub_year', 'journal', 'journal_iso', 'vol',
+                 'issue', 'pages', 'doi', 'pmid', 'authors',
+                 'collective_authors')
+    model = Article
+
+    def to_object(self):
+        """Return an Article (and its Authors and CollectiveAuthors) with
+        the attributes of this record.
+        """
+        attrs = self.to_dict()
+        attrs['authors'] = [author.to_object()
+                            for author in self.authors or ()]
+        attrs['collective_authors'] = [collective_author.to_object()
+                                       for collective_author
+                                       in self.collective_authors or ()]
+        return self.model(**attrs)
+
+
+class Staging:
+    """Records staged while parsing a metadata file.
+
+    Attributes
+    ----------
+    experiments : dict
+        Maps original study IDs to ExperimentRecords.
+    subjects : dict
+        Maps (study ID, subject ID) to SubjectRecords.
+    samples : dict
+        Maps (study ID, subject ID, sample ID) to SampleRecords.
+    """
+
+    def __init__(self):
+        self.experiments = {}
+        self.subjects = {}
+        self.samples = {}
+
+    def __len__(self):
+        return len(self.samples)
+
+    def add_experiment(self, record):
+        """Stage the given ExperimentRecord, unless an experiment with the
+        same study ID is already staged. Return the staged record.
+        """
+        return self.experiments.setdefault(record.orig_study_id, record)
+
+    def add_subject(self, record):
+        """Stage the given SubjectRecord, unless a subject with the same
+        study and subject IDs is already staged (i.e. subject attributes are
+        taken from the first row of each subject). Return the staged record.
+        """
+        key = (record.orig_study_id, record.orig_subject_id)
+        return self.subjects.setdefault(key, record)
+
+    def add_sample(self, record):
+        """Stage the given SampleRecord, replacing any sample staged with the
+        same study, subject and sample IDs.
+        """
+        key = (record.orig_study_id, record.orig_subject_id,
+               record.orig_sample_id)
+        self.samples[key] = record
+        return record
+
+    def to_object_dicts(self):
+        """Convert the staged records into model objects and establish their
+        relationships.
+
+        Returns
+        -------
+        dict
+            Keys are 'experiments', 'subjects' and 'samples', values are
+            dictionaries whose keys are original identifiers and values are
+            objects (See creator.sample_parser.parse_objects).
+        """
+        experiments = {study_id: record.to_object()
+                       for study_id, record in self.experiments.items()}
+        subjects = {key: record.to_object()
+                    for key, record in self.subjects.items()}
+        experiment_ids = {}
+        subject_ids = {}
+        sample_ids = {}
+        for (study_id, subject_id, _), record in self.samples.items():
+            experiment = experiments[study_id]
+            subject = subjects[(study_id, subject_id)]
+            sample = record.to_object()
+            experiment_ids[experiment.orig_study_id] = experiment
+            subject_ids[subject.orig_subject_id] = subject
+            sample_ids[sample.orig_sample_id] = sample
+            subject.add_sample(sample)
+            experiment.add_sample(sample)
+        return {'experiments': experiment_ids,
+                'subjects': subject_ids,
+                'samples': sample_ids}
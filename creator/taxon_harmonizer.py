@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Harmonize lineages from different sources using a table of taxon synonyms.
+
+Studies mix Greengenes-style lineages (from BIOM metadata) with lineages
+derived from (deblur insertion) trees, so the same organism may be found
+under different names. A TaxonomyHarmonizer resolves each raw lineage to a
+canonical lineage (and thereby to canonical taxa, See creator.taxonomy) using
+a configurable synonym table. Resolved lineages are memoized in memory and
+(optionally) in a cache file on disk, so each distinct raw lineage is only
+resolved once across studies. The cache file is saved by the functions
+taking a harmonizer (creator.count_parser.get_counts and
+creator.taxon_merger.aggregate_at_taxon_level); other callers must call
+TaxonomyHarmonizer.save_cache.
+
+A synonym table is a tab separated file with a 'synonym' and a 'canonical'
+column, both containing prefixed taxon names e.g.
+
+synonym	canonical
+f__Tissierellaceae	f__Peptoniphilaceae
+g__Unassigned	g__
+
+Lines starting with '#' are ignored. A canonical name consisting only of a
+prefix (e.g. 'g__') marks the synonym as an empty rank.
+
+Created on Sun Oct 18 12:31:05 2026
+
+@author: William
+"""
+
+# Standard library imports
+import csv
+import hashlib
+import json
+import os
+
+# Third-party imports
+import pandas as pd
+
+# Local application imports
+from .taxonomy import (taxon_levels, taxon_prefixes, normalize_taxon,
+                       normalize_lineage)
+
+
+prefix_levels = dict(zip(taxon_prefixes, taxon_levels))
+
+# Version of the keys of cached lineages (See get_lineage_key), part of the
+# signature of cache files so that caches with older keys are discarded
+cache_version = 2
+
+
+def get_taxon_level(name):
+    """Return the taxonomic level of the given prefixed taxon name."""
+    try:
+        return prefix_levels[name.strip()[:3].lower()]
+    except KeyError:
+        raise ValueError(f'The taxon name {name!r} does not start with a '
+                         f'recognized prefix {taxon_prefixes}.')
+
+
+def load_synonyms(synonym_file):
+    """Return a dict mapping normalized synonyms to normalized canonical
+    taxa names, read from the given synonym table (See module docstring).
+    """
+    synonyms = {}
+    with open(synonym_file, newline='') as f:
+        rows = (line for line in f if not line.startswith('#'))
+        for row in csv.DictReader(rows, delimiter='\t'):
+            level = get_taxon_level(row['synonym'])
+            if get_taxon_level(row['canonical']) != level:
+                raise ValueError(f'The synonym {row["synonym"]!r} and '
+                                 f'canonical name {row["canonical"]!r} have '
+                                 'different taxonomic levels.')
+            synonym = normalize_taxon(row['synonym'], level)
+            synonyms[synonym] = normalize_taxon(row['canonical'], level)
+    return synonyms
+
+
+def get_lineage_key(lineage):
+    """Return the key of the given raw lineage in the cache of resolved
+    lineages.
+
+    Empty ranks of lineage sequences (None) are kept in place, as names are
+    matched to taxonomic levels by position (See
+    creator.taxonomy.normalize_lineage).
+    """
+    if lineage is None or isinstance(lineage, str):
+        return lineage or ''
+    return '; '.join('' if name is None else str(name) for name in lineage)
+
+
+class TaxonomyHarmonizer:
+    """Resolve raw lineages to canonical lineages.
+
+    Parameters
+    ----------
+    synonyms : dict
+        Maps normalized taxa names to normalized canonical taxa names (See
+        load_synonyms).
+    cache_file : str
+        Path to a JSON file in which resolved lineages are memoized between
+        runs. The cache is discarded if it was created with different
+        synonyms. It is only written by save_cache.
+    """
+
+    def __init__(self, synonyms={}, cache_file=None):
+        self.synonyms = dict(synonyms)
+        self.cache_file = cache_file
+        self.signature = self.get_signature(self.synonyms)
+        self._cache = {}
+        if cache_file and os.path.exists(cache_file):
+            self.load_cache()
+
+    @classmethod
+    def from_file(cls, synonym_file, cache_file=None):
+        """Return a TaxonomyHarmonizer using the given synonym table."""
+        return cls(load_synonyms(synonym_file), cache_file)
+
+    @staticmethod
+    def get_signature(synonyms):
+        """Return a hash of the given synonyms, used to validate a cache."""
+        dump = json.dumps([cache_version, sorted(synonyms.items())])
+        return hashlib.sha1(dump.encode('utf-8')).hexdigest()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def resolve(self, lineage):
+        """Return the canonical lineage of the given raw lineage.
+
+        Parameters
+        ----------
+        lineage : str or sequence of str
+            A raw lineage (See creator.taxonomy.normalize_lineage).
+
+        Returns
+        -------
+        list of str
+            Seven normalized canonical taxa names, with dummy values for
+            empty ranks.
+        """
+        key = get_lineage_key(lineage)
+        try:
+            return list(self._cache[key])
+        except KeyError:
+            pass
+        names = [self.synonyms.get(name, name)
+                 for name in normalize_lineage(lineage)]
+        self._cache[key] = tuple(names)
+        return names
+
+    def load_cache(self):
+        """Load resolved lineages from the cache file (if still valid)."""
+        with open(self.cache_file) as f:
+            cache = json.load(f)
+        if cache.get('signature') == self.signature:
+            self._cache.update((key, tuple(names)) for key, names
+                               in cache['lineages'].items())
+
+    def save_cache(self):
+        """Save resolved lineages to the cache file."""
+        if not self.cache_file:
+            raise ValueError('No cache_file was given to the harmonizer.')
+        cache = {'signature': self.signature,
+                 'lineages': {key: list(names) for key, names
+                              in self._cache.items()}}
+        temp_file = self.cache_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(cache, f)
+        os.replace(temp_file, self.cache_file)
+
+
+def harmonize_taxon_cols(df, harmonizer):
+    """Return a copy of the given count table with all taxonomic columns
+    replaced by canonical taxa names.
+
+    Each distinct lineage in the table is only resolved once.
+
+    Parameters
+    ----------
+    df : pandas.core.frame.DataFrame
+        A count table with (lowercase) taxonomic columns e.g. 'kingdom',
+        'phylum' etc.
+    harmonizer : TaxonomyHarmonizer
+
+    Returns
+    -------
+    pandas.core.frame.DataFrame
+    """
+    df = df.copy()
+    cols = [level for level in taxon_levels if level in df.columns]
+    if not cols:
+        return df
+    taxa = pd.MultiIndex.from_frame(df[cols].fillna(''))
+    codes, lineages = taxa.factorize()
+    resolved = []
+    for lineage in lineages:
+        lineage = dict(zip(cols, lineage))
+        names = harmonizer.resolve([lineage.get(level)
+                                    for level in taxon_levels])
+        resolved.append([names[taxon_levels.index(col)] for col in cols])
+    resolved = pd.DataFrame(resolved, columns=cols)
+    df[cols] = resolved.to_numpy()[codes]
+    return df
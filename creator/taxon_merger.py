@@ -9,6 +9,8 @@ import os
 import pandas as pd
 from typing import Union
 
+from .taxon_harmonizer import harmonize_taxon_cols
+
 class NoTaxonLevelPresent(ValueError):
     pass
 
@@ -20,7 +22,9 @@ def aggregate_at_taxon_level(df, taxon_level='genus',
                              missing_method: Union['remove', 'zero_count', 'sum'] = 'sum',
                              check_brackets=True,
                              simple_aggregation=False,
-                             keep_all_cols=False):
+                             keep_all_cols=False,
+                             use_taxon_ids=False,
+                             harmonizer=None):
     """Aggregates counts for the a dataframe containing taxonomic count data.
     
     Parameters
@@ -65,6 +69,10 @@ def aggregate_at_taxon_level(df, taxon_level='genus',
         may result from proposed taxonomy in reference databases such as 
         Greengenes and could potentially interfere with aggregation over 
         taxonomic levels.
+        Lineages parsed by creator.count_parser are normalized at ingest (See
+        creator.taxonomy.normalize_lineage) and never contain brackets, so
+        callers aggregating such lineages can pass check_brackets=False to
+        skip the replacement.
     grouping_cols : iterable
         The columns in the given df that you want to group by (excluding any 
         taxonomic columns). The chosen columns depend on the exact df. However,
@@ -90,6 +98,21 @@ def aggregate_at_taxon_level(df, taxon_level='genus',
         If False, then only columns specified in grouping_cols and relevant
         taxonomic levels (See simple_aggregation parameter), together with an
         aggregated 'count' column are retained.
+    use_taxon_ids : bool
+        If True, counts are aggregated on the '<taxon_level>_id' column (See 
+        model.Lineage) instead of the taxonomic columns. Taxon ids are unique
+        across lineages, so only this column is needed (and returned). Rows
+        with a missing taxon id (empty ranks) are handled using the given
+        missing_method, with 'sum' summing them into a row with a missing
+        taxon id. check_brackets, dummy_values and simple_aggregation are
+        ignored. With keep_all_cols, only counts are summed and other columns
+        take their first value in each group.
+    harmonizer : creator.taxon_harmonizer.TaxonomyHarmonizer
+        If given, the taxonomic columns are replaced by canonical taxa names
+        before aggregation, so that counts of the same taxa from different
+        sources (e.g. studies) are aggregated together. Empty ranks are 
+        replaced by default dummy values e.g. 'g__'. Its cache file (if
+        any) is saved once the columns are harmonized.
     
     Returns
     -------
@@ -117,6 +140,9 @@ def aggregate_at_taxon_level(df, taxon_level='genus',
     if taxon_level not in recognized_taxon_levels:
         raise ValueError(f'The given taxon_level {taxon_level!r} is not a recognized taxon level. '
                          f'Please choose from: {recognized_taxon_levels}.')
+    if use_taxon_ids:
+        return _aggregate_on_taxon_ids(df, taxon_level, grouping_cols,
+                                       missing_method, keep_all_cols)
     # Get taxonomic levels expected for proper merging
     taxon_level_index = recognized_taxon_levels.index(taxon_level)
     required_taxon_levels = recognized_taxon_levels[:taxon_level_index+1]
@@ -164,6 +190,10 @@ def aggregate_at_taxon_level(df, taxon_level='genus',
         columns = grouping_cols + [taxon_level]
     else:
         columns = grouping_cols + required_taxon_levels
+    if harmonizer is not None:
+        df = harmonize_taxon_cols(df, harmonizer)
+        if harmonizer.cache_file:
+            harmonizer.save_cache()
     # Check taxonomic columns for bracketed taxa names
     if check_brackets:
         df[taxon_cols_present] = df.loc[:, taxon_cols_present].replace(r'[\[\]]', '', regex=True)
@@ -218,6 +248,47 @@ def aggregate_at_taxon_level(df, taxon_level='genus',
         return new_df
     else:
         return new_df[columns + ['count']]
+
+
+
+def _aggregate_on_taxon_ids(df, taxon_level, grouping_cols, missing_method,
+                            keep_all_cols):
+    """Aggregate counts on a single taxon id column. See 
+    aggregate_at_taxon_level for a description of the parameters.
+    """
+    id_col = f'{taxon_level}_id'
+    if id_col not in df.columns:
+        raise NoTaxonLevelPresent(
+                f'The given df does not contain a taxon id column {id_col!r} '
+                f'for the given taxon_level {taxon_level!r}.')
+    grouping_cols = list(grouping_cols)
+    columns_not_found = [col for col in grouping_cols if col not in df.columns]
+    if columns_not_found:
+        raise ValueError('At least one of the supplied column names in '
+                         'grouping_cols is not present in given df. '
+                         f'Didn\'t find columns: {columns_not_found}.')
+    columns = grouping_cols + [id_col]
+    # Only counts are summed: other columns (e.g. the ids of higher taxon
+    # levels) are the same for all rows with the same taxon id
+    aggregations = {}
+    if keep_all_cols:
+        aggregations = {col: 'first' for col in df.columns
+                        if col not in columns and col != 'count'}
+    aggregations['count'] = 'sum'
+    new_df = df.groupby(columns, dropna=False).agg(aggregations).reset_index()
+    if missing_method == 'sum':
+        pass
+    elif missing_method == 'remove':
+        new_df = new_df.loc[new_df[id_col].notna()]
+    elif missing_method == 'zero_counts':
+        new_df.loc[new_df[id_col].isna(), 'count'] = 0
+    else:
+        raise ValueError(f'The given {missing_method} is not valid. Please choose '
+                         'from `sum`, `remove` or `zero_counts`.')
+    if keep_all_cols:
+        return new_df
+    else:
+        return new_df[columns + ['count']]
     
     
 if __name__ == '__main__':
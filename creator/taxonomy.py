@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+"""
+Tools to normalize taxonomic lineages before they are stored in the database.
+
+Lineages parsed from BIOM metadata and from (deblur insertion) trees come in
+slightly different flavours e.g. Greengenes proposed taxa are bracketed
+('f__[Tissierellaceae]'), empty ranks may be dummy values ('g__'), None or
+empty strings and taxa names are not always consistently cased. These
+differences are resolved once, when a lineage is parsed, so that queries on
+the lineages table never have to clean taxa names.
+
+Each distinct node of the taxonomy is also stored as a Taxon (the taxon
+dimension), so that lineages can be aggregated at any rank by grouping on a
+single integer taxon id.
+Lineages and taxa also have a materialized path, so that everything below
+a taxon can be selected by a prefix (range) match on an indexed column.
+
+Created on Sun Oct 18 09:12:40 2026
+
+@author: William
+"""
+
+# Standard library imports
+import re
+
+# Third-party imports
+from sqlalchemy import func, and_, or_
+
+# Local application imports
+from model import Taxon, Lineage, Count, Sample
+
+
+taxon_levels = ['kingdom', 'phylum', 'class', 'order',
+                'family', 'genus', 'species']
+taxon_prefixes = ['k__', 'p__', 'c__', 'o__', 'f__', 'g__', 's__']
+# Lineage attribute names (see model.Lineage)
+lineage_attrs = [level + '_' for level in taxon_levels]
+lineage_taxon_attrs = [level + '_taxon' for level in taxon_levels]
+
+re_brackets = re.compile(r'[\[\]]')
+re_prefix = re.compile(r'^\s*(?P<prefix>[a-zA-Z])__')
+
+
+def normalize_taxon(name, level):
+    """Return the normalized name of a taxon at the given taxonomic level.
+
+    Brackets are removed, surrounding whitespace is stripped and the taxon
+    prefix is lowercased (and added if absent). Names of taxa above species
+    level are capitalized, while species names (epithets) are lowercased.
+
+    Parameters
+    ----------
+    name : str or None
+        A raw taxon name e.g. ' f__[Tissierellaceae]'.
+    level : str
+        The taxonomic level of the taxon e.g. 'family'.
+
+    Returns
+    -------
+    str
+        The normalized taxon name e.g. 'f__Tissierellaceae', or the dummy
+        value for the given level e.g. 'f__' if the rank is empty.
+    """
+    prefix = taxon_prefixes[taxon_levels.index(level)]
+    # Note: NaN is the only value not equal to itself
+    if name is None or name != name:
+        return prefix
+    name = re_brackets.sub('', str(name)).strip()
+    prefix_match = re_prefix.match(name)
+    if prefix_match:
+        name = name[prefix_match.end():].strip()
+    if not name:
+        return prefix
+    if level == 'species':
+        name = name.lower()
+    else:
+        name = name[0].upper() + name[1:]
+    return prefix + name
+
+
+def normalize_lineage(lineage):
+    """Return a list of normalized taxa names for each taxonomic level.
+
+    Parameters
+    ----------
+    lineage : str or sequence of str
+        A lineage string e.g. 'k__Bacteria; p__Firmicutes; c__' or a sequence
+        of taxa names ordered from kingdom to species. Missing lower ranks are
+        treated as empty ranks.
+
+    Returns
+    -------
+    list of str
+        Seven normalized taxa names, one for each level in taxon_levels, with
+        dummy values (e.g. 'g__') for empty ranks.
+    """
+    if lineage is None:
+        lineage = []
+    elif isinstance(lineage, str):
+        lineage = lineage.split(';')
+    lineage = list(lineage)
+    if len(lineage) > len(taxon_levels):
+        raise ValueError(f'The given lineage {lineage!r} has more taxonomic '
+                         f'levels than expected {taxon_levels}.')
+    lineage += [None]*(len(taxon_levels) - len(lineage))
+    return [normalize_taxon(name, level)
+            for name, level in zip(lineage, taxon_levels)]
+
+
+def is_empty_taxon(name):
+    """Return True if the given normalized taxon name is a dummy value."""
+    return name in taxon_prefixes
+
+
+def get_lineage_depth(names):
+    """Return the number of taxonomic levels down to the lowest non-empty rank
+    of a normalized lineage (0 if all ranks are empty).
+    """
+    depth = 0
+    for index, name in enumerate(names, 1):
+        if not is_empty_taxon(name):
+            depth = index
+    return depth
+
+
+def get_lineage_path(names):
+    """Return the materialized path of a normalized lineage i.e. the non-empty
+    taxa names joined (and terminated) by ';', or None if all ranks are empty.
+    """
+    names = [name for name in names if not is_empty_taxon(name)]
+    if not names:
+        return None
+    return ';'.join(names) + ';'
+
+
+def get_raw_lineage(lineage):
+    """Return the given raw lineage as a single string (as found in BIOM
+    metadata) or None if no lineage was given.
+    """
+    if lineage is None or isinstance(lineage, str):
+        return lineage
+    names = [name for name in lineage if name is not None]
+    if not names:
+        return None
+    return '; '.join(str(name) for name in names)
+
+
+def get_lineage_attrs(lineage, registry=None, harmonizer=None):
+    """Return a dict of Lineage attributes for the given raw lineage.
+
+    Parameters
+    ----------
+    lineage : str or sequence of str
+        A raw lineage (See normalize_lineage).
+    registry : TaxonRegistry
+        If given, the Taxon for each non-empty rank is also included, so that
+        the lineage is linked to the taxon dimension.
+    harmonizer : creator.taxon_harmonizer.TaxonomyHarmonizer
+        If given, taxa names are replaced by their canonical names.
+
+    Returns
+    -------
+    dict
+        Keys are model.Lineage attribute names, values are normalized taxa
+        names, the lineage depth and the original raw lineage string (and
+        taxa if a registry was given).
+    """
+    if harmonizer is not None:
+        names = harmonizer.resolve(lineage)
+    else:
+        names = normalize_lineage(lineage)
+    attrs = dict(zip(lineage_attrs, names))
+    attrs['depth'] = get_lineage_depth(names)
+    attrs['raw_lineage'] = get_raw_lineage(lineage)
+    attrs['path'] = get_lineage_path(names)
+    if registry is not None:
+        attrs.update(zip(lineage_taxon_attrs, registry.get_taxa(names)))
+    return attrs
+
+
+# Taxon dimension
+def get_taxon_key(taxon):
+    """Return a key uniquely identifying the given Taxon in the taxonomy i.e.
+    a tuple of (rank, name) pairs from the kingdom down to the taxon.
+    """
+    key = []
+    while taxon is not None:
+        key.append((taxon.rank, taxon.name))
+        taxon = taxon.parent
+    return tuple(reversed(key))
+
+
+class TaxonRegistry:
+    """Registry ensuring that each distinct (rank, ancestor path) node of the
+    taxonomy corresponds to a single Taxon.
+
+    Taxa already present in the database should be registered (See
+    from_session), so that they keep their identifiers.
+    """
+
+    def __init__(self, taxa=()):
+        self._taxa = {}
+        for taxon in taxa:
+            self._taxa[get_taxon_key(taxon)] = taxon
+
+    @classmethod
+    def from_session(cls, session):
+        """Return a TaxonRegistry containing all taxa found in the database
+        to which the given session is connected.
+        """
+        return cls(session.query(Taxon).all())
+
+    def __len__(self):
+        return len(self._taxa)
+
+    def __contains__(self, key):
+        return key in self._taxa
+
+    def get_taxa(self, names):
+        """Return the taxa for each rank of the given normalized lineage.
+
+        Parameters
+        ----------
+        names : sequence of str
+            Normalized taxa names, ordered from kingdom to species (See
+            normalize_lineage).
+
+        Returns
+        -------
+        list of model.Taxon
+            A Taxon for each rank, or None for empty ranks. New taxa are
+            created (and registered) when required.
+        """
+        taxa = []
+        key = ()
+        parent = None
+        for level, name in zip(taxon_levels, names):
+            if is_empty_taxon(name):
+                taxa.append(None)
+                continue
+            key += ((level, name),)
+            taxon = self._taxa.get(key)
+            if taxon is None:
+                path = get_lineage_path([name for _, name in key])
+                taxon = Taxon(rank=level, name=name, parent=parent, path=path)
+                self._taxa[key] = taxon
+            taxa.append(taxon)
+            parent = taxon
+        return taxa
+
+
+def query_counts_at_level(session, taxon_level, grouping_cols=['sample_id']):
+    """Return a query summing counts at the given taxonomic level.
+
+    Counts are grouped by the taxon id of the given level (and the given
+    grouping_cols), so no taxa names are compared. Counts of lineages that
+    are empty at the given level are summed into a single row with a NULL
+    taxon id.
+
+    Parameters
+    ----------
+    session : creator.Session
+    taxon_level : str
+        Any of taxon_levels e.g. 'genus'.
+    grouping_cols : list of str
+        Names of model.Count columns to group by (in addition to the taxon
+        id).
+
+    Returns
+    -------
+    sqlalchemy.orm.query.Query
+        Rows contain the grouping_cols, the '<taxon_level>_id' and 'count'.
+    """
+    if taxon_level not in taxon_levels:
+        raise ValueError(f'The given taxon_level {taxon_level!r} is not a '
+                         f'recognized taxon level. Please choose from: '
+                         f'{taxon_levels}.')
+    taxon_id = getattr(Lineage, taxon_level + '_id')
+    group_by = [getattr(Count, col) for col in grouping_cols] + [taxon_id]
+    query = session.query(*group_by, func.sum(Count.count).label('count'))\
+                   .join(Count.lineage)\
+                   .group_by(*group_by)
+    return query
+
+
+# Subtree queries
+def get_subtree_bounds(path):
+    """Return the (inclusive) lower and (exclusive) upper bound of the paths
+    of all lineages/taxa below (and including) the node with the given path.
+    """
+    return path, path[:-1] + chr(ord(path[-1]) + 1)
+
+
+def get_ancestor_paths(path):
+    """Return the paths of all ancestors of the node with the given path,
+    from the kingdom down to (and including) the node itself.
+    """
+    names = path.rstrip(';').split(';')
+    return [';'.join(names[:index]) + ';' for index in range(1, len(names)+1)]
+
+
+def get_node_paths(session, node):
+    """Return the paths of the given node.
+
+    Parameters
+    ----------
+    session : creator.Session
+    node : model.Taxon or str
+        A Taxon, a path (ending with ';') e.g. 'k__Bacteria;p__Firmicutes;' 
+        or a (normalized) taxon name e.g. 'f__Lachnospiraceae'. A taxon name
+        may correspond to several taxa with different ancestors.
+
+    Returns
+    -------
+    list of str
+    """
+    if isinstance(node, Taxon):
+        return [node.path]
+    if node.endswith(';'):
+        return [node]
+    paths = session.query(Taxon.path).filter(Taxon.name == node).all()
+    return [path for path, in paths]
+
+
+def subtree_condition(column, paths):
+    """Return a condition selecting rows whose path column is below any of
+    the given paths.
+    """
+    conditions = []
+    for path in paths:
+        lower, upper = get_subtree_bounds(path)
+        conditions.append(and_(column >= lower, column < upper))
+    return or_(*conditions)
+
+
+def query_lineages_under(session, node):
+    """Return a query for all lineages below the given node (See
+    get_node_paths).
+    """
+    paths = get_node_paths(session, node)
+    return session.query(Lineage).filter(subtree_condition(Lineage.path,
+                                                           paths))
+
+
+def query_counts_under(session, node):
+    """Return a query for all counts of lineages below the given node (See
+    get_node_paths).
+    """
+    paths = get_node_paths(session, node)
+    return session.query(Count)\
+                  .join(Count.lineage)\
+                  .filter(subtree_condition(Lineage.path, paths))
+
+
+def query_samples_under(session, node):
+    """Return a query for all samples with non-zero counts for lineages below
+    the given node (See get_node_paths).
+    """
+    paths = get_node_paths(session, node)
+    return session.query(Sample)\
+                  .join(Sample.counts)\
+                  .join(Count.lineage)\
+                  .filter(subtree_condition(Lineage.path, paths))\
+                  .distinct()
+
+
+def query_ancestors(session, lineage):
+    """Return a query for all taxa that are ancestors of the given lineage
+    (ordered from kingdom down).
+    """
+    paths = get_ancestor_paths(lineage.path) if lineage.path else []
+    return session.query(Taxon)\
+                  .filter(Taxon.path.in_(paths))\
+                  .order_by(func.length(Taxon.path))
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Convert whole columns of values between units of measurement.
+
+Instead of creating a pint Quantity for each value, unit columns are
+factorized, each distinct unit string is resolved only once (resolved units
+and conversion factors are memoized) and each group of values is converted
+with a single NumPy multiplication (and addition, for units with an offset
+e.g. degrees Celsius).
+
+Created on Sun Oct 18 16:48:13 2026
+
+@author: William
+"""
+
+# Standard library imports
+from functools import lru_cache
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+from pint import UndefinedUnitError
+
+# Local application imports
+from . import ureg
+
+
+@lru_cache(maxsize=None)
+def parse_units(string):
+    """Return the pint units of the given (lowercase) units string or None if
+    the units are not recognized.
+    """
+    try:
+        return ureg.parse_expression(string).units
+    except UndefinedUnitError:
+        return None
+
+
+def resolve_units(units, recognized_units={}):
+    """Return the pint units of the given units.
+
+    Parameters
+    ----------
+    units : str or pint.Unit
+        A units string (case insensitive) e.g. 'cm' or 'Years', or pint units
+        (returned as is).
+    recognized_units : dict
+        Maps (lowercase) strings that are not recognized by pint to valid
+        units strings e.g. {'y': 'years'}.
+
+    Returns
+    -------
+    pint.Unit or None
+        None if the units are missing or not recognized.
+    """
+    if units is None or isinstance(units, ureg.Unit):
+        return units
+    if isinstance(units, float) and np.isnan(units):
+        return None
+    string = str(units).lower()
+    resolved = parse_units(string)
+    if resolved is None and string in recognized_units:
+        resolved = parse_units(str(recognized_units[string]))
+    return resolved
+
+
+@lru_cache(maxsize=None)
+def get_conversion(from_units, to_units):
+    """Return the scale and offset converting values from from_units to
+    to_units i.e. converted = value*scale + offset.
+
+    Raises
+    ------
+    pint.DimensionalityError
+        If the units are incompatible.
+    """
+    offset = ureg.Quantity(0.0, from_units).to(to_units).magnitude
+    scale = ureg.Quantity(1.0, from_units).to(to_units).magnitude - offset
+    return scale, offset
+
+
+def convert_value(value, from_units, to_units):
+    """Convert a single value from from_units to to_units (See
+    get_conversion).
+    """
+    scale, offset = get_conversion(from_units, to_units)
+    if offset:
+        return value*scale + offset
+    return value*scale
+
+
+def convert_values(values, units, to_units, recognized_units={},
+                   decimal_places=None):
+    """Convert a column of values to the given units.
+
+    Parameters
+    ----------
+    values : pandas.Series
+        Numeric values.
+    units : pandas.Series, str or pint.Unit
+        The units of each value, or the units of all values. Units can be
+        strings or pint units (See resolve_units).
+    to_units : str or pint.Unit
+    recognized_units : dict
+        See resolve_units.
+    decimal_places : int
+        If given, converted values are rounded to this number of decimals.
+
+    Returns
+    -------
+    pandas.Series
+        Converted values (floats), NaN where the units are missing or not
+        recognized.
+
+    Raises
+    ------
+    pint.DimensionalityError
+        If the units of any value are incompatible with to_units.
+    """
+    to_units = resolve_units(to_units, recognized_units)
+    numbers = values.to_numpy(dtype=float)
+    if isinstance(units, pd.Series):
+        codes, uniques = pd.factorize(units.to_numpy(dtype=object))
+    else:
+        codes = np.zeros(len(values), dtype=int)
+        uniques = [units]
+    scales = np.full(len(uniques) + 1, np.nan)
+    offsets = np.zeros(len(uniques) + 1)
+    for index, unique in enumerate(uniques):
+        from_units = resolve_units(unique, recognized_units)
+        if from_units is not None:
+            scales[index], offsets[index] = get_conversion(from_units,
+                                                           to_units)
+    # Note: Code -1 (missing units) selects the trailing NaN scale
+    converted = numbers*scales[codes] + offsets[codes]
+    if decimal_places is not None:
+        converted = np.round(converted, decimal_places)
+    return pd.Series(converted, index=values.index)
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Download studies concurrently with several independent sessions.
+
+The list of studies is sharded across sessions (e.g. one Firefox/Selenium
+browser each, See qiita_downloader.firefox_session), each with its own
+download directory. Each session downloads its studies one at a time, and
+the files of each study are committed atomically to the output directory:
+they are first moved into a hidden temporary directory next to the final
+study directory, which is then renamed. A study directory therefore only
+exists once all its files have been downloaded, so that studies whose
+directory exists are skipped when downloads are resumed (or, given a sync
+manifest, studies that did not change, See sync_manifest). Failed downloads
+are retried.
+
+This module does not depend on Selenium: sessions and the download of a
+study are given as functions, so that downloads can be run against any
+(e.g. local) web server.
+
+Created on Mon Oct 19 00:41:37 2026
+
+@author: William
+"""
+
+# Standard library imports
+import os
+import os.path
+import shutil
+import tempfile
+import uuid
+import concurrent.futures
+
+
+def shard(items, num_shards):
+    """Split the given items into num_shards lists of items (round-robin),
+    leaving out empty lists.
+    """
+    shards = [items[index::num_shards] for index in range(num_shards)]
+    return [items for items in shards if items]
+
+
+def clear_dir(directory):
+    """Delete all files and directories in the given directory."""
+    for entry in os.scandir(directory):
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path)
+        else:
+            os.remove(entry.path)
+
+
+def commit_study_dir(dl_dir, output_dir, study_id, keep_files=(),
+                     replace=False):
+    """Move all files downloaded in dl_dir into the directory of the given
+    study in output_dir, atomically: the study directory appears with all its
+    files at once.
+
+    Parameters
+    ----------
+    keep_files : iterable of str, optional
+        Names of files of the existing study directory that are kept (unless
+        downloaded again) when the study directory is replaced.
+    replace : bool, optional
+        If True, an existing study directory is replaced. The existing
+        directory is first renamed, then removed once the new directory is in
+        place.
+
+    Raises
+    ------
+    FileExistsError
+        If the study directory already exists and replace is False.
+    """
+    study_dir = os.path.join(output_dir, study_id)
+    exists = os.path.exists(study_dir)
+    if exists and not replace:
+        raise FileExistsError(f'Study directory {study_dir!r} already exists.')
+    temp_dir = tempfile.mkdtemp(prefix=f'.{study_id}-', dir=output_dir)
+    try:
+        for filename in keep_files:
+            path = os.path.join(study_dir, filename)
+            try:
+                os.link(path, os.path.join(temp_dir, filename))
+            except OSError:
+                shutil.copy2(path, temp_dir)
+        for entry in os.scandir(dl_dir):
+            shutil.move(entry.path, os.path.join(temp_dir, entry.name))
+        # Note: Renaming a directory is atomic within a file system
+        if exists:
+            old_dir = os.path.join(output_dir,
+                                   f'.{study_id}-old-{uuid.uuid4().hex}')
+            os.rename(study_dir, old_dir)
+            os.rename(temp_dir, study_dir)
+            shutil.rmtree(old_dir)
+        else:
+            os.rename(temp_dir, study_dir)
+    except BaseException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+    return study_dir
+
+
+def download_shard(studies, open_session, download_study, output_dir,
+                   max_attempts=2, manifest=None, options=None):
+    """Download the given studies, one at a time, with a single session.
+
+    Without a manifest, studies whose directory exists are skipped. With a
+    manifest, only studies that are not current (See
+    sync_manifest.SyncManifest.is_current) are downloaded, except for their
+    intact preparations and BIOM files (and of the intact artifacts that the
+    download options do not download), and the directories of changed
+    studies are replaced.
+
+    Parameters
+    ----------
+    studies : list of Study
+        Studies to download (See qiita_downloader.Study).
+    open_session : callable
+        Given a download directory, returns a context manager yielding a
+        session (e.g. a logged in web driver) whose downloads are saved to
+        this directory.
+    download_study : callable
+        Given a session, a Study, the download directory of the session and
+        a set of artifacts that need not be downloaded (skip_artifacts
+        keyword argument, e.g. {'prep:237', 'biom:2478'}), downloads the
+        files of the study into the download directory.
+    output_dir : str
+        Directory in which a directory is created for each downloaded study.
+    max_attempts : int, optional
+        Maximum number of attempts to download a study.
+    manifest : sync_manifest.SyncManifest, optional
+        Sync manifest of output_dir, updated with each downloaded study.
+    options : set of str, optional
+        Download options given to download_study (See the --download option
+        of qiita_downloader), recorded in the manifest. By default, studies
+        are downloaded with all options.
+
+    Returns
+    -------
+    list of str
+        Identifiers of studies that could not be downloaded.
+    """
+    failed = []
+    dl_dir = tempfile.mkdtemp(prefix='qiita_dl_')
+    try:
+        with open_session(dl_dir) as session:
+            for study in studies:
+                study_dir = os.path.join(output_dir, study.study_id)
+                skip_artifacts = set()
+                if manifest is None:
+                    if os.path.exists(study_dir):
+                        continue  # Downloaded before
+                elif manifest.is_current(study, study_dir, options):
+                    continue
+                else:
+                    skip_artifacts = manifest.get_intact_downloads(
+                            study, study_dir, options)
+                for attempt in range(1, max_attempts + 1):
+                    try:
+                        download_study(session, study, dl_dir,
+                                       skip_artifacts=skip_artifacts)
+                        keep_files = []
+                        if manifest is not None:
+                            keep_files = manifest.get_files(study.study_id,
+                                                            skip_artifacts)
+                        commit_study_dir(dl_dir, output_dir, study.study_id,
+                                         keep_files=keep_files,
+                                         replace=manifest is not None)
+                        if manifest is not None:
+                            manifest.record_study(study, study_dir,
+                                                  options)
+                        break
+                    except Exception as error:
+                        clear_dir(dl_dir)
+                        print(f'Attempt {attempt} to download study '
+                              f'{study.study_id} failed: {error!r}')
+                else:
+                    failed.append(study.study_id)
+    finally:
+        shutil.rmtree(dl_dir, ignore_errors=True)
+    return failed
+
+
+def download_studies(studies, open_session, download_study, output_dir,
+                     sessions=2, max_attempts=2, manifest=None,
+                     options=None):
+    """Download the given studies with several concurrent sessions (See
+    download_shard), each downloading a shard of the studies.
+
+    Returns
+    -------
+    list of str
+        Identifiers of studies that could not be downloaded.
+    """
+    shards = shard(list(studies), sessions)
+    failed = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=sessions) \
+            as executor:
+        futures = [executor.submit(download_shard, studies_shard,
+                                   open_session, download_study, output_dir,
+                                   max_attempts, manifest, options)
+                   for studies_shard in shards]
+        for future in futures:
+            failed.extend(future.result())
+    return failed
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+Track the completion of browser downloads in a download directory.
+
+Browsers write a download to a temporary file (e.g. <name>.part for Firefox)
+that is renamed once the download is complete. Rather than polling the
+download directory for temporary files until there is none left (See
+qiita_downloader.wait_for_full_download), a DownloadTracker is told which
+downloads to expect before they are triggered (See DownloadTracker.expect),
+and returns a future for each expected download. Each file completed in the
+download directory is then assigned to the oldest pending expectation whose
+filename pattern it matches, resolving its future with the path of the
+file. Callers can therefore issue several downloads at once and wait (with a
+timeout) only for the files they need.
+
+The download directory is watched with inotify on Linux (through the C
+library), and scanned at regular intervals otherwise.
+
+Created on Mon Oct 19 09:12:48 2026
+
+@author: William
+"""
+
+# Standard library imports
+import os
+import os.path
+import ctypes
+import select
+import threading
+import time
+import concurrent.futures
+from fnmatch import fnmatch
+
+# Suffixes of the temporary files of incomplete downloads
+partial_suffixes = ('.part', '.crdownload', '.tmp')
+
+# Time (in seconds) after which an empty file with no temporary file is a
+# complete (empty) download rather than the placeholder of a download that is
+# starting
+empty_file_delay = 1.0
+
+# inotify events signalling changes of the files of a directory (See
+# inotify(7))
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+inotify_mask = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                IN_CREATE | IN_DELETE)
+
+
+def is_partial(filename):
+    """Return True if the given filename is that of an incomplete download."""
+    return filename.endswith(partial_suffixes)
+
+
+def get_completed_files(directory, empty_delay=empty_file_delay):
+    """Return a dictionary relating the keys of completed downloads in the
+    given directory to their paths, in order of modification.
+
+    Keys are (filename, inode, modification time) tuples, so that a file that
+    is downloaded again (replaced) has a new key. A file is complete if it is
+    not the temporary file of a download and if there is no temporary file
+    for it (e.g. Firefox creates an empty placeholder <name> next to
+    <name>.part while downloading). Empty files are only complete once they
+    have not been modified for empty_delay seconds, as the placeholder may be
+    created before the temporary file.
+    """
+    entries = [entry for entry in os.scandir(directory) if entry.is_file()]
+    names = {entry.name for entry in entries}
+    completed = []
+    now = time.time_ns()
+    for entry in entries:
+        if is_partial(entry.name):
+            continue
+        if any(entry.name + suffix in names for suffix in partial_suffixes):
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue  # Removed since scanned
+        if not stat.st_size and now - stat.st_mtime_ns < empty_delay * 1e9:
+            continue
+        completed.append((stat.st_mtime_ns,
+                          (entry.name, stat.st_ino, stat.st_mtime_ns),
+                          entry.path))
+    completed.sort()
+    return {key: path for _, key, path in completed}
+
+
+class Inotify:
+    """Minimal inotify watch of a directory (Linux only).
+
+    Raises
+    ------
+    OSError
+        If inotify is not available.
+    """
+
+    def __init__(self, directory, mask=inotify_mask):
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            init = libc.inotify_init1
+            add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError):
+            raise OSError('inotify is not available.')
+        self.fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed.')
+        if add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, 'inotify_add_watch failed.', directory)
+
+    def wait(self, timeout):
+        """Wait until the directory changes or the timeout (in seconds)
+        expires. Return True if the directory changed.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        # Events are only used as a signal to scan the directory
+        try:
+            while os.read(self.fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class DownloadTracker:
+    """Watch a download directory and resolve a future for each expected
+    download as soon as a matching file is completed.
+
+    Files completed before the tracker is created are ignored.
+
+    Parameters
+    ----------
+    dl_dir : str
+        The download directory (e.g. as specified in the firefox profile of a
+        driver, See qiita_downloader.create_firefox_profile).
+    interval : float, optional
+        Maximum time (in seconds) between two scans of the download
+        directory.
+    use_inotify : bool, optional
+        If False (or if inotify is not available), the download directory is
+        scanned every interval seconds.
+    """
+
+    def __init__(self, dl_dir, interval=0.1, use_inotify=True):
+        self.dl_dir = dl_dir
+        self.interval = interval
+        self._lock = threading.Lock()
+        # List of [pattern, future] in order of expectation
+        self._pending = []
+        # Completed files that are not assigned to an expectation yet
+        self._unclaimed = {}
+        self._seen = set(get_completed_files(dl_dir))
+        self._inotify = None
+        if use_inotify:
+            try:
+                self._inotify = Inotify(dl_dir)
+            except OSError:
+                pass
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+
+    @property
+    def uses_inotify(self):
+        return self._inotify is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop watching the download directory. Pending futures are
+        cancelled.
+        """
+        self._stopped.set()
+        self._thread.join()
+        if self._inotify is not None:
+            self._inotify.close()
+        with self._lock:
+            for _, future in self._pending:
+                future.cancel()
+            self._pending = []
+
+    def expect(self, pattern='*'):
+        """Expect a download whose filename matches the given (glob) pattern.
+
+        Call before triggering the download. Return a
+        concurrent.futures.Future whose result is the path of the downloaded
+        file.
+        """
+        future = concurrent.futures.Future()
+        with self._lock:
+            self._pending.append([pattern, future])
+            self._assign()
+        return future
+
+    def wait(self, futures, timeout=None):
+        """Wait until the given expected downloads are complete, and return
+        their paths.
+
+        Raises
+        ------
+        TimeoutError
+            If some downloads are not complete after timeout seconds. These
+            expectations are cancelled, so that they do not claim files
+            downloaded later.
+        """
+        done, not_done = concurrent.futures.wait(futures, timeout=timeout)
+        if not_done:
+            for future in not_done:
+                future.cancel()
+            raise TimeoutError(f'{len(not_done)} of {len(futures)} downloads '
+                               f'in {self.dl_dir!r} not complete after '
+                               f'{timeout} seconds.')
+        return [future.result() for future in futures]
+
+    def scan(self):
+        """Scan the download directory and assign newly completed files to
+        pending expectations.
+        """
+        completed = get_completed_files(self.dl_dir)
+        with self._lock:
+            for key, path in completed.items():
+                if key not in self._seen:
+                    self._seen.add(key)
+                    self._unclaimed[key] = path
+            # Forget files that were removed (e.g. moved out)
+            self._seen.intersection_update(completed)
+            self._unclaimed = {key: path for key, path
+                               in self._unclaimed.items() if key in completed}
+            self._assign()
+
+    def _assign(self):
+        """Assign unclaimed files to pending expectations (the lock must be
+        held).
+        """
+        self._pending = [[pattern, future] for pattern, future
+                         in self._pending if not future.done()]
+        for key, path in list(self._unclaimed.items()):
+            for expectation in self._pending:
+                pattern, future = expectation
+                if not fnmatch(key[0], pattern):
+                    continue
+                self._pending.remove(expectation)
+                try:
+                    future.set_result(path)
+                except concurrent.futures.InvalidStateError:
+                    continue  # Cancelled by the caller meanwhile
+                del self._unclaimed[key]
+                break
+
+    def _watch(self):
+        while not self._stopped.is_set():
+            if self._inotify is not None:
+                self._inotify.wait(self.interval)
+            else:
+                self._stopped.wait(self.interval)
+            self.scan()
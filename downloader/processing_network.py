@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Extract the processing network of a Qiita preparation without user
+interaction.
+
+Rather than waiting for a user to click through each artifact of the
+processing network canvas (See qiita_downloader.parse_processing_tree), the
+whole network is fetched in one scripted page evaluation (See
+extract_script): the browser requests the graph of the preparation (nodes and
+edges, as used by Qiita to draw the network) and the summary of every
+artifact of the graph (the page loaded when an artifact is clicked)
+concurrently, with the cookies of the logged in session. Processing
+parameters and BIOM file links are then parsed from the summaries with the
+same selectors as parse_processing_tree, so that the extracted data has the
+format of prep_data.json (See qiita_downloader.write_processing_data).
+
+Parsing does not depend on Selenium, so that it can be tested against saved
+graphs and summaries.
+
+Created on Mon Oct 19 12:14:26 2026
+
+@author: William
+"""
+
+# Standard library imports
+import re
+from html.parser import HTMLParser
+
+# Qiita endpoints requested by extract_script ({} is replaced by an
+# identifier)
+graph_url = '/prep/graph/?prep_id={}'
+summary_url = '/artifact/{}/summary/'
+
+# Processing parameters referring to the parent artifact (See
+# creator.prep_parser.parent_parameters)
+parent_parameters = ['input_data', 'demultiplexed sequences']
+
+biom_re = re.compile(r'\(biom\)')
+
+# Asynchronous script run by extract_processing_network (the last argument is
+# the callback of Selenium's execute_async_script)
+extract_script = """
+var prepId = arguments[0], graphUrl = arguments[1], summaryUrl = arguments[2];
+var done = arguments[arguments.length - 1];
+function get(url) {
+    return fetch(url, {credentials: 'same-origin'}).then(function (response) {
+        if (!response.ok) {
+            throw new Error(url + ': ' + response.status);
+        }
+        return response;
+    });
+}
+get(graphUrl.replace('{}', prepId))
+    .then(function (response) { return response.json(); })
+    .then(function (graph) {
+        var ids = graph.nodes
+            .filter(function (node) { return node[0] === 'artifact'; })
+            .map(function (node) { return String(node[2]); });
+        return Promise.all(ids.map(function (id) {
+            return get(summaryUrl.replace('{}', id))
+                .then(function (response) { return response.text(); });
+        })).then(function (pages) {
+            var summaries = {};
+            ids.forEach(function (id, index) {
+                summaries[id] = pages[index];
+            });
+            done({graph: graph, summaries: summaries});
+        });
+    })
+    .catch(function (error) { done({error: String(error)}); });
+"""
+
+
+def normalize_text(text):
+    """Collapse whitespace, as in the text of a Selenium web element."""
+    return ' '.join(text.split())
+
+
+class ArtifactSummaryParser(HTMLParser):
+    """Parse the processing parameters and files of an artifact summary.
+
+    Parameters are read from the rows of div#processing-info (label and
+    div.col-sm-5 of each div.row.form-group), files from the links of
+    div#available-files-div, as in parse_processing_tree.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.parameters = {}
+        self.files = []
+        # Stack of the classes and identifiers of open div elements
+        self._divs = []
+        self._row = None
+        self._text = None
+        self._link = None
+
+    def _in_div(self, div_id):
+        return any(attrs.get('id') == div_id for attrs in self._divs)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'div':
+            classes = set((attrs.get('class') or '').split())
+            attrs['classes'] = classes
+            self._divs.append(attrs)
+            if self._in_div('processing-info'):
+                if {'row', 'form-group'}.issubset(classes):
+                    self._row = {'label': None, 'value': None}
+                elif self._row is not None and 'col-sm-5' in classes:
+                    self._text = []
+        elif tag == 'label' and self._row is not None:
+            self._text = []
+        elif tag == 'a' and self._in_div('available-files-div'):
+            self._link = (attrs.get('href'), [])
+
+    def handle_endtag(self, tag):
+        if tag == 'div' and self._divs:
+            attrs = self._divs.pop()
+            if self._row is None:
+                return
+            if 'col-sm-5' in attrs['classes'] and self._text is not None:
+                self._row['value'] = normalize_text(''.join(self._text))
+                self._text = None
+            elif {'row', 'form-group'}.issubset(attrs['classes']):
+                label, value = self._row['label'], self._row['value']
+                if label is not None and value is not None:
+                    key = label.strip().replace(':', '').lower()
+                    self.parameters[key] = value
+                self._row = None
+        elif tag == 'label' and self._row is not None \
+                and self._text is not None:
+            self._row['label'] = normalize_text(''.join(self._text))
+            self._text = None
+        elif tag == 'a' and self._link is not None:
+            href, text = self._link
+            self.files.append((normalize_text(''.join(text)), href))
+            self._link = None
+
+    def handle_data(self, data):
+        if self._text is not None:
+            self._text.append(data)
+        if self._link is not None:
+            self._link[1].append(data)
+
+
+def parse_artifact_summary(html):
+    """Return the processing parameters of an artifact (an empty dictionary
+    for artifacts not generated by a processing job, e.g. raw data) and its
+    files, as a list of (text, link) tuples, from its summary HTML.
+    """
+    parser = ArtifactSummaryParser()
+    parser.feed(html)
+    parser.close()
+    return parser.parameters, parser.files
+
+
+def get_artifact_ids(graph):
+    """Return the identifiers of the artifacts of a processing network graph
+    (nodes are lists whose first items are the node type, 'artifact' or
+    'job', its name and its identifier).
+    """
+    return [str(node[2]) for node in graph['nodes'] if node[0] == 'artifact']
+
+
+def get_artifact_parents(graph):
+    """Return a dictionary relating the identifier of each artifact of a
+    processing network graph to that of its parent artifact.
+
+    Edges link artifacts to the jobs processing them, and jobs to the
+    artifacts they generate.
+    """
+    node_types = {str(node[2]): node[0] for node in graph['nodes']}
+    parents = {str(target): str(source) for source, target in graph['edges']}
+    artifact_parents = {}
+    for artifact_id in get_artifact_ids(graph):
+        parent = parents.get(artifact_id)
+        while parent is not None and node_types.get(parent) != 'artifact':
+            parent = parents.get(parent)
+        if parent is not None:
+            artifact_parents[artifact_id] = parent
+    return artifact_parents
+
+
+def parse_processing_network(graph, summaries):
+    """Parse the processing network of a preparation.
+
+    Parameters
+    ----------
+    graph : dict
+        Graph of the processing network, with 'nodes' and 'edges' (See
+        get_artifact_ids and get_artifact_parents).
+    summaries : dict
+        Relates artifact identifiers to the HTML of their summary.
+
+    Returns
+    -------
+    dict
+        Relates artifact identifiers to their processing parameters, as
+        written to prep_data.json. Processed artifacts whose summary does not
+        refer to their parent get an 'input_data' parameter from the edges
+        of the graph.
+    list of tuples
+        (artifact identifier, link) tuples of the BIOM files of the
+        artifacts.
+    """
+    artifact_parents = get_artifact_parents(graph)
+    artifacts = {}
+    biom_links = []
+    for artifact_id in get_artifact_ids(graph):
+        parameters, files = parse_artifact_summary(summaries[artifact_id])
+        if (parameters and artifact_id in artifact_parents
+                and not any(key in parameters for key in parent_parameters)):
+            parameters['input_data'] = artifact_parents[artifact_id]
+        artifacts[artifact_id] = parameters
+        biom_links.extend((artifact_id, link) for text, link in files
+                          if biom_re.search(text))
+    return artifacts, biom_links
+
+
+def extract_processing_network(driver, prep_id, timeout=None):
+    """Extract the processing network of a preparation in one scripted page
+    evaluation (See extract_script and parse_processing_network).
+
+    Precondition: driver is logged in to Qiita and has navigated to a Qiita
+    page (requests are relative to its origin).
+
+    Raises
+    ------
+    RuntimeError
+        If the graph or a summary could not be fetched.
+    """
+    if timeout is not None:
+        driver.set_script_timeout(timeout)
+    result = driver.execute_async_script(extract_script, str(prep_id),
+                                         graph_url, summary_url)
+    if 'error' in result:
+        raise RuntimeError(f'Processing network of preparation {prep_id} '
+                           f'could not be extracted: {result["error"]}')
+    return parse_processing_network(result['graph'], result['summaries'])
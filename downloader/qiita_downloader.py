@@ -19,8 +19,10 @@ import shutil
 import tempfile
 from ast import literal_eval
 from collections import namedtuple
+from contextlib import contextmanager
 from glob import glob
 from argparse import ArgumentParser
+from functools import partial
 from getpass import getpass
 from configparser import ConfigParser
 
@@ -33,12 +35,39 @@ from selenium.webdriver.support.ui import Select
 from selenium.webdriver.firefox.options import Options
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 
+# Local application imports
+try:
+    from .download_pool import download_studies
+    from .download_tracker import DownloadTracker
+    from .sync_manifest import SyncManifest
+    from .processing_network import extract_processing_network
+except ImportError:
+    # Run as a script (See README.md)
+    from download_pool import download_studies
+    from download_tracker import DownloadTracker
+    from sync_manifest import SyncManifest
+    from processing_network import extract_processing_network
+
 # Global variables:
 # namedtuple factory is similar to an object specification
 Study = namedtuple('Study', ['study_id', 'title', 'num_samples',
                              'num_artifacts', 'pmids', 'dois',
                              'study_link'])
 
+# Default maximum time (in seconds) to wait for the files of a study to
+# download
+study_timeout = 600
+
+# Filename patterns of the downloads of a study (See download_study and
+# sync_manifest.get_artifact)
+sample_file_pattern = '{study_id}_[0-9]*-[0-9]*.txt'
+# Preparation metadata file and Qiime map, in order of download (See
+# download_sample_prep_data)
+prep_file_patterns = ['*_prep_{prep_id}_[0-9]*.txt',
+                      '*_prep_{prep_id}_qiime_*.txt']
+archive_pattern = '*.zip'
+biom_pattern = '*.biom'
+
 
 def create_firefox_profile(dl_dir='.', last_dl_dir=2, show_dl_manager=False):
     """Create a firefox profile suitable for download automation."""
@@ -57,9 +86,9 @@ def create_firefox_profile(dl_dir='.', last_dl_dir=2, show_dl_manager=False):
     return profile
 
 
-def login_to_qiita(driver, username, password):
-    """Navigate to Qiita and login."""
-    driver.get("https://qiita.ucsd.edu/")
+def login_to_qiita(driver, username, password, url='https://qiita.ucsd.edu/'):
+    """Navigate to Qiita (or a server at the given url) and login."""
+    driver.get(url)
     assert "Qiita" in driver.title
     username_elem = driver.find_element_by_id("username")
     username_elem.send_keys(username)
@@ -334,7 +363,9 @@ def download_processing_params_and_bioms(driver, process_elem):
     function will then wait for user interaction with artifacts in this
     processing network. With each click, the function will attempt to extract
     processing parameters and their values, as well as download available
-    BIOM files associated with the artifacts. These files are downloaded to the
+    BIOM files associated with the artifacts (See
+    processing_network.extract_processing_network to extract a processing
+    network without user interaction). These files are downloaded to the
     download dir specified in the firefox profile attached to the given driver.
 
     The function coordinates threading (2 processes) to enable user interaction.
@@ -665,6 +696,93 @@ def get_citations_from_pubmed(driver, pmids, file_format='nbib'):
             ).click()
 
 
+def download_study(driver, study, dl_dir, dl_opts, timeout=study_timeout,
+                   skip_artifacts=()):
+    """Download the files of a study on Qiita selected by the download options
+    (See the --download option) into dl_dir, the download dir specified in
+    the firefox profile attached to the given driver.
+
+    The files of preparations and BIOM artifacts in skip_artifacts (e.g.
+    {'prep:237', 'biom:2478'}, See
+    sync_manifest.SyncManifest.get_intact_downloads) are not downloaded.
+
+    Downloads are started without waiting for previous ones to complete. The
+    function returns once all expected files are complete (See
+    download_tracker.DownloadTracker), or raises a TimeoutError if they are
+    not complete after timeout seconds.
+    """
+    driver.get(study.study_link)
+    prep_params = None
+    with DownloadTracker(dl_dir) as tracker:
+        expected = []
+        # TODO: Currently, functions are downloading multiple things.
+        # Qiime maps are in both the zip downloaded by download_qiime_and_biom
+        # and in the 16S processing. Not a problem really... Need to check that
+        # the maps are not different.
+        if 'sample' in dl_opts:
+            expected.append(tracker.expect(
+                    sample_file_pattern.format(study_id=study.study_id)))
+            download_sample_metadata(driver, max_attempts=2)
+        if 'biom' in dl_opts:
+            expected.append(tracker.expect(archive_pattern))
+            download_qiime_and_biom(driver)
+        if dl_opts.intersection({'prep', 'qiime', 'tree'}):
+            prep_params = []
+            for elems in generate_processing_elems(driver):
+                for elem in elems:
+                    prep_name = elem.find_element_by_tag_name('span').text
+                    prep_id = re.search(r'ID (\d+)', prep_name).group(1)
+                    elem.click()
+                    if f'prep:{prep_id}' in skip_artifacts:
+                        pass  # Downloaded before
+                    elif 'prep' in dl_opts or 'qiime' in dl_opts:
+                        # Preparation metadata file and Qiime map
+                        expected.extend(
+                                tracker.expect(pattern.format(prep_id=prep_id))
+                                for pattern in prep_file_patterns)
+                        download_sample_prep_data(driver)
+                    if 'tree' in dl_opts:
+                        artifacts, biom_links = extract_processing_network(
+                                driver, prep_id, timeout=timeout)
+                        prep_params.append({prep_id: artifacts})
+                        biom_links = [link for artifact_id, link in biom_links
+                                      if f'biom:{artifact_id}'
+                                      not in skip_artifacts]
+                        expected.extend(tracker.expect(biom_pattern)
+                                        for _ in biom_links)
+                        download_links(driver, biom_links)
+        tracker.wait(expected, timeout=timeout)
+    # Note: Written once the tracker stops, as it is not an expected download
+    if prep_params is not None:
+        write_processing_data(prep_params, dl_dir)
+
+
+def download_links(driver, links):
+    """Download the files at the given links (relative to the current page)
+    to the download dir specified in the firefox profile attached to the
+    given driver, without leaving the current page.
+    """
+    for link in links:
+        driver.execute_script(
+            "var a = document.createElement('a');"
+            "a.href = arguments[0]; a.download = '';"
+            "document.body.appendChild(a); a.click(); a.remove();", link)
+
+
+@contextmanager
+def firefox_session(dl_dir, username, password, options=None,
+                    url='https://qiita.ucsd.edu/'):
+    """Provide a Firefox driver logged in to Qiita, whose downloads are saved
+    to dl_dir (See create_firefox_profile). The driver quits on exit.
+    """
+    profile = create_firefox_profile(dl_dir=dl_dir)
+    driver = webdriver.Firefox(firefox_profile=profile, options=options)
+    try:
+        yield login_to_qiita(driver, username, password, url=url)
+    finally:
+        driver.quit()
+
+
 def concatenate_files(in_files, out_file):
     """Concatenates files in order to generate an specified output file."""
     files = sorted(in_files)
@@ -703,6 +821,14 @@ if __name__ == '__main__':
                                  'pmid', 'csv', 'nbib'],
                         help="""Specify a citation file format (if 'citation'
                         given as an argument for --download).""")
+    parser.add_argument('--sessions', type=int, default=1,
+                        help='Number of browser sessions downloading studies '
+                        'concurrently.')
+    parser.add_argument('--attempts', type=int, default=2,
+                        help='Maximum number of attempts to download a study.')
+    parser.add_argument('--timeout', type=float, default=study_timeout,
+                        help='Maximum time (in seconds) to wait for the files '
+                        'of a study to download.')
     args = parser.parse_args()
 
     # Put the Geckodriver path in the PATH variable.
@@ -765,40 +891,19 @@ if __name__ == '__main__':
 
         # Check for download options that require study directory creation
         if dl_opts.intersection({'biom', 'qiime', 'prep', 'sample', 'tree'}):
-            for study in studies:
-                driver.get(study.study_link)
-                # TODO: Currently, functions are downloading multiple things.
-                # Qiime maps are in both the zip downloaded by download_qiime_and_biom
-                # and in the 16S processing. Not a problem really... Need to check that
-                # the maps are not different.
-                try:
-                    if 'sample' in dl_opts:
-                        download_sample_metadata(driver, max_attempts=2)
-                    if 'biom' in dl_opts:
-                        download_qiime_and_biom(driver)
-                    if dl_opts.intersection({'prep', 'qiime', 'tree'}):
-                        prep_params = []
-                        for elems in generate_processing_elems(driver):
-                            for elem in elems:
-                                elem.click()
-                                if 'prep' in dl_opts or 'qiime' in dl_opts:
-                                    download_sample_prep_data(driver)
-                                if 'tree' in dl_opts:
-                                    params = download_processing_params_and_bioms(driver, elem)
-                                    prep_params.append(params)
-                        write_processing_data(prep_params, temp.name)
-                    wait_for_full_download(temp.name)
-                    # Populate the user-specified directory with subdirectories
-                    # containing downloaded files
-                    # TODO: Handle exception if a study directory already exists?
-                    # Should the user always have to download into a clean dir?
-                    study_dir = os.path.join(dl_path, study.study_id)
-                    os.mkdir(study_dir)
-                    move_files(temp.name, study_dir)
-                    # TODO: Possible bugs when moving files. E.g. 0kb zip files
-                except TimeoutException:
-                    failed_dl.append(study.study_id)
-                    delete_files(temp.name)
+            # Each session has its own browser, profile and download dir. The
+            # sync manifest records downloaded studies, so that only new or
+            # changed studies (and preparations) are downloaded again
+            manifest = SyncManifest.load(os.path.join(dl_path,
+                                                      'manifest.json'))
+            open_session = partial(firefox_session, username=username,
+                                   password=password, options=opts)
+            failed_dl.extend(download_studies(
+                    studies, open_session,
+                    partial(download_study, dl_opts=dl_opts,
+                            timeout=args.timeout), dl_path,
+                    sessions=args.sessions, max_attempts=args.attempts,
+                    manifest=manifest, options=dl_opts))
         # Download options that do not require study directory creation
         if 'study' in dl_opts:
             header = Study._fields
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+Record what has been downloaded for each study, to only download changes.
+
+A sync manifest is a JSON file (in the output directory of the downloader)
+recording, for each study, the remote version of the study (See
+get_study_version), the kinds of artifacts downloaded (See
+get_download_kinds) and, for each artifact of the study (sample metadata,
+BIOM files, each preparation, processing data), the remote identifier of the
+artifact and the size, modification time and SHA-256 checksum of each of its
+local files:
+
+    {study_id: {'version': str,
+                'kinds': [str],
+                'artifacts': {artifact: {'remote': str,
+                                         'files': {filename: {...}}}}}}
+
+Studies whose remote version is unchanged, whose recorded kinds include all
+kinds requested by the download options and whose files are intact are
+skipped. For other studies, preparations and BIOM files that are intact are
+not downloaded again (preparations are identified by their Qiita prep ID,
+BIOM files by the ID of their artifact, which prefixes their name), so that
+refreshing a mirror only transfers new studies, preparations and processing
+outputs.
+
+Created on Mon Oct 19 10:27:55 2026
+
+@author: William
+"""
+
+# Standard library imports
+import os
+import os.path
+import re
+import json
+import hashlib
+import tempfile
+import threading
+
+# Qiita file names (e.g. 101_20171109-130044.txt for sample metadata, and
+# 101_prep_237_qiime_20190428-053528.txt for a preparation's Qiime map)
+re_prep_file = re.compile(r'^\d+_prep_(\d+)_')
+re_sample_file = re.compile(r'^\d+_\d{8}-\d{6}\.txt$')
+# BIOM files of processing artifacts (e.g. 2478_130_otu_table.biom for
+# artifact 2478)
+re_biom_file = re.compile(r'^(\d+)_.*\.biom$')
+
+# Kinds of artifacts downloaded by each download option (See the --download
+# option of qiita_downloader): preparation files and Qiime maps are
+# downloaded together, BIOM files of processing artifacts with the processing
+# network
+download_kinds = {'sample': 'sample', 'prep': 'prep', 'qiime': 'prep',
+                  'biom': 'biom', 'tree': 'tree'}
+
+
+def get_study_version(study):
+    """Return the remote version of a Study (See qiita_downloader.Study):
+    its numbers of samples and artifacts in Qiita search results.
+    """
+    return f'samples={study.num_samples};artifacts={study.num_artifacts}'
+
+
+def get_artifact(filename):
+    """Return the artifact to which a downloaded file belongs: 'prep:<ID>',
+    'biom:<ID>' (the ID of a Qiita artifact), 'sample', 'processing' or
+    'biom' (other downloads, e.g. the zip archive of a study's BIOM files).
+    """
+    match = re_prep_file.match(filename)
+    if match:
+        return f'prep:{match.group(1)}'
+    match = re_biom_file.match(filename)
+    if match:
+        return f'biom:{match.group(1)}'
+    if re_sample_file.match(filename):
+        return 'sample'
+    if filename == 'prep_data.json':
+        return 'processing'
+    return 'biom'
+
+
+def get_artifact_kind(artifact):
+    """Return the kind of the given artifact (See get_artifact and
+    download_kinds).
+    """
+    if artifact.startswith('prep:'):
+        return 'prep'
+    if artifact == 'processing' or artifact.startswith('biom:'):
+        return 'tree'
+    return artifact
+
+
+def get_download_kinds(options=None):
+    """Return the set of kinds of artifacts downloaded with the given
+    download options (all kinds if options is None).
+    """
+    if options is None:
+        return set(download_kinds.values())
+    return {download_kinds[option] for option in options
+            if option in download_kinds}
+
+
+def get_checksum(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of the given file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_file_record(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'sha256': get_checksum(path)}
+
+
+def is_intact(path, file_record):
+    """Return True if the file at the given path is the recorded file: its
+    checksum is only computed if its size or modification time changed.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+    if stat.st_size != file_record['size']:
+        return False
+    if stat.st_mtime_ns == file_record['mtime_ns']:
+        return True
+    return get_checksum(path) == file_record['sha256']
+
+
+class SyncManifest:
+    """Sync manifest of an output directory (See module docstring).
+
+    The manifest may be shared by several threads (See
+    download_pool.download_studies), and is saved atomically after each
+    recorded study.
+    """
+
+    def __init__(self, path, studies=None):
+        self.path = path
+        self.studies = studies if studies is not None else {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def load(cls, path):
+        """Return the manifest saved at path (an empty manifest if there is
+        none).
+        """
+        try:
+            with open(path) as file:
+                return cls(path, json.load(file))
+        except FileNotFoundError:
+            return cls(path)
+
+    def save(self):
+        """Write the manifest to a temporary file that replaces the manifest
+        file (atomically).
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with self._lock:
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as file:
+                    json.dump(self.studies, file, sort_keys=True, indent=4)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+
+    def get_intact_artifacts(self, study_id, study_dir):
+        """Return the set of recorded artifacts of a study whose files are
+        all intact in study_dir.
+        """
+        with self._lock:
+            artifacts = self.studies.get(study_id, {}).get('artifacts', {})
+            artifacts = {artifact: dict(record['files'])
+                         for artifact, record in artifacts.items()}
+        return {artifact for artifact, files in artifacts.items()
+                if all(is_intact(os.path.join(study_dir, filename), record)
+                       for filename, record in files.items())}
+
+    def is_current(self, study, study_dir, options=None):
+        """Return True if the recorded remote version of the given Study is
+        its current version (See get_study_version), if the kinds of
+        artifacts downloaded with the given download options were recorded
+        (See get_download_kinds) and if all its recorded files are intact in
+        study_dir.
+        """
+        with self._lock:
+            entry = self.studies.get(study.study_id)
+        if entry is None or entry['version'] != get_study_version(study):
+            return False
+        if not get_download_kinds(options).issubset(entry.get('kinds', ())):
+            return False
+        intact = self.get_intact_artifacts(study.study_id, study_dir)
+        return intact == set(entry['artifacts'])
+
+    def get_intact_downloads(self, study, study_dir, options=None):
+        """Return the set of recorded artifacts of the given Study whose
+        files are intact in study_dir, which need not be downloaded again:
+        preparations ('prep:<ID>'), BIOM files ('biom:<ID>') and artifacts
+        of kinds that are not downloaded with the given download options
+        (e.g. the sample metadata of a study mirrored before with the
+        'sample' option, when downloading with the 'prep' option).
+        """
+        kinds = get_download_kinds(options)
+        return {artifact for artifact
+                in self.get_intact_artifacts(study.study_id, study_dir)
+                if artifact.startswith(('prep:', 'biom:'))
+                or get_artifact_kind(artifact) not in kinds}
+
+    def get_files(self, study_id, artifacts):
+        """Return the recorded file names of the given artifacts of a
+        study.
+        """
+        with self._lock:
+            recorded = self.studies.get(study_id, {}).get('artifacts', {})
+            return [filename for artifact in artifacts
+                    for filename in recorded.get(artifact, {}).get('files',
+                                                                   {})]
+
+    def record_study(self, study, study_dir, options=None):
+        """Record the remote version of the given Study, the kinds of
+        artifacts downloaded with the given download options and the files of
+        its directory (grouped by artifact, See get_artifact), and save the
+        manifest.
+
+        Kinds recorded before are kept if all their recorded files are still
+        in the directory (See get_intact_downloads).
+        """
+        kinds = get_download_kinds(options)
+        version = get_study_version(study)
+        artifacts = {}
+        for entry in os.scandir(study_dir):
+            if not entry.is_file():
+                continue
+            artifact = get_artifact(entry.name)
+            # Preparations and BIOM files are identified by their ID, other
+            # artifacts by the version of the study
+            remote = artifact.split(':')[1] if ':' in artifact else version
+            record = artifacts.setdefault(artifact, {'remote': remote,
+                                                     'files': {}})
+            record['files'][entry.name] = get_file_record(entry.path)
+        with self._lock:
+            recorded = self.studies.get(study.study_id, {})
+            for kind in set(recorded.get('kinds', ())) - kinds:
+                files = self.get_files(study.study_id, [
+                        artifact for artifact in recorded['artifacts']
+                        if get_artifact_kind(artifact) == kind])
+                if all(os.path.exists(os.path.join(study_dir, filename))
+                       for filename in files):
+                    kinds.add(kind)
+            self.studies[study.study_id] = {'version': version,
+                                            'kinds': sorted(kinds),
+                                            'artifacts': artifacts}
+            self.save()
@@ -31,7 +31,7 @@ from creator.prep_parser import parse_preparations, parse_workflows
 from creator.count_parser import (get_dirs, get_prep_filenames, get_biom_filenames,
                                   get_proc_id_from_biom, get_counts)
 from creator.bib_parser import update_bib_from_xml
-from model import Count
+from creator.loader import add_count_facts
 from wip.new_sample_parser import (parse_file, convert_units,
                                        re_missing, convert_sex, convert_csection)
 from wip.subject_sample_ideas import parse_samples, parse_subjects, form_relationship
@@ -78,27 +78,7 @@ def best_parser(session, sample_file, prep_files, proc_file, biom_files):
     # Start database session
     start = time.time()
     with session_scope() as session_2:
-        for exp_id, experiment in experiments.items():
-            for subject in experiment.subjects:
-                for sample in subject.samples:
-                    for prep in sample.preparations:
-                        for workflow in prep.workflows:
-                            try:
-                                workflow.count_dict
-                            except AttributeError:
-                                continue
-                            for count in workflow.count_dict[sample.orig_sample_id]:
-                                fact = Count(experiment=experiment,
-                                             subject=subject,
-                                             sample=sample,
-                                             sample_site=sample.sampling_site,
-                                             sample_time=sample.sampling_time,
-                                             preparation=prep,
-                                             workflow=workflow,
-                                             lineage=count.lineage,
-                                             seq_variant=count.seq_var,
-                                             count=count.count)
-                                session_2.add(fact)
+        add_count_facts(session_2, experiments.values())
     end = time.time()
     print("Main loop took: ", end-start)
 
@@ -164,23 +144,7 @@ def parser(session):
     # Start database session
     start = time.time()
     with session_scope() as session_2:
-        for exp_id, experiment in experiments.items():
-            for subject in experiment.subjects:
-                for sample in subject.samples:
-                    for prep in sample.preparations:
-                        for workflow in prep.workflows:
-                            for count in workflow.count_dict[sample.orig_sample_id]:
-                                fact = Count(experiment=experiment,
-                                             subject=subject,
-                                             sample=sample,
-                                             sample_site=sample.sampling_site,
-                                             sample_time=sample.sampling_time,
-                                             preparation=prep,
-                                             workflow=workflow,
-                                             lineage=count.lineage,
-                                             seq_variant=count.seq_var,
-                                             count=count.count)
-                                session_2.add(fact)
+        add_count_facts(session_2, experiments.values())
     end = time.time()
     print("Main loop took: ", end-start)
 
@@ -110,7 +110,7 @@ class Article(Base):
     issue = Column(Text)
     pages = Column(Text)
     doi = Column(Text)
-    pmid = Column(Text)
+    pmid = Column(Text, unique=True)
 
     authors = relationship('Author',
                            secondary=article_authors,
@@ -128,8 +128,10 @@ class Article(Base):
 
 class Author(Base):
     __tablename__ = 'authors'
-    __tableargs__ = (UniqueConstraint('first_initial', 'first_name',
-                                      'middle_initials', 'last_name'),)
+    # Note: last_name comes first so that the index serves lookups by last
+    # name (See creator.bib_parser.query_author_ids)
+    __table_args__ = (UniqueConstraint('last_name', 'first_initial',
+                                       'first_name', 'middle_initials'),)
 
     id = Column(Integer, primary_key=True)
     first_initial = Column(Text)
@@ -150,7 +152,7 @@ class CollectiveAuthor(Base):
     __tablename__ = 'collective_authors'
 
     id = Column(Integer, primary_key=True)
-    name = Column(Text)
+    name = Column(Text, unique=True)
 
     articles = relationship('Article',
                             secondary=article_collective_authors,
@@ -1176,6 +1178,42 @@ class SequencingVariant(Base):
                           back_populates='seq_variant')
 
 
+# A Taxon is a node in the taxonomy, uniquely identified by its rank, name and
+# parent i.e. the same genus name found under different families corresponds
+# to different taxa.
+class Taxon(Base):
+    __tablename__ = 'taxa'
+    __table_args__ = (
+        UniqueConstraint('parent_id', 'rank', 'name'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    parent_id = Column(Integer, ForeignKey('taxa.id'))
+    rank = Column(Enum('kingdom', 'phylum', 'class', 'order', 'family',
+                       'genus', 'species', name='taxon_rank'),
+                  nullable=False)
+    name = Column(Text, nullable=False)
+    # Materialized path of the taxon (See Lineage.path)
+    path = Column(Text(collation='C'), unique=True)
+
+    parent = relationship('Taxon', remote_side=[id])
+
+    @property
+    def equality_attrs(self):
+        return (self.rank, self.name, self.parent)
+
+    def __eq__(self, other):
+        return (self.__class__ == other.__class__ and
+                self.equality_attrs == other.equality_attrs)
+
+    def __hash__(self):
+        return hash(self.equality_attrs)
+
+    def __repr__(self):
+        return get_repr('Taxon', {'id': self.id, 'rank': self.rank,
+                                  'name': self.name})
+
+
 class Lineage(Base):
     __tablename__ = 'lineages'
 
@@ -1187,15 +1225,91 @@ class Lineage(Base):
     family_ = Column('family', Text)
     genus_ = Column('genus', Text)
     species_ = Column('species', Text)
+    # Taxa names above are normalized at ingest (See creator.taxonomy), while
+    # the lineage as found in the source file is kept in raw_lineage.
+    # depth is the number of taxonomic levels down to the lowest non-empty
+    # rank (e.g. 5 for a lineage resolved to family level).
+    depth = Column(SmallInteger, CheckConstraint('0 <= depth AND depth <= 7'))
+    raw_lineage = Column(Text)
+    # Materialized path of the lineage i.e. the non-empty taxa names joined
+    # (and terminated) by ';' e.g. 'k__Bacteria;p__Firmicutes;'. All lineages
+    # below a taxon have a path starting with the path of that taxon, so
+    # subtrees can be selected with an index range scan. The 'C' collation
+    # ensures that the btree index orders paths bytewise.
+    path = Column(Text(collation='C'), index=True)
+    # Taxon identifiers for each rank, so that counts can be aggregated at any
+    # rank by grouping on a single integer column. Empty ranks are NULL.
+    kingdom_id = Column(Integer, ForeignKey('taxa.id'))
+    phylum_id = Column(Integer, ForeignKey('taxa.id'))
+    class_id = Column(Integer, ForeignKey('taxa.id'))
+    order_id = Column(Integer, ForeignKey('taxa.id'))
+    family_id = Column(Integer, ForeignKey('taxa.id'))
+    genus_id = Column(Integer, ForeignKey('taxa.id'))
+    species_id = Column(Integer, ForeignKey('taxa.id'))
 
     counts = relationship('Count',
                           back_populates='lineage')
+    kingdom_taxon = relationship('Taxon', foreign_keys=[kingdom_id])
+    phylum_taxon = relationship('Taxon', foreign_keys=[phylum_id])
+    class_taxon = relationship('Taxon', foreign_keys=[class_id])
+    order_taxon = relationship('Taxon', foreign_keys=[order_id])
+    family_taxon = relationship('Taxon', foreign_keys=[family_id])
+    genus_taxon = relationship('Taxon', foreign_keys=[genus_id])
+    species_taxon = relationship('Taxon', foreign_keys=[species_id])
+
+
+# Calendar dimension: one row per day of the covered date range, keyed by
+# the integer date key yyyymmdd (e.g. 20071103). Rows are precomputed in bulk
+# (See creator.calendar_dates.populate_calendar) so that Times only need to
+# store the date key, and date ranges can be selected with integer index
+# range scans.
+class CalendarDate(Base):
+    __tablename__ = 'calendar_dates'
+
+    date_key = Column(Integer, primary_key=True, autoincrement=False)
+    date = Column(Date, nullable=False, unique=True)
+    year = Column(SmallInteger, nullable=False)
+    month = Column(SmallInteger, CheckConstraint('1 <= month AND month <= 12'),
+                   nullable=False)
+    day = Column(SmallInteger, CheckConstraint('1 <= day AND day <= 31'),
+                 nullable=False)
+    # ISO day of the week (Monday is 1, Sunday is 7)
+    day_of_week = Column(SmallInteger, CheckConstraint(
+            '1 <= day_of_week AND day_of_week <= 7'), nullable=False)
+    day_of_year = Column(SmallInteger, CheckConstraint(
+            '1 <= day_of_year AND day_of_year <= 366'), nullable=False)
+    season = Column(Enum('winter', 'spring', 'summer', 'autumn',
+                         name='season'), nullable=False)
+
+    times = relationship('Time',
+                         back_populates='calendar_date')
+
+    @property
+    def equality_attrs(self):
+        return (self.date_key,)
+
+    def __eq__(self, other):
+        return (self.__class__ == other.__class__ and
+                self.equality_attrs == other.equality_attrs)
+
+    def __hash__(self):
+        return hash(self.equality_attrs)
+
+    def __repr__(self):
+        return get_repr('CalendarDate', {'date_key': self.date_key,
+                                         'date': self.date})
 
 
 class Time(Base):
     __tablename__ = 'times'
 
     id = Column(Integer, primary_key=True)
+    # Integer keys of the date (yyyymmdd, See CalendarDate) and time of day
+    # (hhmmss) components, or None if the component is missing.
+    date_key = Column(Integer, ForeignKey('calendar_dates.date_key'),
+                      index=True)
+    time_key = Column(Integer, CheckConstraint(
+            '0 <= time_key AND time_key <= 235959'), index=True)
     timestamp = Column(DateTime, nullable=False)
     uncertainty = Column(Integer)
     date = Column(Date)
@@ -1211,6 +1325,8 @@ class Time(Base):
 
     counts = relationship('Count',
                           back_populates='sample_time')
+    calendar_date = relationship('CalendarDate',
+                                 back_populates='times')
 
     # TODO: Maybe replace with an OrderedDict if we are bothered about the
     # order in which the attributes are listed in the repr string.
@@ -1222,9 +1338,13 @@ class Time(Base):
                 'hour': self.hour, 'minute': self.minute,
                 'second': self.second, 'season': self.season}
 
+    # Note: Same values as _equality_dict, without building a dict on every
+    # hash and comparison.
     @property
     def equality_attrs(self):
-        return tuple(self._equality_dict.values())
+        return (self.timestamp, self.date, self.time, self.uncertainty,
+                self.year, self.month, self.day, self.hour, self.minute,
+                self.second, self.season)
 
     def __eq__(self, other):
         return (self.__class__ == other.__class__ and
@@ -1245,10 +1365,10 @@ class Time(Base):
         ----------
         timestamp : datetime.Datetime, required
             If the given timestamp has a year of 1, then all date components
-            (date, year, month, day, season) of the Time object are initialized
-            to None. If the given timestamp has a time 00:00:00, then all time
-            components (time, hour, minute, second) of the Time object are
-            initialized to None.
+            (date, year, month, day, season, date_key) of the Time object are
+            initialized to None. If the given timestamp has a time 00:00:00,
+            then all time components (time, hour, minute, second, time_key)
+            of the Time object are initialized to None.
 
         Raises
         ------
@@ -1267,12 +1387,18 @@ class Time(Base):
                 time.month = timestamp.month
                 time.day = timestamp.day
                 time.season = Time.get_season(time.date)
-            if (timestamp.hour, timestamp.minute, timestamp.second == 0, 0, 0):
+                # See creator.dates.get_date_key
+                time.date_key = (timestamp.year*10000 + timestamp.month*100
+                                 + timestamp.day)
+            if (timestamp.hour, timestamp.minute, timestamp.second) == (0, 0, 0):
                 time.time = None
             else:
                 time.hour = timestamp.hour
                 time.minute = timestamp.minute
                 time.second = timestamp.second
+                # See creator.dates.get_time_key
+                time.time_key = (timestamp.hour*10000 + timestamp.minute*100
+                                 + timestamp.second)
         except AttributeError:
             raise AttributeError(f'The given timestamp {timestamp!r} does not '
                                  'have attributes required for parsing into '
@@ -1287,7 +1413,8 @@ class Time(Base):
         Parameters
         ----------
         timestamp : object
-            An object that has a string representation (str) that can be parsed
+            A datetime.date (or datetime.datetime) object, used as is, or an
+            object that has a string representation (str) that can be parsed
             by dateutil.parser.parse into a datetime.datetime object.
         default_datetime : datetime.datetime
             A datetime object used to fill in missing date/time elements during
@@ -1297,7 +1424,9 @@ class Time(Base):
             datetime.datetime(2000,11,22,0,0,0).
         """
         try:
-            timestamp = parser.parse(str(timestamp), default=default_datetime)
+            if not isinstance(timestamp, date):
+                timestamp = parser.parse(str(timestamp),
+                                         default=default_datetime)
         except TypeError:
             raise TypeError(f'The given timestamp {timestamp!r} could not be '
                             f'converted to {str!r} object.')
@@ -1311,7 +1440,7 @@ class Time(Base):
                    ('summer', date(Y, 6, 21), date(Y, 9, 22)),
                    ('autumn', date(Y, 9, 23), date(Y, 12, 20)),
                    ('winter', date(Y, 12, 21), date(Y, 12, 31))]
-        timestamp_date = timestamp.date().replace(year=Y)
+        timestamp_date = date(Y, timestamp.month, timestamp.day)
         return next(season for (season, start, end) in seasons
                     if start <= timestamp_date <= end)
 
@@ -1454,6 +1583,10 @@ class Processing(Base):
     id = Column(Integer, primary_key=True)
     parent_proc_id = Column(Integer, ForeignKey('processings.id'))
     parameter_values = Column(JSONB, nullable=False)
+    # Hash of the canonical parameter values and of the parent's hash (See
+    # creator.prep_parser.get_processing_hash), shared by identical
+    # processing chains
+    content_hash = Column(Text, unique=True)
 
     workflows = relationship('Workflow',
                              secondary=workflow_processings,
@@ -1466,12 +1599,13 @@ class Processing(Base):
                 self.orig_prep_id, self.parent)
 
     def __init__(self, id=None, parent_proc_id=None, parameter_values=None,
-                 workflows=[], parent=None,
+                 content_hash=None, workflows=[], parent=None,
                  orig_study_id=None, orig_prep_id=None, orig_proc_id=None,
                  **kwds):
         self.id = id
         self.parent_proc_id = parent_proc_id
         self.parameter_values = parameter_values
+        self.content_hash = content_hash
         self.workflows = workflows
         self.parent = parent
         # Non-Column attributes
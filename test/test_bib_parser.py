@@ -9,8 +9,17 @@ import pytest
 import io
 import uuid
 import xml.etree.ElementTree as ET
+from collections import Counter, defaultdict, namedtuple
+
+from sqlalchemy import PrimaryKeyConstraint, UniqueConstraint
 
 import wip.new_bib_parser as bib
+from creator.bib_parser import (generate_records, generate_batches,
+                                get_author_key, parse_article,
+                                merge_articles, parse_bib_files,
+                                load_articles)
+from creator.staging import (ArticleRecord, AuthorRecord,
+                             CollectiveAuthorRecord)
 
 
 class TestAuthor:
@@ -335,3 +344,173 @@ class Test_Generate_Children:
         invalid_xml_file = io.StringIO('')
         with pytest.raises(ValueError):
             next(bib.generate_children(invalid_xml_file))
+
+    @pytest.mark.parametrize('parent', [None, 'records', 'gibberish'])
+    def test_generate_children_streaming(self, valid_xml_file, parent):
+        xml_str = valid_xml_file.getvalue()
+        children = [(child.tag, child.text) for child in
+                    bib.generate_children(io.StringIO(xml_str), parent)]
+        streamed_children = [(child.tag, child.text) for child in
+                             bib.generate_children(io.StringIO(xml_str),
+                                                   parent, streaming=True)]
+        assert streamed_children == children
+
+    def test_generate_children_streaming_keeps_yielded_children(
+            self, valid_xml_file):
+        children = bib.generate_children(valid_xml_file, parent='records',
+                                         streaming=True)
+        first_child = next(children)
+        second_child = next(children)
+        # Processed children are detached from the tree, not emptied
+        assert first_child.text == '1'
+        assert second_child.text == '2'
+
+    def test_generate_children_streaming_invalid_file(self):
+        invalid_xml_file = io.StringIO('<root><records>')
+        with pytest.raises(ValueError):
+            list(bib.generate_children(invalid_xml_file, streaming=True))
+
+
+def test_generate_records_streaming():
+    xml_file = './data/test_data/bibliographic/pubmed/pubmed_result.xml'
+    records = [ET.tostring(record) for record in generate_records(xml_file)]
+    streamed_records = [ET.tostring(record) for record
+                        in generate_records(xml_file, streaming=True)]
+    assert records
+    assert streamed_records == records
+
+
+def test_generate_batches():
+    assert list(generate_batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(generate_batches([], 2)) == []
+
+
+def test_author_keys_of_shared_authors():
+    xml_file = './data/test_data/bibliographic/pubmed/pubmed_result.xml'
+    articles = [parse_article(record) for record in generate_records(xml_file)]
+    authors = [author for article in articles for author in article.authors]
+    keys = {get_author_key(author) for author in authors}
+    # Authors of several articles are stored once
+    assert len(keys) < len(authors)
+    for key in keys:
+        first_initial, first_name, middle_initials, last_name = key
+        assert last_name
+        assert isinstance(middle_initials, tuple)
+
+
+def test_merge_articles():
+    article1 = ArticleRecord(pmid='1', doi='10.1/A')
+    article2 = ArticleRecord(pmid='2', doi='10.1/B')
+    # Same PMID as article1, then same DOI as article2
+    article3 = ArticleRecord(pmid='1', doi='10.1/C')
+    article4 = ArticleRecord(pmid='4', doi='10.1/b')
+    merged = merge_articles([[article1, article2], [article3, article4]])
+    assert merged == [article1, article2]
+
+
+def test_parse_bib_files_in_processes():
+    xml_file = './data/test_data/bibliographic/pubmed/pubmed_result.xml'
+    articles = parse_bib_files([xml_file, xml_file], processes=1)
+    parallel_articles = parse_bib_files([xml_file, xml_file], processes=2)
+    assert len(articles) == len(list(generate_records(xml_file)))
+    assert ([repr(article) for article in parallel_articles] ==
+            [repr(article) for article in articles])
+
+
+class StubSession:
+    """Stand-in for a session storing the rows of each table in memory.
+
+    Runs the queries of load_articles (columns filtered by an IN clause) and
+    its INSERT ... ON CONFLICT DO NOTHING statements, generating the ids of
+    new rows.
+    """
+
+    def __init__(self):
+        self.tables = defaultdict(list)
+
+    def get_unique_keys(self, table):
+        keys = [[column.name for column in constraint.columns]
+                for constraint in table.constraints
+                if isinstance(constraint, (PrimaryKeyConstraint,
+                                           UniqueConstraint))]
+        keys.extend([column.name] for column in table.columns
+                    if column.unique)
+        return [key for key in keys if key != ['id']]
+
+    def execute(self, statement):
+        table = statement.table
+        rows = self.tables[table.name]
+        unique_keys = self.get_unique_keys(table)
+        for values in statement.parameters:
+            row = {column.name: values.get(column.name)
+                   for column in table.columns}
+            if any(all(row[name] == stored[name] for name in key)
+                   for key in unique_keys for stored in rows):
+                continue  # Conflict
+            if 'id' in row:
+                row['id'] = len(rows) + 1
+            rows.append(row)
+
+    def query(self, *columns):
+        return StubQuery(self, columns)
+
+
+class StubQuery:
+
+    def __init__(self, session, columns):
+        self.session = session
+        self.columns = columns
+        self.criterion = None
+
+    def filter(self, criterion):
+        self.criterion = criterion
+        return self
+
+    def __iter__(self):
+        Row = namedtuple('Row', [column.key for column in self.columns])
+        table = self.columns[0].table
+        column = self.criterion.left.key
+        values = [clause.value
+                  for clause in self.criterion.right.element.clauses]
+        for row in self.session.tables[table.name]:
+            if row[column] in values:
+                yield Row(*(row[column.key] for column in self.columns))
+
+
+def test_load_articles():
+    session = StubSession()
+    alice = AuthorRecord(first_initial='A', first_name='Alice',
+                         middle_initials=['B'], last_name='Smith')
+    # Same last name as Alice
+    adam = AuthorRecord(first_initial='A', first_name='Adam',
+                        middle_initials=None, last_name='Smith')
+    bob = AuthorRecord(first_initial='B', first_name='Bob',
+                       middle_initials=None, last_name='Jones')
+    consortium = CollectiveAuthorRecord(name='Consortium')
+    counts = load_articles([ArticleRecord(pmid='1', authors=[alice],
+                                          collective_authors=[])], session)
+    assert counts == Counter(articles=1, authors=1)
+    # Alice is found, Adam and Bob are created once (though Bob is an author
+    # of both articles)
+    articles = [
+        ArticleRecord(pmid='2', authors=[alice, adam, bob],
+                      collective_authors=[consortium]),
+        ArticleRecord(pmid='3', authors=[bob], collective_authors=[]),
+        # Already stored
+        ArticleRecord(pmid='1', authors=[bob], collective_authors=[])]
+    counts = load_articles(articles, session, batch_size=2)
+    assert counts == Counter(articles=2, authors=2, collective_authors=1)
+    author_ids = {row['first_name']: row['id']
+                  for row in session.tables['authors']}
+    assert author_ids == {'Alice': 1, 'Adam': 2, 'Bob': 3}
+    article_ids = {row['pmid']: row['id']
+                   for row in session.tables['articles']}
+    assert article_ids == {'1': 1, '2': 2, '3': 3}
+    assert ({(row['article_id'], row['author_id'])
+             for row in session.tables['article_authors']} ==
+            {(1, 1), (2, 1), (2, 2), (2, 3), (3, 3)})
+    assert session.tables['article_collective_authors'] == [
+            {'article_id': 2, 'collective_author_id': 1}]
+    # Loading the same articles again inserts nothing
+    assert load_articles(articles, session) == Counter()
+    assert len(session.tables['article_authors']) == 5
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:41:09 2026
+
+@author: William
+"""
+
+# Standard library imports
+import datetime
+import unittest
+
+# Third-party imports
+
+# Local application imports
+from model import Time
+from creator.dates import get_date_key, get_time_components
+from creator.calendar_dates import (to_date_key, get_calendar_dates,
+                                    get_date_range, TimeRegistry)
+from creator.sample_parser import parse_objects
+
+
+class DateKeyTest(unittest.TestCase):
+
+    def test_from_datetime(self):
+        time = Time.from_datetime(datetime.datetime(2007, 3, 1, 7, 30, 5))
+        self.assertEqual(time.date_key, 20070301)
+        self.assertEqual(time.time_key, 73005)
+        time = Time.from_datetime(datetime.datetime(2007, 3, 1))
+        self.assertEqual(time.date_key, 20070301)
+        self.assertIsNone(time.time_key)
+        time = Time.from_datetime(datetime.datetime(1, 1, 1, 8, 0))
+        self.assertIsNone(time.date_key)
+        self.assertEqual(time.time_key, 80000)
+
+    def test_time_components(self):
+        dates = [datetime.date(2007, 3, 1), None, datetime.date(2010, 12, 25)]
+        times = [None, datetime.time(8, 0), datetime.time(7, 30, 5)]
+        components = get_time_components(dates, times)
+        self.assertEqual(components['date_key'].tolist(),
+                         [20070301, None, 20101225])
+        self.assertEqual(components['time_key'].tolist(),
+                         [None, 80000, 73005])
+
+    def test_to_date_key(self):
+        self.assertEqual(to_date_key(datetime.date(2010, 12, 25)), 20101225)
+        self.assertEqual(to_date_key(20101225), 20101225)
+        self.assertEqual(get_date_key(2010, 1, 2), 20100102)
+
+
+class CalendarTest(unittest.TestCase):
+
+    def test_calendar_dates(self):
+        calendar = get_calendar_dates(datetime.date(2007, 12, 30),
+                                      datetime.date(2008, 3, 1))
+        self.assertEqual(len(calendar), 63)
+        first = calendar.astype(object).to_dict('records')[0]
+        self.assertEqual(first, {'date_key': 20071230,
+                                 'date': datetime.date(2007, 12, 30),
+                                 'year': 2007, 'month': 12, 'day': 30,
+                                 'day_of_week': 7, 'day_of_year': 364,
+                                 'season': 'winter'})
+        self.assertIs(type(first['date_key']), int)
+        # Leap day
+        self.assertIn(20080229, calendar['date_key'].tolist())
+        self.assertTrue(calendar['date_key'].is_monotonic_increasing)
+
+    def test_date_range(self):
+        times = [Time.from_datetime(datetime.datetime(2010, 12, 25)), None,
+                 Time.from_datetime(datetime.datetime(1, 1, 1, 8, 0)),
+                 Time.from_datetime(datetime.datetime(2007, 3, 1))]
+        self.assertEqual(get_date_range(times), (datetime.date(2007, 3, 1),
+                                                 datetime.date(2010, 12, 25)))
+        self.assertEqual(get_date_range([None]), (None, None))
+
+
+class TimeRegistryTest(unittest.TestCase):
+
+    def test_get_time(self):
+        registry = TimeRegistry()
+        time = Time.from_datetime(datetime.datetime(2007, 3, 1, 7, 30))
+        same = Time.from_datetime(datetime.datetime(2007, 3, 1, 7, 30))
+        other = Time.from_datetime(datetime.datetime(2007, 3, 1))
+        self.assertIs(registry.get_time(time), time)
+        self.assertIs(registry.get_time(same), time)
+        self.assertIs(registry.get_time(other), other)
+        self.assertIsNone(registry.get_time(None))
+        self.assertEqual(len(registry), 2)
+
+    def test_shared_sampling_times(self):
+        file = './data/test_data/samp_metadata/sample1.txt'
+        for columnar in [False, True]:
+            samples = parse_objects(file, returning='samples',
+                                    columnar=columnar)
+            times = [sample.sampling_time for sample in samples.values()
+                     if sample.sampling_time is not None]
+            self.assertEqual(len({id(time) for time in times}),
+                             len(set(times)))
+
+
+if __name__ == '__main__':
+    unittest.main()
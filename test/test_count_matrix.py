@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:40:19 2026
+
+@author: William
+"""
+
+# Standard library imports
+import os
+import tempfile
+import unittest
+
+# Third-party imports
+import biom
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Local application imports
+from creator.count_matrix import (counts_to_csr, write_npz, read_npz,
+                                  write_biom)
+
+
+class CountMatrixTest(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+                'sample_id': [1, 1, 1, 2, 2, 3],
+                'family': ['f__K', 'f__L', 'f__L', 'f__M', None, 'f__M'],
+                'genus': ['g__O', 'g__P', 'g__P', 'g__P', None, 'g__Q'],
+                'count': [1, 2, 3, 4, 5, 6]})
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_counts_to_csr(self):
+        matrix, rows, cols = counts_to_csr(self.df, col_cols='genus')
+        self.assertTrue(sparse.isspmatrix_csr(matrix))
+        self.assertEqual(rows.tolist(), [1, 2, 3])
+        self.assertEqual(cols.tolist(), ['g__O', 'g__P', 'unassigned', 'g__Q'])
+        self.assertEqual(matrix.toarray().tolist(),
+                         [[1, 5, 0, 0], [0, 4, 5, 0], [0, 0, 0, 6]])
+
+    def test_counts_to_csr_lineage_labels(self):
+        matrix, rows, cols = counts_to_csr(self.df,
+                                           col_cols=['family', 'genus'])
+        self.assertEqual(cols.tolist(), ['f__K;g__O', 'f__L;g__P',
+                                         'f__M;g__P', 'unassigned',
+                                         'f__M;g__Q'])
+        self.assertEqual(matrix.nnz, 5)
+        self.assertEqual(matrix.sum(), self.df['count'].sum())
+
+    def test_npz_round_trip(self):
+        matrix, rows, cols = counts_to_csr(self.df)
+        file = os.path.join(self.temp_dir.name, 'counts.npz')
+        write_npz(file, matrix, rows, cols)
+        new_matrix, new_rows, new_cols = read_npz(file)
+        self.assertEqual((new_matrix != matrix).nnz, 0)
+        self.assertEqual(new_rows.tolist(), ['1', '2', '3'])
+        self.assertEqual(new_cols.tolist(), cols.tolist())
+        self.assertEqual((sparse.load_npz(file) != matrix).nnz, 0)
+
+    def test_biom_round_trip(self):
+        matrix, rows, cols = counts_to_csr(self.df)
+        file = os.path.join(self.temp_dir.name, 'counts.biom')
+        write_biom(file, matrix, rows, cols)
+        table = biom.load_table(file)
+        self.assertEqual(list(table.ids(axis='sample')), ['1', '2', '3'])
+        self.assertEqual(table.get_value_by_ids('g__P', '1'), 5)
+        self.assertTrue(np.array_equal(table.matrix_data.T.toarray(),
+                                       matrix.toarray()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:05:52 2026
+
+@author: William
+"""
+
+# Standard library imports
+import datetime
+import unittest
+
+# Third-party imports
+import pandas as pd
+
+# Local application imports
+from model import Time
+from creator.dates import (is_day_first, infer_date_format, to_datetimes,
+                           parse_date_times, get_time_components)
+from creator.sample_parser import parse_collection_timestamp
+
+
+class InferDateFormatTest(unittest.TestCase):
+
+    def test_is_day_first(self):
+        self.assertTrue(is_day_first('13/1/07 0:00'))
+        self.assertFalse(is_day_first('1/13/07 0:00'))
+        self.assertFalse(is_day_first('1/1/07'))
+        self.assertTrue(is_day_first(None, default=True))
+
+    def test_month_first(self):
+        values = pd.Series(['3/1/07 0:00', '11/12/06 7:30'])
+        date_format = infer_date_format(values)
+        self.assertEqual(date_format.format, '%m/%d/%y %H:%M')
+        self.assertFalse(date_format.dayfirst)
+
+    def test_day_first(self):
+        values = pd.Series(['3/1/2007', '13/1/2007'])
+        date_format = infer_date_format(values)
+        self.assertEqual(date_format.format, '%d/%m/%Y')
+        self.assertTrue(date_format.dayfirst)
+
+    def test_am_pm(self):
+        values = pd.Series(['11:30 am', '1:05 PM'])
+        self.assertEqual(infer_date_format(values).format, '%I:%M %p')
+
+    def test_interval(self):
+        values = pd.Series(['3/1/2007-3/5/2007', '4/1/2007-4/5/2007'])
+        date_format = infer_date_format(values)
+        self.assertTrue(date_format.interval)
+        self.assertEqual(to_datetimes(values, date_format).tolist(),
+                         [pd.Timestamp(2007, 3, 1), pd.Timestamp(2007, 4, 1)])
+
+    def test_reduced_iso_dates_not_matched(self):
+        values = pd.Series(['2013-01-08', '2009'])
+        date_format = infer_date_format(values)
+        self.assertEqual(date_format.format, '%Y-%m-%d')
+        self.assertTrue(to_datetimes(values, date_format).isna().tolist()[1])
+
+
+class ParseDateTimesTest(unittest.TestCase):
+
+    def test_same_as_row_parser(self):
+        values = pd.Series(['3/1/07 0:00', '11/11/10 7:30', '1/1/1970 0:00',
+                            '11_30am', '2009', '3/1/07 0:00'])
+        date_format = infer_date_format(values)
+        dates, times = parse_date_times(values, date_format,
+                                        fallback=parse_collection_timestamp)
+        expected = [parse_collection_timestamp(value) for value in values]
+        self.assertEqual(list(zip(dates, times)), expected)
+
+    def test_time_components(self):
+        dates = [datetime.date(2007, 3, 1), None, datetime.date(2010, 12, 25)]
+        times = [None, datetime.time(8, 0), datetime.time(7, 30, 5)]
+        components = get_time_components(dates, times)
+        for attrs, date, time in zip(components.to_dict('records'), dates,
+                                     times):
+            timestamp = datetime.datetime.combine(
+                    date or datetime.date(1, 1, 1),
+                    time or datetime.time(0, 0))
+            self.assertEqual(Time(**attrs), Time.from_datetime(timestamp))
+        self.assertEqual(components['season'].tolist(),
+                         ['winter', None, 'winter'])
+        self.assertEqual(components['hour'].tolist(), [None, 8, 7])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 01:02:14 2026
+
+@author: William
+"""
+
+# Standard library imports
+import os
+import os.path
+import shutil
+import tempfile
+import threading
+import unittest
+import urllib.request
+from collections import Counter
+from contextlib import contextmanager
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+# Third-party imports
+
+# Local application imports
+from downloader.download_pool import shard, commit_study_dir, download_studies
+
+
+class Study:
+
+    def __init__(self, study_id, study_link):
+        self.study_id = study_id
+        self.study_link = study_link
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def url_session(dl_dir, sessions):
+    """Stand-in for a browser session: an URL opener."""
+    sessions.append(dl_dir)
+    yield urllib.request.build_opener()
+
+
+def download_study(opener, study, dl_dir, attempts, skip_artifacts=()):
+    attempts[study.study_id] += 1
+    # Study 2 fails on its first attempt
+    if study.study_id == '2' and attempts['2'] == 1:
+        open(os.path.join(dl_dir, 'partial.part'), 'w').close()
+        raise TimeoutError('Download timed out.')
+    for filename in ['sample.txt', 'prep_data.json']:
+        url = f'{study.study_link}/{filename}'
+        with opener.open(url) as response, \
+                open(os.path.join(dl_dir, filename), 'wb') as file:
+            file.write(response.read())
+
+
+class DownloadPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        # Local stand-in web server serving the files of studies 1 to 4
+        self.site_dir = tempfile.mkdtemp()
+        for study_id in ['1', '2', '3', '4']:
+            study_dir = os.path.join(self.site_dir, study_id)
+            os.mkdir(study_dir)
+            for filename in ['sample.txt', 'prep_data.json']:
+                with open(os.path.join(study_dir, filename), 'w') as file:
+                    file.write(f'{study_id} {filename}')
+        handler = partial(QuietHandler, directory=self.site_dir)
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+        host, port = self.server.server_address
+        self.url = f'http://{host}:{port}'
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.site_dir)
+        shutil.rmtree(self.output_dir)
+
+    def test_shard(self):
+        self.assertEqual(shard([1, 2, 3, 4, 5], 2), [[1, 3, 5], [2, 4]])
+        self.assertEqual(shard([1], 3), [[1]])
+
+    def test_commit_study_dir(self):
+        dl_dir = tempfile.mkdtemp()
+        open(os.path.join(dl_dir, 'sample.txt'), 'w').close()
+        study_dir = commit_study_dir(dl_dir, self.output_dir, '1')
+        self.assertEqual(os.listdir(study_dir), ['sample.txt'])
+        self.assertEqual(os.listdir(dl_dir), [])
+        with self.assertRaises(FileExistsError):
+            commit_study_dir(dl_dir, self.output_dir, '1')
+        os.rmdir(dl_dir)
+
+    def test_download_studies(self):
+        studies = [Study(study_id, f'{self.url}/{study_id}')
+                   for study_id in ['1', '2', '3', '4', '5']]
+        sessions = []
+        attempts = Counter()
+        failed = download_studies(
+                studies, partial(url_session, sessions=sessions),
+                partial(download_study, attempts=attempts), self.output_dir,
+                sessions=2, max_attempts=2)
+        # Study 5 is not served, study 2 succeeds on its second attempt
+        self.assertEqual(failed, ['5'])
+        self.assertEqual(attempts, Counter({'1': 1, '2': 2, '3': 1, '4': 1,
+                                            '5': 2}))
+        self.assertEqual(len(set(sessions)), 2)
+        # Only complete study directories are written
+        self.assertEqual(sorted(os.listdir(self.output_dir)),
+                         ['1', '2', '3', '4'])
+        for study_id in ['1', '2', '3', '4']:
+            study_dir = os.path.join(self.output_dir, study_id)
+            self.assertEqual(sorted(os.listdir(study_dir)),
+                             ['prep_data.json', 'sample.txt'])
+            with open(os.path.join(study_dir, 'sample.txt')) as file:
+                self.assertEqual(file.read(), f'{study_id} sample.txt')
+        # Download directories of sessions are removed
+        self.assertFalse(any(os.path.exists(dl_dir) for dl_dir in sessions))
+        # Downloaded studies are skipped when resuming
+        attempts.clear()
+        failed = download_studies(
+                studies, partial(url_session, sessions=sessions),
+                partial(download_study, attempts=attempts), self.output_dir,
+                sessions=2)
+        self.assertEqual(failed, ['5'])
+        self.assertEqual(attempts, Counter({'5': 2}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:48:05 2026
+
+@author: William
+"""
+
+# Standard library imports
+import os
+import os.path
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+# Third-party imports
+
+# Local application imports
+from downloader.download_tracker import DownloadTracker, get_completed_files
+
+
+def download(path, delay=0.0, content='data'):
+    """Write a file as Firefox does: an empty placeholder and a .part file,
+    renamed once complete.
+    """
+    time.sleep(delay)
+    open(path, 'w').close()
+    with open(path + '.part', 'w') as file:
+        file.write(content)
+    time.sleep(0.05)
+    os.replace(path + '.part', path)
+
+
+class DownloadTrackerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dl_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dl_dir)
+
+    def path(self, filename):
+        return os.path.join(self.dl_dir, filename)
+
+    def test_completed_files(self):
+        open(self.path('empty.txt'), 'w').close()
+        for filename in ['done.txt', 'loading.biom', 'loading.biom.part']:
+            with open(self.path(filename), 'w') as file:
+                file.write('data')
+        # Placeholder of a download
+        open(self.path('starting.biom'), 'w').close()
+        open(self.path('starting.biom.part'), 'w').close()
+        completed = get_completed_files(self.dl_dir)
+        self.assertEqual(list(completed.values()), [self.path('done.txt')])
+        # Empty files with no temporary file are complete once unmodified for
+        # empty_delay seconds
+        completed = get_completed_files(self.dl_dir, empty_delay=0)
+        self.assertEqual(sorted(completed.values()),
+                         [self.path('done.txt'), self.path('empty.txt')])
+
+    def test_expect(self):
+        for use_inotify in [True, False]:
+            with self.subTest(use_inotify=use_inotify), \
+                    DownloadTracker(self.dl_dir, use_inotify=use_inotify) \
+                    as tracker:
+                biom = tracker.expect('*.biom')
+                other = tracker.expect()
+                threads = [threading.Thread(target=download,
+                                            args=(self.path(filename), delay))
+                           for filename, delay in [('sample.txt', 0.05),
+                                                   ('table.biom', 0.2)]]
+                for thread in threads:
+                    thread.start()
+                paths = tracker.wait([biom, other], timeout=5)
+                for thread in threads:
+                    thread.join()
+                self.assertEqual(paths, [self.path('table.biom'),
+                                         self.path('sample.txt')])
+            for filename in os.listdir(self.dl_dir):
+                os.remove(self.path(filename))
+
+    def test_expect_completed_download(self):
+        with open(self.path('before.txt'), 'w') as file:
+            file.write('data')
+        with DownloadTracker(self.dl_dir) as tracker:
+            download(self.path('sample.txt'))
+            tracker.scan()
+            # Files completed before the tracker started are ignored, files
+            # completed before being expected are claimed
+            future = tracker.expect()
+            self.assertEqual(future.result(timeout=1), self.path('sample.txt'))
+            with self.assertRaises(TimeoutError):
+                tracker.wait([tracker.expect()], timeout=0.2)
+            # A file downloaded again (replaced) is a new download
+            future = tracker.expect('before.txt')
+            download(self.path('before.txt'), content='new data')
+            self.assertEqual(tracker.wait([future], timeout=5),
+                             [self.path('before.txt')])
+
+    def test_expect_empty_download(self):
+        with DownloadTracker(self.dl_dir) as tracker:
+            future = tracker.expect('*.txt')
+            open(self.path('empty.txt'), 'w').close()
+            self.assertEqual(tracker.wait([future], timeout=5),
+                             [self.path('empty.txt')])
+
+    def test_close(self):
+        tracker = DownloadTracker(self.dl_dir)
+        future = tracker.expect()
+        tracker.close()
+        self.assertTrue(future.cancelled())
+
+
+if __name__ == '__main__':
+    unittest.main()
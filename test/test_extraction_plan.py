@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:31:48 2026
+
+@author: William
+"""
+
+# Standard library imports
+import os
+import tempfile
+import unittest
+
+# Third-party imports
+import pandas as pd
+
+# Local application imports
+from creator.dates import DateFormat, infer_date_format
+from creator.extraction_plan import PlanCache
+from creator.read_planner import read_header
+from creator.sample_parser import (parse_object_dicts, sample_getters,
+                                   sample_column_groups, source_suffixes)
+
+
+class ExtractionPlanTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.sample_file = './data/test_data/samp_metadata/sample1.txt'
+        self.header = read_header(self.sample_file)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_plan_columns(self):
+        plan = PlanCache().get_or_build(self.header, sample_getters,
+                                        sample_column_groups, source_suffixes)
+        self.assertEqual(plan.columns['study_id'], ['qiita_study_id'])
+        self.assertEqual(plan.columns['suffixes'], ['qiita_study_id'])
+        self.assertTrue(set(plan.usecols).issubset(self.header))
+        self.assertEqual(plan.usecols,
+                         [col for col in self.header if col in plan.usecols])
+
+    def test_plan_drives_extraction(self):
+        cache = PlanCache()
+        plan = cache.get_or_build(self.header, sample_getters,
+                                  sample_column_groups, source_suffixes)
+        self.assertEqual(plan.columns['age'], ['age'])
+        self.assertEqual(plan.columns['age_units'], ['age_unit'])
+        samples = parse_object_dicts(self.sample_file,
+                                     plan_cache=cache)['samples']
+        self.assertTrue(all(sample.elevation is not None
+                            for sample in samples.values()))
+        # Values are only extracted from the columns resolved by the plan
+        plan.columns['elevation'] = []
+        samples = parse_object_dicts(self.sample_file,
+                                     plan_cache=cache)['samples']
+        self.assertTrue(all(sample.elevation is None
+                            for sample in samples.values()))
+
+    def test_plan_cached_on_disk(self):
+        cache = PlanCache(self.temp_dir.name)
+        parse_object_dicts(self.sample_file, plan_cache=cache)
+        plan = cache.get_or_build(self.header, sample_getters,
+                                  sample_column_groups, source_suffixes)
+        self.assertTrue(plan.date_formats)
+        new_plan = PlanCache(self.temp_dir.name).get_or_build(
+                self.header, sample_getters, sample_column_groups,
+                source_suffixes)
+        self.assertEqual(new_plan.date_formats, plan.date_formats)
+        self.assertEqual(new_plan.usecols, plan.usecols)
+
+    def test_date_format_hint(self):
+        values = pd.Series(['2013-01-08', '2013-02-09'])
+        hint = DateFormat('%Y-%m-%d', False, False)
+        self.assertIs(infer_date_format(values, hint=hint), hint)
+        wrong_hint = DateFormat('%m/%d/%Y', False, False)
+        self.assertEqual(infer_date_format(values, hint=wrong_hint), hint)
+
+
+if __name__ == '__main__':
+    unittest.main()
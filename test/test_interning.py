@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:52:37 2026
+
+@author: William
+"""
+
+# Standard library imports
+import datetime
+import unittest
+
+# Third-party imports
+
+# Local application imports
+from model import Source, Experiment, Sample, Time, Processing
+from creator.interning import InternRegistry
+
+
+class InternRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = InternRegistry()
+
+    def get_source(self):
+        return Source(name='Qiita', type_='Database (Public)', url='url')
+
+    def test_intern(self):
+        source = self.get_source()
+        self.assertIs(self.registry.intern(source), source)
+        self.assertIs(self.registry.intern(self.get_source()), source)
+        self.assertIsNone(self.registry.intern(None))
+        self.assertEqual(self.registry.count(Source), 1)
+
+    def test_nested_keys(self):
+        sample = Sample(source=self.get_source(), orig_study_id='101',
+                        orig_subject_id='1', orig_sample_id='101.1')
+        same = Sample(source=self.get_source(), orig_study_id='101',
+                      orig_subject_id='1', orig_sample_id='101.1')
+        self.assertEqual(self.registry.get_key(sample),
+                         (('Qiita', 'Database (Public)', 'url'), '101', '1',
+                          '101.1'))
+        self.assertIsNone(self.registry.get(sample))
+        self.assertIs(self.registry.intern(sample), sample)
+        self.assertIs(self.registry.intern(same), sample)
+        self.assertIs(self.registry.get(same), sample)
+
+    def test_entity_types(self):
+        # Objects of different classes with equal keys are distinct
+        experiment = Experiment(orig_study_id='101')
+        processing = Processing(orig_study_id='101')
+        self.registry.intern(experiment)
+        self.assertIs(self.registry.intern(processing), processing)
+        self.assertEqual(len(self.registry), 2)
+
+    def test_same_as_equality(self):
+        times = [Time.from_datetime(datetime.datetime(2007, 3, 1, 7, 30)),
+                 Time.from_datetime(datetime.datetime(2007, 3, 1, 7, 30)),
+                 Time.from_datetime(datetime.datetime(2007, 3, 1))]
+        interned = [self.registry.intern(time) for time in times]
+        self.assertIs(interned[1], times[0])
+        self.assertEqual(self.registry.count(Time), len(set(times)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 14:31:08 2026
+
+@author: William
+"""
+
+# Standard library imports
+import unittest
+
+# Third-party imports
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql.dml import OnConflictDoNothing
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+# Local application imports
+from model import (Base, CalendarDate, Count, Lineage, Preparation,
+                   Processing, Time, Workflow)
+from creator.count_parser import CountElement
+from creator.loader import add_count_facts
+from creator.sample_parser import parse_objects
+
+# Tables with PostgreSQL-only column types (ARRAY) are not created in SQLite
+postgresql_tables = {'authors', 'article_authors', 'perturbations',
+                     'perturbation_facts'}
+
+
+@compiles(JSONB, 'sqlite')
+def compile_jsonb(type_, compiler, **kwargs):
+    return 'JSON'
+
+
+@compiles(OnConflictDoNothing, 'sqlite')
+def compile_on_conflict_do_nothing(clause, compiler, **kwargs):
+    # SQLite (3.24+) supports the PostgreSQL syntax
+    return (f'ON CONFLICT ({", ".join(clause.inferred_target_elements)}) '
+            f'DO NOTHING')
+
+
+def create_sqlite_session():
+    """Return a session of an in-memory SQLite database (enforcing foreign
+    keys) with the tables required to load counts.
+    """
+    engine = create_engine('sqlite://')
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(connection, record):
+        connection.execute('PRAGMA foreign_keys=ON')
+        # Collation of model.Lineage.path
+        connection.create_collation('C', lambda a, b: (a > b) - (a < b))
+
+    tables = [table for table in Base.metadata.sorted_tables
+              if table.name not in postgresql_tables]
+    Base.metadata.create_all(engine, tables=tables)
+    return sessionmaker(bind=engine)()
+
+
+def parse_study(sample_file):
+    """Parse the given sample metadata file and attach a workflow with one
+    count for each sample (as main.best_parser does with BIOM files).
+
+    Every call creates a new processing chain with the same content.
+    """
+    experiments, samples = parse_objects(sample_file,
+                                         returning=['experiments', 'samples'])
+    prep = Preparation()
+    root = Processing(parameter_values={'sequencing': 'Illumina'},
+                      content_hash='a')
+    child = Processing(parameter_values={'trim length': '100'},
+                       content_hash='b', parent=root)
+    workflow = Workflow(processings=[root, child])
+    prep.workflows = {workflow}
+    lineage = Lineage(kingdom_='Bacteria')
+    workflow.count_dict = {sample_id: [CountElement(3, lineage)]
+                           for sample_id in samples}
+    for sample in samples.values():
+        sample.add_preparation(prep)
+    return experiments, samples
+
+
+class LoaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.session = create_sqlite_session()
+        self.sample_file = './data/test_data/samp_metadata/sample1.txt'
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_add_dated_count_facts(self):
+        experiments, samples = parse_study(self.sample_file)
+        num_facts = add_count_facts(self.session, experiments.values())
+        self.session.commit()
+        self.assertEqual(num_facts, len(samples))
+        self.assertEqual(self.session.query(Count).count(), len(samples))
+        # Every dated Time references a calendar date
+        times = self.session.query(Time).all()
+        self.assertTrue(times)
+        date_keys = {date_key for date_key,
+                     in self.session.query(CalendarDate.date_key)}
+        self.assertTrue({time.date_key for time in times}.issubset(date_keys))
+
+    def test_reuse_stored_times(self):
+        for _ in range(2):
+            experiments, _ = parse_study(self.sample_file)
+            add_count_facts(self.session, experiments.values())
+            self.session.commit()
+        # All samples were collected on the same day
+        self.assertEqual(self.session.query(Time).count(), 1)
+        self.assertEqual(self.session.query(CalendarDate).count(), 1)
+
+    def test_reuse_stored_processings(self):
+        for _ in range(2):
+            experiments, _ = parse_study(self.sample_file)
+            add_count_facts(self.session, experiments.values())
+            self.session.commit()
+        # Both workflows are linked to the processings of the first study
+        self.assertEqual(self.session.query(Processing.content_hash).count(),
+                         2)
+        workflows = self.session.query(Workflow).all()
+        self.assertEqual(len(workflows), 2)
+        self.assertEqual(
+                {processing.id for processing in workflows[0].processings},
+                {processing.id for processing in workflows[1].processings})
+
+
+if __name__ == '__main__':
+    unittest.main()
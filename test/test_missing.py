@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:02:37 2026
+
+@author: William
+"""
+
+# Standard library imports
+import unittest
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+
+# Local application imports
+from creator.missing import (is_missing_value, missing_mask,
+                             mask_missing_values, clear_missing_cache,
+                             _is_missing_string)
+from creator.sample_parser import re_missing
+
+
+class MissingValuesTest(unittest.TestCase):
+
+    def setUp(self):
+        clear_missing_cache()
+
+    def test_is_missing_value(self):
+        for value in ['', 'Not provided', 'missing: not collected', 'NA',
+                      None, np.nan]:
+            self.assertTrue(is_missing_value(value, re_missing))
+        # Only matched at the start of values
+        for value in ['Canada', 'UBERON:feces', 3]:
+            self.assertFalse(is_missing_value(value, re_missing))
+
+    def test_decisions_cached(self):
+        values = pd.Series(['not applicable', 'feces', 'feces',
+                            'not applicable', None])
+        mask = missing_mask(values, re_missing)
+        self.assertEqual(mask.tolist(), [True, False, False, True, True])
+        # Each distinct string is only matched once
+        cache_info = _is_missing_string.cache_info()
+        self.assertEqual((cache_info.misses, cache_info.currsize), (2, 2))
+        missing_mask(values, re_missing)
+        self.assertEqual(_is_missing_string.cache_info().misses, 2)
+
+    def test_mask_missing_values(self):
+        df = pd.DataFrame({'country': ['Canada', 'not provided'],
+                           'age': [1.0, 2.0]})
+        new_df = mask_missing_values(df, re_missing)
+        self.assertEqual(new_df['country'].tolist()[0], 'Canada')
+        self.assertTrue(pd.isna(new_df['country'].tolist()[1]))
+        self.assertEqual(new_df['age'].tolist(), [1.0, 2.0])
+        self.assertEqual(df['country'].tolist(), ['Canada', 'not provided'])
+
+
+if __name__ == '__main__':
+    unittest.main()
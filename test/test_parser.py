@@ -8,6 +8,8 @@ Created on Sat Aug 24 16:47:31 2019
 # Standard library imports
 import unittest
 import os
+import io
+import json
 import datetime
 from collections import OrderedDict
 
@@ -15,7 +17,11 @@ from collections import OrderedDict
 from creator.sample_parser import infer_date_formats
 from creator.sample_parser import parse_sample, parse_subject, parse_objects
 #from creator.sample_parser import ParsedObjects
-from creator.prep_parser import parse_processings
+from creator.prep_parser import (parse_processings, parse_preparations,
+                                 parse_seq_date, group_values,
+                                 get_processing_paths, get_processing_hashes,
+                                 parse_processing_parents, parse_workflows,
+                                 generate_array_items, generate_workflows)
 from creator import ureg
 from model import (Source, Experiment, Subject, Sample, SamplingSite, Time,
                    Preparation, SeqInstrument, Processing)
@@ -486,6 +492,31 @@ class SampleParserTest(unittest.TestCase):
         self.assertIn(self.sample2, experiment.samples)
         self.assertIn(self.sample3, experiment.samples)
 
+    def test_parse_objects_columnar(self):
+        experiment_ids = parse_objects(self.sample_test_file, columnar=True)
+        self.assertIn('317', experiment_ids)
+        experiment = experiment_ids['317']
+        self.assertEqual(self.experiment1, experiment)
+        self.assertIn(self.subject1, experiment.subjects)
+        self.assertIn(self.subject2, experiment.subjects)
+        self.assertIn(self.sample1, experiment.samples)
+        self.assertIn(self.sample2, experiment.samples)
+        self.assertIn(self.sample3, experiment.samples)
+
+    def test_parse_objects_columnar_same_as_rows(self):
+        blacklist_attrs = ['_sa_instance_state', '_experiments', '_subject',
+                           '_samples', '_preparations', '_perturbations']
+        returning = ['subjects', 'samples']
+        for row_objects, columnar_objects in zip(
+                parse_objects(self.sample_test_file, returning),
+                parse_objects(self.sample_test_file, returning, columnar=True)):
+            self.assertEqual(row_objects.keys(), columnar_objects.keys())
+            for key, row_object in row_objects.items():
+                columnar_object = columnar_objects[key]
+                for attr, value in row_object.__dict__.items():
+                    if attr not in blacklist_attrs:
+                        self.assertEqual(value, getattr(columnar_object, attr))
+
     # TODO: We will have to test without the source keyword at some point.
     def test_parse_sample(self):
         self.maxDiff=None
@@ -595,5 +626,146 @@ class SampleParserTest(unittest.TestCase):
 
 
 
+class PrepParserTest(unittest.TestCase):
+
+    prep_test_file = ('./data/test_data/experiments/101/'
+                      '101_prep_237_qiime_20190428-053528.txt')
+
+    def test_parse_seq_date(self):
+        self.assertEqual(parse_seq_date('5/21/09'), datetime.date(2009, 5, 21))
+        self.assertEqual(parse_seq_date('3/1/2007-3/5/2007', dayfirst=True),
+                         datetime.date(2007, 1, 3))
+        with self.assertRaises(ValueError):
+            parse_seq_date('not a date')
+
+    def test_group_values(self):
+        groups = group_values(['237', None, '237', '238'],
+                              ['101.1', '101.2', '101.3', '101.4'])
+        self.assertEqual(list(groups), ['237', None, '238'])
+        self.assertEqual(list(groups['237']), ['101.1', '101.3'])
+        self.assertEqual(list(groups[None]), ['101.2'])
+
+    def test_processing_paths(self):
+        # Two disconnected trees, rooted at '1' and '10'
+        processing_parents = {'2': '1', '3': '2', '4': '2', '11': '10',
+                              '5': '1'}
+        self.assertEqual(get_processing_paths(processing_parents),
+                         {'3': ['3', '2', '1'], '4': ['4', '2', '1'],
+                          '11': ['11', '10'], '5': ['5', '1']})
+        with self.assertRaises(ValueError):
+            get_processing_paths({'1': '2', '2': '3', '3': '2', '4': '1'})
+
+    def test_processing_hashes(self):
+        processings = {'1': {},
+                       '2': {'command': 'Trimming', 'length': '100',
+                             'input_data': '1',
+                             'generated on': '2018-04-16 19:04'},
+                       '11': {},
+                       '12': {'length': '100', 'command': 'Trimming',
+                              'input_data': '11',
+                              'generated on': '2019-01-01 10:00'},
+                       '13': {'command': 'Trimming', 'length': '150',
+                              'input_data': '11'}}
+        hashes = get_processing_hashes(processings)
+        # Artifact ids, generation times and key order are ignored
+        self.assertEqual(hashes['1'], hashes['11'])
+        self.assertEqual(hashes['2'], hashes['12'])
+        self.assertNotEqual(hashes['12'], hashes['13'])
+        with self.assertRaises(ValueError):
+            get_processing_hashes({'1': {'input_data': '2'},
+                                   '2': {'input_data': '1'}})
+
+    def test_shared_processings(self):
+        proc_file = './data/test_data/proc_metadata/prep.json'
+        prep_workflows = parse_workflows(proc_file, index_by='prep')
+        processings = [processing for workflows in prep_workflows.values()
+                       for workflow in workflows
+                       for processing in workflow.processings]
+        distinct = {id(processing) for processing in processings}
+        hashes = {processing.content_hash for processing in processings}
+        self.assertEqual(len(distinct), len(hashes))
+        self.assertLess(len(distinct), len(processings))
+        for processing in processings:
+            if processing.parent is not None:
+                self.assertIn(id(processing.parent), distinct)
+
+    def test_generate_array_items(self):
+        json_str = ' [ 1, 23, "a,]b", {"c": [1, 2]}, null ] '
+        for chunk_size in [1, 2, 100]:
+            items = generate_array_items(io.StringIO(json_str), chunk_size)
+            self.assertEqual(list(items), json.loads(json_str))
+        self.assertEqual(list(generate_array_items(io.StringIO('[]'))), [])
+        # Items are yielded before the rest of the file is read
+        items = generate_array_items(io.StringIO('[{"a": 1}, {"b": ]'), 2)
+        self.assertEqual(next(items), {'a': 1})
+        with self.assertRaises(ValueError):
+            next(items)
+        with self.assertRaises(ValueError):
+            list(generate_array_items(io.StringIO('{"a": 1}')))
+
+    def test_generate_workflows(self):
+        proc_file = './data/test_data/proc_metadata/prep.json'
+        # Hashes of the processings of each workflow (from its terminal
+        # processing to its root), parsed from the whole file at once
+        with open(proc_file) as file:
+            processing_data = json.load(file)
+        registry = {}
+        expected = {}
+        for preps in processing_data:
+            for prep_id, processings in preps.items():
+                processing_dict = parse_processings(processings, prep_id,
+                                                    registry)
+                paths = get_processing_paths(
+                        parse_processing_parents(processings))
+                expected[prep_id] = {
+                        terminal: [processing_dict[proc_id].content_hash
+                                   for proc_id in path]
+                        for terminal, path in paths.items()}
+        self.assertTrue(expected)
+        def get_hashes(workflows):
+            return {terminal: [processing.content_hash
+                               for processing in workflow.processings]
+                    for terminal, workflow in workflows.items()}
+        for chunk_size in [64, 65536]:
+            generated = {prep_id: get_hashes(workflows)
+                         for prep_id, workflows
+                         in generate_workflows(proc_file,
+                                               chunk_size=chunk_size)}
+            self.assertEqual(list(generated), list(expected))
+            self.assertEqual(generated, expected)
+        prep_workflows, terminal_workflows = parse_workflows(
+                proc_file, index_by=['prep', 'terminal_proc'])
+        self.assertEqual(list(prep_workflows), list(expected))
+        self.assertEqual(get_hashes(terminal_workflows),
+                         {terminal: hashes for prep in expected.values()
+                          for terminal, hashes in prep.items()})
+
+    def test_parse_preparations_columnar_same_as_rows(self):
+        dayfirst_dict = infer_date_formats(self.prep_test_file)
+        index_by = ['id', 'study', 'sample']
+        blacklist_attrs = ['_sa_instance_state', 'seq_instrument']
+        row_dicts = parse_preparations(self.prep_test_file, dayfirst_dict,
+                                       index_by)
+        columnar_dicts = parse_preparations(self.prep_test_file,
+                                            dayfirst_dict, index_by,
+                                            columnar=True)
+        row_preps, columnar_preps = row_dicts[0], columnar_dicts[0]
+        self.assertEqual(list(row_preps), list(columnar_preps))
+        for prep_id, row_prep in row_preps.items():
+            columnar_prep = columnar_preps[prep_id]
+            for attr, value in row_prep.__dict__.items():
+                if attr not in blacklist_attrs:
+                    self.assertEqual(value, getattr(columnar_prep, attr))
+            for attr in ['platform', 'model', 'name']:
+                self.assertEqual(getattr(row_prep.seq_instrument, attr),
+                                 getattr(columnar_prep.seq_instrument, attr))
+        for row_index, columnar_index in zip(row_dicts[1:],
+                                             columnar_dicts[1:]):
+            self.assertEqual({key: list(values) for key, values
+                              in row_index.items()},
+                             {key: list(values) for key, values
+                              in columnar_index.items()})
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 12:48:51 2026
+
+@author: William
+"""
+
+# Standard library imports
+import json
+import os.path
+import unittest
+
+# Third-party imports
+
+# Local application imports
+from downloader.processing_network import (
+        parse_artifact_summary, get_artifact_ids, get_artifact_parents,
+        parse_processing_network, extract_processing_network)
+
+fixture_dir = './data/test_data/qiita_network'
+
+
+def read_fixtures():
+    with open(os.path.join(fixture_dir, 'prep_graph_237.json')) as file:
+        graph = json.load(file)
+    summaries = {}
+    for artifact_id in get_artifact_ids(graph):
+        filename = f'artifact_{artifact_id}_summary.html'
+        with open(os.path.join(fixture_dir, filename)) as file:
+            summaries[artifact_id] = file.read()
+    return graph, summaries
+
+
+class Driver:
+    """Stand-in for a web driver evaluating the extraction script against
+    saved responses.
+    """
+
+    def __init__(self, result):
+        self.result = result
+        self.script_timeout = None
+
+    def set_script_timeout(self, timeout):
+        self.script_timeout = timeout
+
+    def execute_async_script(self, script, prep_id, graph_url, summary_url):
+        return self.result
+
+
+class ProcessingNetworkTest(unittest.TestCase):
+
+    def setUp(self):
+        self.graph, self.summaries = read_fixtures()
+        # Processing data of prep 237 collected by clicking through the
+        # network
+        prep_file = './data/test_data/experiments/101/prep_data.json'
+        with open(prep_file) as file:
+            self.prep = json.load(file)[0]['237']
+
+    def test_parse_artifact_summary(self):
+        parameters, files = parse_artifact_summary(self.summaries['2478'])
+        self.assertEqual(parameters, self.prep['2478'])
+        self.assertEqual(files,
+                         [('2478_130_otu_table.biom (biom)', '/download/5005'),
+                          ('sortmerna_picked_otus.tgz (directory)',
+                           '/download/5006')])
+        # Raw data is not generated by a processing job
+        parameters, files = parse_artifact_summary(self.summaries['2477'])
+        self.assertEqual(parameters, {})
+        self.assertEqual(len(files), 2)
+
+    def test_get_artifact_parents(self):
+        self.assertEqual(get_artifact_ids(self.graph), ['2477', '157', '2478'])
+        self.assertEqual(get_artifact_parents(self.graph),
+                         {'157': '2477', '2478': '157'})
+
+    def test_parse_processing_network(self):
+        artifacts, biom_links = parse_processing_network(self.graph,
+                                                         self.summaries)
+        self.assertEqual(artifacts, {artifact_id: self.prep[artifact_id]
+                                     for artifact_id in ['2477', '157',
+                                                         '2478']})
+        self.assertEqual(biom_links, [('2478', '/download/5005')])
+        # Parents missing from summaries are taken from the edges of the graph
+        summaries = dict(self.summaries)
+        summaries['2478'] = summaries['2478'].replace('input_data:',
+                                                      'unknown:')
+        artifacts, _ = parse_processing_network(self.graph, summaries)
+        self.assertEqual(artifacts['2478']['input_data'], '157')
+
+    def test_extract_processing_network(self):
+        driver = Driver({'graph': self.graph, 'summaries': self.summaries})
+        artifacts, biom_links = extract_processing_network(driver, 237,
+                                                           timeout=30)
+        self.assertEqual(artifacts['157'], self.prep['157'])
+        self.assertEqual(driver.script_timeout, 30)
+        driver = Driver({'error': 'Error: /prep/graph/?prep_id=237: 403'})
+        with self.assertRaises(RuntimeError):
+            extract_processing_network(driver, 237)
+
+
+if __name__ == '__main__':
+    unittest.main()
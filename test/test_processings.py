@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:52:27 2026
+
+@author: William
+"""
+
+# Standard library imports
+import unittest
+
+# Third-party imports
+from sqlalchemy.dialects import postgresql
+
+# Local application imports
+from model import Processing, Workflow
+from creator.processings import (get_processing_levels, get_upsert_statement,
+                                 get_terminal_processing)
+
+
+class ProcessingLevelsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Processing(content_hash='a')
+        self.child = Processing(content_hash='b', parent=self.root)
+        self.grandchild = Processing(content_hash='c', parent=self.child)
+        # Same content as child
+        self.copy = Processing(content_hash='b', parent=self.root)
+
+    def test_levels(self):
+        levels = get_processing_levels([self.grandchild, self.copy])
+        self.assertEqual(levels, [[self.root], [self.child],
+                                  [self.grandchild]])
+        self.assertEqual(get_processing_levels([]), [])
+
+    def test_terminal_processing(self):
+        workflow = Workflow(processings=[self.root, self.grandchild,
+                                         self.child])
+        self.assertIs(get_terminal_processing(workflow), self.grandchild)
+
+
+class UpsertTest(unittest.TestCase):
+
+    def test_upsert_statement(self):
+        statement = get_upsert_statement([{'content_hash': 'a',
+                                           'parameter_values': '{}',
+                                           'parent_proc_id': None}])
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        self.assertIn('INSERT INTO processings', sql)
+        self.assertIn('ON CONFLICT (content_hash) DO NOTHING', sql)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:44:09 2026
+
+@author: William
+"""
+
+# Standard library imports
+import os
+import tempfile
+import unittest
+
+# Local application imports
+from creator.csv_cleaner import parse_file
+from creator.read_planner import (get_getter_columns, plan_columns,
+                                  read_columns)
+from creator.sample_parser import (get_age, get_sex, get_study_id,
+                                   generate_rows)
+
+
+class ReadPlannerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.temp_dir.name, 'sample.txt')
+        with open(self.file, 'w') as f:
+            f.write('sample_name\tqiita_study_id\tunused\tage\tage_units\n'
+                    '1.S1\t1\tx\t 30\tyears\n'
+                    '1.S2\t1\ty\t\tnot provided\n')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_getter_columns(self):
+        columns = get_getter_columns([get_study_id, get_sex, get_age])
+        self.assertTrue({'qiita_study_id', 'sex', 'gender', 'age',
+                         'age_units'}.issubset(columns))
+
+    def test_plan_columns(self):
+        header = ['sample_name', 'qiita_study_id', 'unused', 'age']
+        self.assertEqual(plan_columns(header, {'age', 'sample_name', 'sex'},
+                                      suffixes=['study_id']),
+                         ['sample_name', 'qiita_study_id', 'age'])
+
+    def test_read_columns(self):
+        df = read_columns(self.file, ['sample_name', 'age'],
+                          suffixes=['study_id'])
+        self.assertEqual(df.columns.tolist(),
+                         ['sample_name', 'qiita_study_id', 'age'])
+        self.assertEqual(df['age'].tolist(), [' 30', ''])
+
+    def test_parse_file_dtype(self):
+        # A scalar dtype applies to all columns read
+        columns = ['sample_name', 'qiita_study_id']
+        df = parse_file(self.file, columns=columns, dtype=str)
+        self.assertEqual(df['qiita_study_id'].tolist(), ['1', '1'])
+        df = parse_file(self.file, columns=columns,
+                        column_types={'numeric': ['age']},
+                        dtype={'qiita_study_id': float})
+        self.assertEqual(df['qiita_study_id'].tolist(), [1.0, 1.0])
+        self.assertEqual(df['age'].tolist()[0], 30)
+
+    def test_generate_pruned_rows(self):
+        rows = list(generate_rows(self.file, ['age', 'age_units']))
+        self.assertEqual(rows, [{'age': ' 30', 'age_units': 'years'},
+                                {'age': '', 'age_units': 'not provided'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:58:40 2026
+
+@author: William
+"""
+
+# Standard library imports
+import pickle
+import unittest
+
+# Third-party imports
+
+# Local application imports
+from model import Sample, Preparation, Article
+from creator.staging import (Staging, ExperimentRecord, SubjectRecord,
+                             SampleRecord, PreparationRecord, ArticleRecord,
+                             AuthorRecord, CollectiveAuthorRecord)
+from creator.sample_parser import stage_objects
+
+
+class RecordTest(unittest.TestCase):
+
+    def test_slots(self):
+        record = SampleRecord(orig_sample_id='101.1', age=1.5)
+        self.assertFalse(hasattr(record, '__dict__'))
+        self.assertIsNone(record.weight)
+        with self.assertRaises(AttributeError):
+            record.unknown = 1
+        with self.assertRaises(TypeError):
+            SampleRecord(unknown=1)
+
+    def test_to_object(self):
+        sample = SampleRecord(orig_sample_id='101.1', age=1.5).to_object()
+        self.assertIsInstance(sample, Sample)
+        self.assertEqual((sample.orig_sample_id, sample.age), ('101.1', 1.5))
+        record = PreparationRecord(prep_id='237', sample_id='101.1',
+                                   platform='Illumina',
+                                   instrument_model='MiSeq')
+        preparation = record.to_object()
+        self.assertIsInstance(preparation, Preparation)
+        self.assertEqual(preparation.prep_id, '237')
+        self.assertEqual(preparation.seq_instrument.model, 'MiSeq')
+        self.assertEqual(preparation.seq_instrument.platform, 'Illumina')
+        self.assertFalse(hasattr(preparation, 'instrument_model'))
+
+    def test_article_record(self):
+        record = ArticleRecord(
+                pmid='31159879',
+                authors=[AuthorRecord(first_initial='J', first_name='Jack',
+                                      middle_initials=['A'],
+                                      last_name='Gilbert')],
+                collective_authors=[CollectiveAuthorRecord(name='consortium')])
+        # Records can be sent to and from worker processes
+        record = pickle.loads(pickle.dumps(record))
+        self.assertEqual(record.authors[0].middle_initials, ['A'])
+        article = record.to_object()
+        self.assertIsInstance(article, Article)
+        self.assertEqual(article.pmid, '31159879')
+        self.assertEqual(article.authors[0].last_name, 'Gilbert')
+        self.assertEqual(article.collective_authors[0].name, 'consortium')
+
+
+class StagingTest(unittest.TestCase):
+
+    def test_to_object_dicts(self):
+        staging = Staging()
+        staging.add_experiment(ExperimentRecord(orig_study_id='101'))
+        staging.add_subject(SubjectRecord(orig_study_id='101',
+                                          orig_subject_id='1', sex='male'))
+        # The first subject record is kept
+        staging.add_subject(SubjectRecord(orig_study_id='101',
+                                          orig_subject_id='1', sex='female'))
+        for sample_id in ['101.1', '101.2']:
+            staging.add_sample(SampleRecord(orig_study_id='101',
+                                            orig_subject_id='1',
+                                            orig_sample_id=sample_id))
+        object_dicts = staging.to_object_dicts()
+        experiment = object_dicts['experiments']['101']
+        subject = object_dicts['subjects']['1']
+        samples = object_dicts['samples']
+        self.assertEqual(subject.sex, 'male')
+        self.assertEqual(set(samples), {'101.1', '101.2'})
+        self.assertEqual(subject.samples, set(samples.values()))
+        self.assertEqual(experiment.samples, set(samples.values()))
+        self.assertEqual(experiment.subjects, {subject})
+
+    def test_stage_objects(self):
+        file = './data/test_data/samp_metadata/sample1.txt'
+        staging = stage_objects(file)
+        self.assertTrue(len(staging))
+        self.assertTrue(all(isinstance(record, SampleRecord)
+                            for record in staging.samples.values()))
+        samples = staging.to_object_dicts()['samples']
+        self.assertEqual(len(samples), len(staging))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:05:32 2026
+
+@author: William
+"""
+
+# Standard library imports
+import os
+import os.path
+import shutil
+import tempfile
+import unittest
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+
+# Third-party imports
+
+# Local application imports
+from downloader.download_pool import download_studies
+from downloader.sync_manifest import (SyncManifest, get_artifact,
+                                      get_artifact_kind, get_download_kinds)
+
+
+Study = namedtuple('Study', ['study_id', 'num_samples', 'num_artifacts'])
+
+
+@contextmanager
+def dummy_session(dl_dir):
+    yield None
+
+
+def download_study(session, study, dl_dir, files, downloads, options=None,
+                   skip_artifacts=()):
+    """Stand-in for qiita_downloader.download_study: write the files of the
+    study selected by the download options that are not skipped.
+    """
+    kinds = get_download_kinds(options)
+    for filename, content in files[study.study_id].items():
+        artifact = get_artifact(filename)
+        if (artifact in skip_artifacts
+                or get_artifact_kind(artifact) not in kinds):
+            continue
+        downloads[filename] += 1
+        with open(os.path.join(dl_dir, filename), 'w') as file:
+            file.write(content)
+
+
+class SyncManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.manifest_path = os.path.join(self.output_dir, 'manifest.json')
+        self.files = {
+            '101': {'101_20171109-130044.txt': 'samples',
+                    '101_prep_237_qiime_20190428-053528.txt': 'qiime 237',
+                    '101_prep_237_20190428-053528.txt': 'prep 237',
+                    '2478_130_otu_table.biom': 'biom 2478',
+                    'prep_data.json': '{}'}}
+        self.downloads = Counter()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def download(self, study, options=None):
+        manifest = SyncManifest.load(self.manifest_path)
+        self.downloads.clear()
+        return download_studies(
+                [study], dummy_session,
+                lambda *args, **kwargs: download_study(
+                        *args, files=self.files, downloads=self.downloads,
+                        options=options, **kwargs),
+                self.output_dir, sessions=1, manifest=manifest,
+                options=options)
+
+    def test_get_artifact(self):
+        self.assertEqual(get_artifact('101_prep_237_20190428-053528.txt'),
+                         'prep:237')
+        self.assertEqual(get_artifact('101_20171109-130044.txt'), 'sample')
+        self.assertEqual(get_artifact('prep_data.json'), 'processing')
+        self.assertEqual(get_artifact('2478_130_otu_table.biom'),
+                         'biom:2478')
+        self.assertEqual(get_artifact('otu_table.biom'), 'biom')
+
+    def test_record_study(self):
+        study = Study('101', 10, 2)
+        self.assertEqual(self.download(study), [])
+        manifest = SyncManifest.load(self.manifest_path)
+        entry = manifest.studies['101']
+        self.assertEqual(entry['version'], 'samples=10;artifacts=2')
+        self.assertEqual(sorted(entry['artifacts']),
+                         ['biom:2478', 'prep:237', 'processing', 'sample'])
+        self.assertEqual(entry['artifacts']['prep:237']['remote'], '237')
+        self.assertEqual(entry['artifacts']['biom:2478']['remote'], '2478')
+        study_dir = os.path.join(self.output_dir, '101')
+        self.assertTrue(manifest.is_current(study, study_dir))
+        self.assertFalse(manifest.is_current(Study('101', 10, 3), study_dir))
+        # Only the manifest and the study directory are left (no temporary
+        # files)
+        self.assertEqual(sorted(os.listdir(self.output_dir)),
+                         ['101', 'manifest.json'])
+
+    def test_unchanged_study(self):
+        study = Study('101', 10, 2)
+        self.download(study)
+        self.download(study)
+        self.assertEqual(self.downloads, Counter())
+
+    def test_changed_study(self):
+        self.download(Study('101', 10, 2))
+        # A new preparation: only the new preparation and BIOM files and the
+        # files of the study are downloaded
+        self.files['101']['101_prep_238_20190501-101010.txt'] = 'prep 238'
+        self.files['101']['2480_otu_table.biom'] = 'biom 2480'
+        self.download(Study('101', 10, 3))
+        self.assertEqual(set(self.downloads),
+                         {'101_20171109-130044.txt', 'prep_data.json',
+                          '101_prep_238_20190501-101010.txt',
+                          '2480_otu_table.biom'})
+        study_dir = os.path.join(self.output_dir, '101')
+        self.assertEqual(sorted(os.listdir(study_dir)),
+                         sorted(self.files['101']))
+        manifest = SyncManifest.load(self.manifest_path)
+        self.assertTrue(manifest.is_current(Study('101', 10, 3), study_dir))
+
+    def test_wider_options(self):
+        study = Study('101', 10, 2)
+        study_dir = os.path.join(self.output_dir, '101')
+        self.download(study, options={'sample'})
+        self.assertEqual(os.listdir(study_dir), ['101_20171109-130044.txt'])
+        manifest = SyncManifest.load(self.manifest_path)
+        self.assertTrue(manifest.is_current(study, study_dir, {'sample'}))
+        self.assertFalse(manifest.is_current(study, study_dir,
+                                             {'prep', 'tree'}))
+        # The files of the new options are downloaded, the sample metadata
+        # is kept
+        self.download(study, options={'prep', 'tree'})
+        self.assertEqual(set(self.downloads),
+                         set(self.files['101']) - {'101_20171109-130044.txt'})
+        self.assertEqual(sorted(os.listdir(study_dir)),
+                         sorted(self.files['101']))
+        manifest = SyncManifest.load(self.manifest_path)
+        self.assertEqual(manifest.studies['101']['kinds'],
+                         ['prep', 'sample', 'tree'])
+        self.download(study, options={'sample', 'prep', 'qiime', 'tree'})
+        self.assertEqual(self.downloads, Counter())
+
+    def test_tampered_file(self):
+        study = Study('101', 10, 2)
+        self.download(study)
+        # A corrupted preparation file (same size) is downloaded again
+        path = os.path.join(self.output_dir, '101',
+                            '101_prep_237_20190428-053528.txt')
+        with open(path, 'w') as file:
+            file.write('prep 999')
+        self.download(study)
+        self.assertEqual(self.downloads['101_prep_237_20190428-053528.txt'],
+                         1)
+        with open(path) as file:
+            self.assertEqual(file.read(), 'prep 237')
+
+
+if __name__ == '__main__':
+    unittest.main()
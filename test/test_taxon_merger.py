@@ -11,6 +11,7 @@ import io
 import pandas as pd
 
 from creator.taxon_merger import aggregate_at_taxon_level
+from creator.taxonomy import TaxonRegistry
 
 # Change this variable to True if you want to generate new output files to
 # generate comparison text for use in tests.
@@ -169,6 +170,46 @@ class TaxonMergerTest(unittest.TestCase):
         exp_df = pd.read_csv(self.simple_sum_custom_dummy)
         self.assertTrue(out_df.equals(exp_df))
     
+    def test_taxon_id_sum_genus(self):
+        registry = TaxonRegistry()
+        taxa = [registry.get_taxa(names) for names 
+                in self.df[self.taxon_cols].itertuples(index=False)]
+        temp_df = self.df.copy()
+        temp_df['genus_id'] = [id(lineage[5]) if lineage[5] else None
+                               for lineage in taxa]
+        out_df = aggregate_at_taxon_level(temp_df, taxon_level='genus',
+                                          grouping_cols=self.grouping_cols,
+                                          use_taxon_ids=True)
+        self.assertEqual(list(out_df.columns), 
+                         self.grouping_cols + ['genus_id', 'count'])
+        exp_df = pd.read_csv(self.complex_sum_genus)
+        out_counts = out_df.groupby('sample_id')['count'].apply(sorted)
+        exp_counts = exp_df.groupby('sample_id')['count'].apply(sorted)
+        self.assertTrue(out_counts.equals(exp_counts))
+        self.assertEqual(out_df['genus_id'].isna().sum(), 3)
+    
+    def test_taxon_id_remove_genus(self):
+        temp_df = self.df.copy()
+        temp_df['genus_id'] = temp_df['genus'].map({'g__O': 1, 'g__P': 2})
+        out_df = aggregate_at_taxon_level(temp_df, taxon_level='genus',
+                                          grouping_cols=self.grouping_cols,
+                                          missing_method='remove',
+                                          use_taxon_ids=True)
+        self.assertEqual(out_df['count'].tolist(), [1, 1, 2, 4])
+
+    def test_taxon_id_keep_all_cols(self):
+        temp_df = self.df.copy()
+        temp_df['genus_id'] = temp_df['genus'].map({'g__O': 1, 'g__P': 2})
+        temp_df['phylum_id'] = 7
+        out_df = aggregate_at_taxon_level(temp_df, taxon_level='genus',
+                                          grouping_cols=self.grouping_cols,
+                                          keep_all_cols=True,
+                                          use_taxon_ids=True)
+        # Only counts are summed
+        self.assertTrue((out_df['phylum_id'] == 7).all())
+        self.assertEqual(out_df['count'].sum(), temp_df['count'].sum())
+        self.assertIn('genus', out_df.columns)
+    
     # TEST EXCEPTION RAISING
     def test_unrecognized_dummy_value_key(self):
         with self.assertRaises(ValueError):
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:03:12 2026
+
+@author: William
+"""
+
+# Standard library imports
+import os
+import tempfile
+import unittest
+
+# Third-party imports
+import pandas as pd
+
+# Local application imports
+from creator.taxonomy import (normalize_taxon, normalize_lineage,
+                              get_lineage_depth, get_lineage_attrs,
+                              get_taxon_key, TaxonRegistry,
+                              get_lineage_path, get_subtree_bounds,
+                              get_ancestor_paths)
+from creator.taxon_harmonizer import (TaxonomyHarmonizer, load_synonyms,
+                                      harmonize_taxon_cols)
+from creator.taxon_merger import aggregate_at_taxon_level
+
+
+class NormalizeLineageTest(unittest.TestCase):
+
+    def test_normalize_taxon(self):
+        self.assertEqual(normalize_taxon(' f__[Tissierellaceae]', 'family'),
+                         'f__Tissierellaceae')
+        self.assertEqual(normalize_taxon('G__rc4-4', 'genus'), 'g__Rc4-4')
+        self.assertEqual(normalize_taxon('s__Muciniphila', 'species'),
+                         's__muciniphila')
+        self.assertEqual(normalize_taxon('Bacteria', 'kingdom'), 'k__Bacteria')
+
+    def test_normalize_empty_taxon(self):
+        for name in [None, float('nan'), '', ' g__', 'g__[]']:
+            self.assertEqual(normalize_taxon(name, 'genus'), 'g__')
+
+    def test_normalize_lineage(self):
+        expected = ['k__Bacteria', 'p__Firmicutes', 'c__Clostridia',
+                    'o__Clostridiales', 'f__', 'g__', 's__']
+        string = 'k__Bacteria; p__Firmicutes; c__Clostridia; o__Clostridiales'
+        self.assertEqual(normalize_lineage(string), expected)
+        names = ['k__Bacteria', ' p__Firmicutes', 'c__Clostridia',
+                 'o__Clostridiales', 'f__', None, None]
+        self.assertEqual(normalize_lineage(names), expected)
+        self.assertEqual(get_lineage_depth(expected), 4)
+        self.assertEqual(normalize_lineage(None), ['k__', 'p__', 'c__', 'o__',
+                                                   'f__', 'g__', 's__'])
+
+    def test_normalize_lineage_too_long(self):
+        with self.assertRaises(ValueError):
+            normalize_lineage(['k__A']*8)
+
+    def test_get_lineage_attrs(self):
+        names = ['k__Bacteria', 'p__Firmicutes', 'c__Clostridia',
+                 'o__Clostridiales', 'f__[Tissierellaceae]', 'g__', 's__']
+        attrs = get_lineage_attrs(names)
+        self.assertEqual(attrs['family_'], 'f__Tissierellaceae')
+        self.assertEqual(attrs['species_'], 's__')
+        self.assertEqual(attrs['depth'], 5)
+        self.assertEqual(attrs['raw_lineage'], '; '.join(names))
+
+
+class TaxonRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = TaxonRegistry()
+        self.lineage1 = normalize_lineage('k__A; p__B; c__C; o__D; f__E; g__F')
+        self.lineage2 = normalize_lineage('k__A; p__B; c__C; o__D; f__G; g__F')
+
+    def test_shared_ancestors(self):
+        taxa1 = self.registry.get_taxa(self.lineage1)
+        taxa2 = self.registry.get_taxa(self.lineage2)
+        self.assertIs(taxa1[3], taxa2[3])
+        self.assertIsNot(taxa1[4], taxa2[4])
+        self.assertEqual(len(self.registry), 8)
+
+    def test_same_name_different_parent(self):
+        genus1 = self.registry.get_taxa(self.lineage1)[5]
+        genus2 = self.registry.get_taxa(self.lineage2)[5]
+        self.assertEqual(genus1.name, genus2.name)
+        self.assertIsNot(genus1, genus2)
+        self.assertEqual(genus1.parent.name, 'f__E')
+
+    def test_empty_ranks(self):
+        taxa = self.registry.get_taxa(self.lineage1)
+        self.assertIsNone(taxa[6])
+        attrs = get_lineage_attrs(self.lineage1, self.registry)
+        self.assertIs(attrs['genus_taxon'], taxa[5])
+        self.assertIsNone(attrs['species_taxon'])
+
+    def test_registry_from_existing_taxa(self):
+        taxa = self.registry.get_taxa(self.lineage1)
+        registry = TaxonRegistry(taxa[:3])
+        self.assertIn(get_taxon_key(taxa[2]), registry)
+        self.assertIs(registry.get_taxa(self.lineage2)[2], taxa[2])
+
+
+
+class LineagePathTest(unittest.TestCase):
+
+    def setUp(self):
+        self.paths = [get_lineage_path(normalize_lineage(lineage)) for lineage
+                      in ['k__A; p__B; c__C; o__D; f__E; g__F',
+                          'k__A; p__B; c__C; o__D; f__EE',
+                          'k__A; p__B; c__C; o__D; f__E',
+                          'k__A; p__B; c__C; o__X; f__E']]
+
+    def test_lineage_path(self):
+        self.assertEqual(self.paths[0], 'k__A;p__B;c__C;o__D;f__E;g__F;')
+        names = normalize_lineage('k__A; p__B; c__; o__D')
+        self.assertEqual(get_lineage_path(names), 'k__A;p__B;o__D;')
+        self.assertIsNone(get_lineage_path(normalize_lineage(None)))
+
+    def test_taxon_path(self):
+        taxa = TaxonRegistry().get_taxa(normalize_lineage('k__A; p__B; c__C'))
+        self.assertEqual([taxon.path for taxon in taxa[:3]],
+                         ['k__A;', 'k__A;p__B;', 'k__A;p__B;c__C;'])
+
+    def test_subtree_bounds(self):
+        lower, upper = get_subtree_bounds('k__A;p__B;c__C;o__D;f__E;')
+        subtree = [path for path in self.paths if lower <= path < upper]
+        self.assertEqual(subtree, [self.paths[0], self.paths[2]])
+
+    def test_ancestor_paths(self):
+        self.assertEqual(get_ancestor_paths('k__A;p__B;c__C;'),
+                         ['k__A;', 'k__A;p__B;', 'k__A;p__B;c__C;'])
+
+
+
+class TaxonomyHarmonizerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.synonym_file = os.path.join(self.temp_dir.name, 'synonyms.tsv')
+        self.cache_file = os.path.join(self.temp_dir.name, 'cache.json')
+        with open(self.synonym_file, 'w') as f:
+            f.write('# Test synonyms\n'
+                    'synonym\tcanonical\n'
+                    'f__[Tissierellaceae]\tf__Peptoniphilaceae\n'
+                    'g__Unassigned\tg__\n')
+        self.harmonizer = TaxonomyHarmonizer.from_file(self.synonym_file,
+                                                       self.cache_file)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_load_synonyms(self):
+        self.assertEqual(load_synonyms(self.synonym_file),
+                         {'f__Tissierellaceae': 'f__Peptoniphilaceae',
+                          'g__Unassigned': 'g__'})
+
+    def test_resolve(self):
+        gg_lineage = 'k__Bacteria; p__Firmicutes; c__Clostridia; ' \
+                     'o__Clostridiales; f__[Tissierellaceae]; g__Unassigned; s__'
+        tree_lineage = ['k__Bacteria', 'p__Firmicutes', 'c__Clostridia',
+                        'o__Clostridiales', 'f__Peptoniphilaceae', 'g__', 's__']
+        self.assertEqual(self.harmonizer.resolve(gg_lineage), tree_lineage)
+        self.assertEqual(self.harmonizer.resolve(tree_lineage), tree_lineage)
+        self.assertEqual(len(self.harmonizer), 2)
+
+    def test_resolve_positional_lineages(self):
+        harmonizer = TaxonomyHarmonizer()
+        # Empty ranks are kept in place, whichever lineage is resolved first
+        self.assertEqual(harmonizer.resolve(['k__Bacteria', None,
+                                             'c__Bacilli'])[:3],
+                         ['k__Bacteria', 'p__', 'c__Bacilli'])
+        self.assertEqual(harmonizer.resolve(['k__Bacteria', 'c__Bacilli'])[:3],
+                         ['k__Bacteria', 'p__Bacilli', 'c__'])
+        self.assertEqual(len(harmonizer), 2)
+
+    def test_cache_file(self):
+        self.harmonizer.resolve('k__Bacteria; p__Firmicutes')
+        self.harmonizer.save_cache()
+        harmonizer = TaxonomyHarmonizer.from_file(self.synonym_file,
+                                                  self.cache_file)
+        self.assertEqual(len(harmonizer), 1)
+        # Cache is discarded if the synonyms change
+        harmonizer = TaxonomyHarmonizer({}, self.cache_file)
+        self.assertEqual(len(harmonizer), 0)
+
+    def test_harmonize_taxon_cols(self):
+        df = pd.DataFrame({'sample_id': [1, 2],
+                           'kingdom': ['k__Bacteria', 'k__Bacteria'],
+                           'family': ['f__[Tissierellaceae]', None],
+                           'count': [3, 4]})
+        out_df = harmonize_taxon_cols(df, self.harmonizer)
+        self.assertEqual(out_df['family'].tolist(),
+                         ['f__Peptoniphilaceae', 'f__'])
+        self.assertEqual(out_df['count'].tolist(), [3, 4])
+
+    def test_aggregate_saves_cache(self):
+        df = pd.DataFrame({'sample_id': [1, 1],
+                           'kingdom': ['k__Bacteria', 'k__Bacteria'],
+                           'family': ['f__[Tissierellaceae]',
+                                      'f__Peptoniphilaceae'],
+                           'count': [3, 4]})
+        out_df = aggregate_at_taxon_level(df, taxon_level='kingdom',
+                                          simple_aggregation=True,
+                                          grouping_cols=['sample_id'],
+                                          harmonizer=self.harmonizer)
+        self.assertEqual(out_df['count'].tolist(), [7])
+        harmonizer = TaxonomyHarmonizer.from_file(self.synonym_file,
+                                                  self.cache_file)
+        self.assertEqual(len(harmonizer), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:20:41 2026
+
+@author: William
+"""
+
+# Standard library imports
+import unittest
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+from pint import DimensionalityError
+
+# Local application imports
+from creator import ureg
+from creator.units import resolve_units, convert_values
+from creator.csv_cleaner import convert_units
+
+
+class ConvertValuesTest(unittest.TestCase):
+
+    def test_resolve_units(self):
+        self.assertEqual(resolve_units('CM'), ureg.centimetres)
+        self.assertEqual(resolve_units(ureg.years), ureg.years)
+        self.assertIsNone(resolve_units('y'))
+        self.assertEqual(resolve_units('y', {'y': 'years'}), ureg.years)
+        self.assertIsNone(resolve_units(np.nan))
+
+    def test_convert_values(self):
+        values = pd.Series([150.0, 60.0, 1.5, 2.0])
+        units = pd.Series(['cm', 'in', 'm', None])
+        converted = convert_values(values, units, 'm')
+        expected = [(150*ureg.cm).to(ureg.m).magnitude,
+                    (60*ureg.inch).to(ureg.m).magnitude, 1.5]
+        self.assertEqual(converted[:3].tolist(), expected)
+        self.assertTrue(np.isnan(converted[3]))
+
+    def test_convert_values_with_offset(self):
+        values = pd.Series([0.0, 100.0])
+        converted = convert_values(values, ureg.degC, ureg.kelvin)
+        self.assertEqual(converted.round(2).tolist(), [273.15, 373.15])
+
+    def test_incompatible_units(self):
+        with self.assertRaises(DimensionalityError):
+            convert_values(pd.Series([1.0]), pd.Series(['kg']), 'm')
+
+    def test_convert_units(self):
+        df = pd.DataFrame({'age': [12.0, 2.0, 30.0],
+                           'age_unit': ['months', 'y', 'years']})
+        df = convert_units(df, values_to_units={'age': 'age_unit'},
+                           to_units={'age': 'years'},
+                           decimal_places={'age': 1},
+                           recognized_units={'y': 'years'})
+        self.assertEqual(df['age'].tolist(), [1.0, 2.0, 30.0])
+        self.assertNotIn('age_unit', df.columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -388,7 +388,7 @@ def extract_initials(names):
 # "There is no existing work-around for triggering an exception inside a
 # generator. It is the only case in Python where active code cannot be
 # excepted to or through.")
-def generate_children(xml_file, parent=None):
+def generate_children(xml_file, parent=None, streaming=False):
     """Generate the child XML elements for a chosen parent element.
 
     Parameters
@@ -401,6 +401,11 @@ def generate_children(xml_file, parent=None):
         to be generated). If no parent is specified, the root node is assumed
         to be the parent.
 
+    streaming : bool
+        If True, the file is parsed incrementally (See iterparse_children)
+        and children are generated as soon as they have been parsed. In this
+        case, `parent` must be a tag name.
+
     Yields
     ------
     xml.etree.ElementTree.Element
@@ -410,6 +415,9 @@ def generate_children(xml_file, parent=None):
         given tag or XPath `parent` can be found, a StopIteration is raised.
         If the xml_file cannot be parsed, a ValueError is raised.
     """
+    if streaming:
+        yield from iterparse_children(xml_file, parent)
+        return
     try:
         tree = ET.parse(xml_file)
     except ET.ParseError:
@@ -429,6 +437,57 @@ def generate_children(xml_file, parent=None):
         yield record
 
 
+def iterparse_children(xml_file, parent=None):
+    """Generate the child XML elements for a chosen parent element while the
+    XML file is being parsed.
+
+    Unlike generate_children, the whole element tree is never held in
+    memory: each child is removed from its parent once the next child is
+    requested, so that processed children can be freed and memory use does
+    not grow with the size of the file.
+
+    Parameters
+    ----------
+    xml_file : str, os.PathLike or file
+        Path to an XML file, or a file object corresponding to an XML file.
+
+    parent : str
+        Tag name of the parent XML element (containing child elements to be
+        generated). If no parent is specified, the root node is assumed to be
+        the parent.
+
+    Yields
+    ------
+    xml.etree.ElementTree.Element
+        A child element of the first XML element with the given tag `parent`.
+        If no element with the given tag can be found, no element is
+        generated. If the xml_file cannot be parsed, a ValueError is raised.
+    """
+    parent_element = None
+    parent_depth = None
+    depth = 0
+    try:
+        for event, element in ET.iterparse(xml_file, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if (parent_element is None and
+                        (element.tag == parent if parent else depth == 1)):
+                    parent_element = element
+                    parent_depth = depth
+                continue
+            depth -= 1
+            if parent_element is None:
+                continue
+            if depth == parent_depth:
+                yield element
+                parent_element.remove(element)
+            elif depth < parent_depth:
+                # The parent element is closed
+                return
+    except ET.ParseError:
+        raise ValueError('`xml_file` cannot be parsed.')
+
+
 if __name__ == '__main__':
     xml_file = r'../data/test_data/bibliographic/pubmed/pubmed_results.xml'
     a = ArticleCollection(parse_articles(xml_file))